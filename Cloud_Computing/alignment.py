@@ -0,0 +1,52 @@
+import pandas as pd
+
+def raw_samples_flux(bucket, sensor, fields, start="-30s", include_untagged=True):
+    """
+    Flux for the narrow gyro_status stream of one sensor. Rows written before the
+    IMU gateway tagged samples with a sensor (the legacy single-IMU uploader) have
+    no sensor tag; with include_untagged they are read as that sensor's too.
+    """
+    sensor_filter = f'r.sensor == "{sensor}"'
+    if include_untagged:
+        sensor_filter = f'(not exists r.sensor or {sensor_filter})'
+    field_filter = " or ".join(f'r._field == "{field}"' for field in fields)
+    return f'''
+    from(bucket: "{bucket}")
+      |> range(start: {start})
+      |> filter(fn: (r) => r._measurement == "gyro_status" and {sensor_filter})
+      |> filter(fn: (r) => {field_filter})
+      |> keep(columns: ["_time", "_field", "_value"])
+    '''
+
+def align_fields(narrow, fields, tolerance="20ms", fill_limit=2):
+    """
+    Client-side replacement for pivot(rowKey: ["_time"]) on the narrow stream
+    (one row per _time/_field/_value).
+
+    The fields of one sample don't always land on exactly the same timestamp, so an
+    exact pivot leaves NaN holes. Instead every field is joined as-of onto the
+    timestamps of the first field: the nearest value within `tolerance` wins. Values
+    still missing after that are forward-filled from the previous sample, at most
+    `fill_limit` samples in a row.
+
+    Returns a wide DataFrame indexed by _time with one column per field.
+    """
+    narrow = narrow[narrow["_field"].isin(fields)][["_time", "_field", "_value"]].copy()
+    narrow["_time"] = pd.to_datetime(narrow["_time"])
+    narrow["_value"] = pd.to_numeric(narrow["_value"], errors="coerce")
+    narrow = narrow.sort_values("_time")
+
+    tolerance = pd.Timedelta(tolerance)
+    by_field = {field: group[["_time", "_value"]].rename(columns={"_value": field})
+                for field, group in narrow.groupby("_field")}
+    if fields[0] not in by_field:
+        return pd.DataFrame(columns=fields, index=pd.DatetimeIndex([], name="_time"))
+
+    wide = by_field[fields[0]]
+    for field in fields[1:]:
+        if field in by_field:
+            wide = pd.merge_asof(wide, by_field[field], on="_time", direction="nearest", tolerance=tolerance)
+        else:
+            wide[field] = float("nan")
+
+    return wide.set_index("_time")[fields].ffill(limit=fill_limit)
@@ -4,8 +4,13 @@ from influxdb_client import InfluxDBClient
 from scipy.stats import skew, kurtosis
 import time
 import math
+import os
 
 from SecretsManager import get_secret
+from windowing import WindowEmitter
+from segmentation import StrikeDetector
+from alignment import align_fields, raw_samples_flux
+from prediction_publisher import PredictionPublisher, model_version
 
 #---------------------------------------------#
 # Fetch the secrets from AWS Secrets Manager
@@ -17,11 +22,13 @@ INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
 INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
 INFLUXDB_BUCKET = "SIOT_Test"
 
-# Load model and scaler
-model = joblib.load("Cloud_Computing\kendo_move_classifier.pkl")
-scaler = joblib.load("Cloud_Computing\RobustScaler.pkl")
-le = joblib.load("Cloud_Computing\label_encoder.pkl")
-print("Successfully loaded model and scaler.")
+# Load model and scaler (next to this script, wherever it is run from)
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_FILES = [os.path.join(MODEL_DIR, name)
+               for name in ("kendo_move_classifier.pkl", "RobustScaler.pkl", "label_encoder.pkl")]
+model, scaler, le = (joblib.load(path) for path in MODEL_FILES)
+MODEL_VERSION = model_version(MODEL_FILES)
+print(f"Successfully loaded model and scaler (model version {MODEL_VERSION}).")
 #---------------------------------------------#
 
 def extract_features(window):
@@ -51,71 +58,127 @@ feature_order = [
 # Parameters
 window_size = 10  # Number of samples per window
 fetch_interval = 0.2  # Time in seconds between fetching new data
+hop_size = 5  # Samples between the starts of consecutive windows
+feature_source = "raw"  # "raw": pull gyro_status samples, "edge": read move_features rows from the IMU gateway
+align_tolerance = "20ms"  # Max timestamp difference between fields of the same sample
+classify_strikes_only = False  # Raw mode: classify segmented strikes instead of every window
+# Raw mode classifies only this sensor's gyro_status samples and publishes under its tag, like the
+# edge-mode rows, so one sensor's predictions never mix with another's (SENSOR_PORTS in imu_upload.py)
+raw_sensor = "individual"
+raw_include_untagged = True  # Also read untagged samples (legacy uploader) as raw_sensor's
 
 # Connect to InfluxDB
 client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
 query_api = client.query_api()
 print("Successfully connected to InfluxDB.")
 
+# Predictions go to the move_predictions measurement, where the dashboards read them
+publisher = PredictionPublisher(client, INFLUXDB_BUCKET, MODEL_VERSION)
+
+def predict_edge_features(last_seen):
+    """
+    Classify every move_features row the IMU gateway published since `last_seen`.
+    Each row already holds the 48 window features, so there is nothing to pivot
+    over raw samples or compute here. Returns the newest timestamp handled.
+    """
+    feature_columns = ", ".join(f'"{name}"' for name in feature_order)
+    start = f'time(v: "{last_seen.isoformat()}")' if last_seen is not None else "-30s"
+    query = f'''
+    from(bucket: "{INFLUXDB_BUCKET}")
+      |> range(start: {start})
+      |> filter(fn: (r) => r._measurement == "move_features")
+      |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+      |> keep(columns: ["_time", "sensor", {feature_columns}])
+      |> sort(columns: ["_time"])
+    '''
+    rows = query_api.query_data_frame(query)
+    if isinstance(rows, list):
+        rows = pd.concat(rows, ignore_index=True)
+    if rows.empty:
+        return last_seen
+
+    rows["_time"] = pd.to_datetime(rows["_time"])
+    rows = rows.sort_values("_time")
+    if last_seen is not None:
+        rows = rows[rows["_time"] > last_seen]
+    rows = rows.dropna(subset=feature_order)
+    if rows.empty:
+        return last_seen
+
+    # One scaler/model call for every new window
+    predictions = le.inverse_transform(model.predict(scaler.transform(rows[feature_order])))
+    for window_end, sensor, predicted_move in zip(rows["_time"], rows.get("sensor", [None] * len(rows)), predictions):
+        print(f'Latest Predicted Move{f" ({sensor})" if sensor else ""}: {predicted_move}')
+        publisher.publish(sensor or raw_sensor, window_end, predicted_move)
+    return rows["_time"].max()
+
 
 # Loop for real-time predictions
 try:
+    last_seen = None
+    emitter = WindowEmitter(window_size, hop_size)
+    detector = StrikeDetector(window_size)
     while True:
-        # Query InfluxDB to fetch the last 30s of data
-        query = f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -30s)
-          |> filter(fn: (r) => r._measurement == "gyro_status")
-          |> filter(fn: (r) => r._field == "accelX" or r._field == "accelY" or r._field == "accelZ" or
-                               r._field == "gyroX" or r._field == "gyroY" or r._field == "gyroZ" or
-                               r._field == "roll" or r._field == "pitch")
-          |> sort(columns: ["_time"])
-          |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
-          |> drop(columns: ["_start", "_stop", "_measurement"])
-        '''
-
-        # Fetch data from InfluxDB
-        df = query_api.query_data_frame(query)
-
-        # Check if data is empty
-        if df.empty:
-            print("No data retrieved, waiting for more data...")
+        if feature_source == "edge":
+            last_seen = predict_edge_features(last_seen)
             time.sleep(fetch_interval)
             continue
 
-        # Ensure numeric conversion
+        # Query InfluxDB to fetch the last 30s of data
         variables = ['accelX', 'accelY', 'accelZ', 'gyroX', 'gyroY', 'gyroZ', 'roll', 'pitch']
-        for var in variables:
-            df[var] = pd.to_numeric(df[var], errors='coerce')
+        query = raw_samples_flux(INFLUXDB_BUCKET, raw_sensor, variables, include_untagged=raw_include_untagged)
 
-        # Reset index
-        df = df.reset_index(drop=True)
+        # Fetch the narrow (unpivoted) stream from InfluxDB
+        df = query_api.query_data_frame(query)
+        if isinstance(df, list):
+            df = pd.concat(df, ignore_index=True)
 
-        # Extract the latest window of data
-        if len(df) < window_size:
-            print(f"Not enough data for a window of size {window_size}, waiting for more data...")
+        # Check if data is empty
+        if df.empty:
+            print("No data retrieved, waiting for more data...")
             time.sleep(fetch_interval)
             continue
 
-        # Check for missing values in the window
-        if df[variables].isnull().values.any():
-            print("Missing data detected in the latest window, waiting for more data...")
+        # Line the fields up per sample (as-of join), indexed by time so rows seen in earlier polls can be recognised
+        df = align_fields(df, variables, tolerance=align_tolerance)
+
+        if classify_strikes_only:
+            # Only the strikes that finished since the last poll
+            windows = [(f"Strike {strike.start} -> {strike.end}", strike.window) for strike in detector.push(df)]
+            if not windows:
+                time.sleep(fetch_interval)
+                continue
+        else:
+            # Every window completed since the last poll, each exactly once
+            windows = [(f"Window ending {window.index[-1]}", window) for window in emitter.push(df)]
+            if not windows:
+                print(f"Not enough new data for a window of size {window_size}, waiting for more data...")
+                time.sleep(fetch_interval)
+                continue
+
+        # Check for missing values in the windows
+        complete = [(label, window) for label, window in windows if not window[variables].isnull().values.any()]
+        if len(complete) < len(windows):
+            print(f"Missing data detected in {len(windows) - len(complete)} window(s), skipping them...")
+        if not complete:
             time.sleep(fetch_interval)
             continue
 
-        # Extract features
-        features_df = extract_features(df.iloc[-window_size:])
+        # Extract features for all new windows and classify them in one batch
+        features_df = pd.concat([extract_features(window) for _, window in complete], ignore_index=True)
         X_new = features_df[feature_order]
 
         # Scale the features
         X_new_scaled = scaler.transform(X_new)
 
         # Make prediction
-        prediction = model.predict(X_new_scaled)
-        predicted_move = le.inverse_transform(prediction)[0]
+        predictions = model.predict(X_new_scaled)
+        predicted_moves = le.inverse_transform(predictions)
 
-        # Output the latest prediction
-        print(f'Latest Predicted Move: {predicted_move}')
+        # Output and publish the predictions in window order
+        for (label, window), predicted_move in zip(complete, predicted_moves):
+            print(f'{label}: Predicted Move: {predicted_move}')
+            publisher.publish(raw_sensor, window.index[-1], predicted_move, window_start=window.index[0])
 
         # Wait for the next fetch
         time.sleep(fetch_interval)
@@ -124,3 +187,5 @@ except KeyboardInterrupt:
     print("Real-time prediction stopped by user.")
 except Exception as e:
     print(f"Error: {e}")
+finally:
+    publisher.close()
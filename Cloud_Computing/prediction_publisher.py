@@ -0,0 +1,55 @@
+import hashlib
+
+import pandas as pd
+from influxdb_client import Point, WriteOptions, WritePrecision
+
+PREDICTIONS_MEASUREMENT = "move_predictions"
+
+# Batching: a few requests per second at most, and every prediction reaches the
+# dashboards (0.5 s refresh) within one refresh
+BATCH_SIZE = 100
+FLUSH_INTERVAL_MS = 250
+
+def model_version(paths):
+    """
+    Short content hash of the model pickles, recorded with every prediction so a
+    dashboard (or a later analysis) can tell which model produced it.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+class PredictionPublisher:
+    """
+    Batched writer for the move_predictions measurement.
+
+    One point per classified window, timestamped with the window's last sample:
+      tags:   sensor, model_version
+      fields: move (predicted label), window_start (ns since epoch, when known)
+    """
+
+    def __init__(self, client, bucket, model_version, batch_size=BATCH_SIZE, flush_interval_ms=FLUSH_INTERVAL_MS):
+        self.bucket = bucket
+        self.model_version = model_version
+        self.write_api = client.write_api(write_options=WriteOptions(batch_size=batch_size,
+                                                                     flush_interval=flush_interval_ms,
+                                                                     jitter_interval=0,
+                                                                     retry_interval=5_000))
+
+    def publish(self, sensor, window_end, move, window_start=None):
+        point = (Point(PREDICTIONS_MEASUREMENT)
+                 .tag("sensor", sensor)
+                 .tag("model_version", self.model_version)
+                 .field("move", str(move))
+                 .time(pd.Timestamp(window_end).value, WritePrecision.NS))
+        if window_start is not None:
+            point.field("window_start", pd.Timestamp(window_start).value)
+        self.write_api.write(bucket=self.bucket, record=point, write_precision=WritePrecision.NS)
+
+    def close(self):
+        """
+        Flush whatever is still buffered.
+        """
+        self.write_api.close()
@@ -0,0 +1,123 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# One detected strike: onset/end/peak timestamps and the samples to classify
+Strike = namedtuple("Strike", ["start", "end", "peak", "window"])
+
+class StrikeDetector:
+    """
+    Streaming strike segmentation over the IMU samples.
+
+    A strike starts when the gyro magnitude rises above `onset_gyro` (deg/s) and
+    ends once it has stayed below `release_gyro` for `quiet_samples` samples
+    (hysteresis, so one cut doesn't split into several). It only counts if it
+    lasted at least `min_samples` and its peak jerk (g/s) reached `min_jerk`;
+    footwork and idle time never reach the classifier.
+
+    Each strike is classified on `window_size` samples centred on its gyro peak,
+    the window length the model was trained on.
+    """
+
+    def __init__(self, window_size=10, onset_gyro=120.0, release_gyro=60.0, min_jerk=20.0,
+                 min_samples=3, quiet_samples=3, max_samples=200):
+        self.window_size = window_size
+        self.onset_gyro = onset_gyro
+        self.release_gyro = release_gyro
+        self.min_jerk = min_jerk
+        self.min_samples = min_samples
+        self.quiet_samples = quiet_samples
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        self.samples = pd.DataFrame()
+        self.first_position = 0
+        self.last_time = None
+        self.last_accel = None
+        self.active = None
+        self.quiet = 0
+        self.pending = []
+
+    def push(self, df):
+        """
+        Add the rows of a poll (indexed by _time, sorted, overlapping the previous
+        poll) and return the strikes that are now complete, oldest first.
+        """
+        if df.empty:
+            return []
+        if self.last_time is not None and df.index[0] > self.last_time:
+            # Rows were missed between polls; a strike can't be traced across the hole
+            self.reset()
+        new_rows = df if self.last_time is None else df[df.index > self.last_time]
+        if new_rows.empty:
+            return []
+
+        gyro = np.sqrt(new_rows['gyroX']**2 + new_rows['gyroY']**2 + new_rows['gyroZ']**2).to_numpy()
+        accel = np.sqrt(new_rows['accelX']**2 + new_rows['accelY']**2 + new_rows['accelZ']**2).to_numpy()
+        times = new_rows.index
+        previous_accel = accel[0] if self.last_accel is None else self.last_accel
+        previous_time = times[0] if self.last_time is None else self.last_time
+        dt = np.diff(times.insert(0, previous_time)).astype('timedelta64[ns]').astype(float) / 1e9
+        jerk = np.abs(np.diff(accel, prepend=previous_accel)) / np.where(dt > 0, dt, np.inf)
+
+        base = self.first_position + len(self.samples)
+        self.samples = new_rows if self.samples.empty else pd.concat([self.samples, new_rows])
+        self.last_time = times[-1]
+        self.last_accel = accel[-1]
+
+        for offset, (g, j) in enumerate(zip(gyro, jerk)):
+            self._step(base + offset, g, j)
+
+        strikes = []
+        available = self.first_position + len(self.samples)
+        while self.pending and self.pending[0]["window_end"] <= available:
+            strikes.append(self._strike(self.pending.pop(0)))
+
+        # Keep enough history for the active strike's window and a pre-roll for the next one
+        keep_from = available - self.window_size
+        if self.active is not None:
+            keep_from = min(keep_from, self.active["start"] - self.window_size)
+        if self.pending:
+            keep_from = min(keep_from, self.pending[0]["window_start"])
+        keep_from = max(keep_from - self.first_position, 0)
+        self.samples = self.samples.iloc[keep_from:]
+        self.first_position += keep_from
+        return strikes
+
+    def _step(self, position, gyro, jerk):
+        if self.active is None:
+            if gyro >= self.onset_gyro:
+                self.active = {"start": position, "last_above": position, "peak": position,
+                               "peak_gyro": gyro, "peak_jerk": jerk}
+                self.quiet = 0
+            return
+
+        strike = self.active
+        strike["peak_jerk"] = max(strike["peak_jerk"], jerk)
+        if gyro > strike["peak_gyro"]:
+            strike["peak"], strike["peak_gyro"] = position, gyro
+        if gyro >= self.release_gyro:
+            strike["last_above"] = position
+            self.quiet = 0
+        else:
+            self.quiet += 1
+
+        if self.quiet >= self.quiet_samples or position - strike["start"] + 1 >= self.max_samples:
+            self.active = None
+            long_enough = strike["last_above"] - strike["start"] + 1 >= self.min_samples
+            if long_enough and strike["peak_jerk"] >= self.min_jerk:
+                # Timestamps now, while every row of the strike is still kept; a
+                # pending strike only holds on to the rows of its window
+                strike["times"] = tuple(self._time_at(strike[key]) for key in ("start", "last_above", "peak"))
+                strike["window_start"] = max(strike["peak"] - self.window_size // 2, self.first_position)
+                strike["window_end"] = strike["window_start"] + self.window_size
+                self.pending.append(strike)
+
+    def _time_at(self, position):
+        return self.samples.index[position - self.first_position]
+
+    def _strike(self, strike):
+        start = strike["window_start"] - self.first_position
+        return Strike(*strike["times"], window=self.samples.iloc[start:start + self.window_size])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The predictor's modules are flat scripts run from Cloud_Computing/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from alignment import align_fields, raw_samples_flux
+from windowing import WindowEmitter
+
+FIELDS = ['accelX', 'accelY', 'accelZ', 'gyroX', 'gyroY', 'gyroZ', 'roll', 'pitch']
+# Export of the legacy gyro_status stream: no sensor tag on any row
+LEGACY_EXPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "last_minute_data.csv")
+
+def legacy_narrow():
+    """
+    The legacy export as query_data_frame returns the narrow stream: one row per
+    _time/_field/_value, split into a table per field.
+    """
+    wide = pd.read_csv(LEGACY_EXPORT)
+    narrow = wide.melt(id_vars=["_time"], value_vars=FIELDS, var_name="_field", value_name="_value")
+    return [group.reset_index(drop=True) for _, group in narrow.groupby("_field")]
+
+def test_raw_flux_reads_untagged_rows_by_default():
+    flux = raw_samples_flux("SIOT_Test", "individual", FIELDS)
+    assert '(not exists r.sensor or r.sensor == "individual")' in flux
+    assert all(f'r._field == "{field}"' in flux for field in FIELDS)
+
+def test_raw_flux_can_require_the_tag():
+    flux = raw_samples_flux("SIOT_Test", "individual", FIELDS, include_untagged=False)
+    assert "not exists" not in flux
+    assert 'r.sensor == "individual"' in flux
+
+def test_untagged_legacy_stream_yields_windows():
+    tables = legacy_narrow()
+    df = pd.concat(tables, ignore_index=True)
+
+    wide = align_fields(df, FIELDS)
+
+    export = pd.read_csv(LEGACY_EXPORT)
+    assert len(wide) == len(export)
+    assert not wide.isnull().values.any()
+    np.testing.assert_array_equal(wide["gyroX"].to_numpy(), export["gyroX"].to_numpy())
+
+    windows = WindowEmitter(10, 5).push(wide)
+    assert len(windows) == (len(wide) - 10) // 5 + 1
+
+@pytest.mark.parametrize("offset_ms", [0, 2, 4])  # Under half the 10 ms sample period
+def test_fields_a_few_ms_apart_line_up(offset_ms):
+    times = pd.date_range("2024-01-01", periods=20, freq="10ms", tz="UTC")
+    narrow = pd.DataFrame({
+        "_time": list(times) + list(times + pd.Timedelta(milliseconds=offset_ms)),
+        "_field": ["accelX"] * 20 + ["gyroX"] * 20,
+        "_value": list(range(20)) + list(range(100, 120)),
+    })
+    wide = align_fields(narrow, ["accelX", "gyroX"])
+
+    assert list(wide["gyroX"]) == list(range(100, 120))
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from segmentation import StrikeDetector
+
+def imu_frame(gyro, accel, start="2024-01-01", freq="10ms"):
+    index = pd.date_range(start, periods=len(gyro), freq=freq, name="_time")
+    zeros = np.zeros(len(gyro))
+    return pd.DataFrame({"gyroX": gyro, "gyroY": zeros, "gyroZ": zeros,
+                         "accelX": accel, "accelY": zeros, "accelZ": zeros}, index=index)
+
+def ramp_strike():
+    # 20 quiet samples, a 20-sample ramp peaking on its last sample, then quiet again
+    gyro = np.concatenate([np.zeros(20), np.linspace(130, 300, 20), np.zeros(20)])
+    accel = np.concatenate([np.ones(20), np.tile([1.0, 3.0], 10), np.ones(20)])
+    return imu_frame(gyro, accel)
+
+def test_strike_in_one_poll():
+    frame = ramp_strike()
+    strikes = StrikeDetector().push(frame)
+
+    assert len(strikes) == 1
+    strike = strikes[0]
+    assert strike.start == frame.index[20]
+    assert strike.peak == frame.index[39]
+    assert strike.end == frame.index[39]
+    assert strike.window.index.equals(frame.index[34:44])
+
+def test_strike_split_across_polls_matches_one_poll():
+    frame = ramp_strike()
+    expected = StrikeDetector().push(frame)
+
+    # The strike ends in the first poll, but its peak-centred window is only complete
+    # in the second; the polls overlap like the predictor's range queries
+    detector = StrikeDetector()
+    assert detector.push(frame.iloc[:43]) == []
+    strikes = detector.push(frame.iloc[30:])
+
+    assert len(strikes) == 1
+    strike = strikes[0]
+    assert (strike.start, strike.end, strike.peak) == (expected[0].start, expected[0].end, expected[0].peak)
+    assert strike.start <= strike.peak
+    pd.testing.assert_frame_equal(strike.window, expected[0].window)
+
+def test_every_split_of_a_stream_finds_the_same_strikes():
+    rng = np.random.default_rng(0)
+    gyro = np.where(rng.random(600) < 0.05, 250.0, 0.0)
+    gyro = np.convolve(gyro, np.ones(6), mode="same")
+    accel = 1.0 + rng.normal(scale=0.5, size=600)
+    frame = imu_frame(gyro, accel)
+    expected = StrikeDetector().push(frame)
+    assert expected
+
+    for chunk in (7, 13, 50):
+        detector = StrikeDetector()
+        strikes = []
+        for start in range(0, len(frame), chunk):
+            strikes += detector.push(frame.iloc[max(start - 3, 0):start + chunk])
+        assert [s[:3] for s in strikes] == [s[:3] for s in expected]
+        for strike, reference in zip(strikes, expected):
+            pd.testing.assert_frame_equal(strike.window, reference.window)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windowing import WindowEmitter
+
+def stream(rows=200):
+    index = pd.date_range("2024-01-01", periods=rows, freq="10ms", name="_time")
+    return pd.DataFrame({"accelX": np.arange(rows, dtype=float)}, index=index)
+
+def all_windows(frame, window_size, hop):
+    return [frame.iloc[end - window_size:end] for end in range(window_size, len(frame) + 1, hop)]
+
+def poll_in_chunks(emitter, frame, chunks, overlap):
+    windows, start = [], 0
+    for chunk in chunks:
+        windows += emitter.push(frame.iloc[max(start - overlap, 0):start + chunk])
+        start += chunk
+    return windows
+
+@pytest.mark.parametrize("window_size, hop", [(10, 5), (10, 10), (10, 1), (10, 15)])
+def test_chunked_polls_emit_every_window_once(window_size, hop):
+    frame = stream()
+    rng = np.random.default_rng(0)
+    chunks = rng.integers(1, 40, size=100)
+
+    windows = poll_in_chunks(WindowEmitter(window_size, hop), frame, chunks, overlap=25)
+
+    expected = all_windows(frame, window_size, hop)
+    assert len(windows) == len(expected)
+    for window, reference in zip(windows, expected):
+        pd.testing.assert_frame_equal(window, reference)
+
+def test_repeated_poll_emits_nothing_new():
+    frame = stream(30)
+    emitter = WindowEmitter(10, 5)
+
+    assert len(emitter.push(frame)) == 5
+    assert emitter.push(frame) == []
+    assert emitter.push(frame.iloc[:0]) == []
+
+def test_hole_between_polls_starts_over():
+    frame = stream(60)
+    emitter = WindowEmitter(10, 5)
+    emitter.push(frame.iloc[:22])
+
+    # The next poll starts after the last row seen: windows restart from its first row
+    windows = emitter.push(frame.iloc[30:])
+
+    assert [window.index[0] for window in windows] == list(frame.index[30:51:5])
+    assert all(len(window) == 10 for window in windows)
+
+def test_keeps_only_what_the_next_window_needs():
+    frame = stream(1000)
+    emitter = WindowEmitter(10, 5)
+    poll_in_chunks(emitter, frame, [50] * 20, overlap=10)
+
+    assert len(emitter.samples) < 10
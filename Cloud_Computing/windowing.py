@@ -0,0 +1,53 @@
+import pandas as pd
+
+class WindowEmitter:
+    """
+    Turn repeated polls of "the last 30 s" into fixed windows emitted exactly once.
+
+    Windows hold `window_size` samples and start every `hop` samples, counted over
+    the whole stream rather than per poll. Rows already seen in an earlier poll are
+    ignored, and a burst of rows between polls yields every window it completes,
+    in order, so none are skipped or scored twice.
+    """
+
+    def __init__(self, window_size=10, hop=5):
+        self.window_size = window_size
+        self.hop = hop
+        self.samples = pd.DataFrame()
+        self.last_time = None
+        # Stream position of the first row in self.samples and of the next window's last row
+        self.first_position = 0
+        self.next_end = window_size
+
+    def push(self, df):
+        """
+        Add the rows of a poll (indexed by _time, sorted) and return the list of
+        windows they complete, oldest first. Each poll must overlap the previous one.
+        """
+        if df.empty:
+            return []
+        if self.last_time is not None and df.index[0] > self.last_time:
+            # The poll no longer reaches back to the last row we saw, so rows were missed;
+            # start over rather than emit windows that straddle the hole
+            self.samples = pd.DataFrame()
+            self.first_position = 0
+            self.next_end = self.window_size
+            self.last_time = None
+        new_rows = df if self.last_time is None else df[df.index > self.last_time]
+        if new_rows.empty:
+            return []
+        self.last_time = new_rows.index[-1]
+        self.samples = new_rows if self.samples.empty else pd.concat([self.samples, new_rows])
+
+        windows = []
+        while self.next_end <= self.first_position + len(self.samples):
+            end = self.next_end - self.first_position
+            windows.append(self.samples.iloc[end - self.window_size:end])
+            self.next_end += self.hop
+
+        # Only keep what the next window still needs (with hop > window_size, that can
+        # start beyond the rows held: drop them all, not more)
+        keep_from = min(max(self.next_end - self.window_size - self.first_position, 0), len(self.samples))
+        self.samples = self.samples.iloc[keep_from:]
+        self.first_position += keep_from
+        return windows
@@ -1,9 +1,13 @@
 import json
-import boto3
-from botocore.exceptions import ClientError
 
-def get_secret(secret_name):
-    client = boto3.client("secretsmanager")
+def get_secret(secret_name, client=None):
+    # boto3/botocore are imported here rather than at module level so importing
+    # this module stays cheap; pass `client` to reuse an existing Secrets Manager client
+    import boto3
+    from botocore.exceptions import ClientError
+
+    if client is None:
+        client = boto3.client("secretsmanager")
     try:
         get_secret_value_response = client.get_secret_value(SecretId=secret_name)
         
@@ -1,28 +1,88 @@
 import json
 import os
-import requests
-import boto3
-
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import MessageEvent, TextMessage, TextSendMessage, ImagemapSendMessage
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 
+import line_http
 from SecretsManager import get_secret
 
 #####################################
-secrets = get_secret('kendo-line-bot-secret')
-access_token = secrets.get('Channel_Access_Token')
-channel_secret = secrets.get('Channel_Secret')
-line_bot_api = LineBotApi(access_token)
-handler = WebhookHandler(channel_secret)
+# Cold start: nothing heavy happens at import. Secrets, AWS clients and the LINE SDK
+# are created on first use and then kept for the life of the container, so warm
+# invocations reuse them (and their connection pools), and the LINE SDK is only
+# imported when an imagemap is actually sent
+SECRET_NAME = 'kendo-line-bot-secret'
+
+_secrets = None
+_aws_clients = {}
+_line_bot_api = None
+_executor = None
+_init_lock = threading.RLock()  # boto3 client creation isn't thread-safe, and events run on a pool
+
+# Events of one webhook delivery are handled concurrently, one task per user
+MAX_EVENT_WORKERS = 8
+DEADLINE_MARGIN_S = 0.3  # Stop waiting this long before the Lambda timeout, so the response still goes out
+
+# AWS calls fail fast instead of botocore's 60 s timeouts, so one slow call can't hold
+# a worker past the 3 s Lambda timeout: at worst 2 attempts of (0.2 + 0.5) s plus up to
+# 1 s of retry backoff, ~2.4 s
+AWS_CONNECT_TIMEOUT_S = 0.2
+AWS_READ_TIMEOUT_S = 0.5
+AWS_MAX_ATTEMPTS = 2  # Including the first one
+
+# Per-event context, passed explicitly instead of module globals
+LineEvent = namedtuple("LineEvent", ["type", "user_id", "text", "reply_token"])
+
+# Display names are cached in two levels: per container in memory, and in the user's
+# KendoAIUser item (display_name, display_name_refreshed_at in epoch seconds). The
+# LINE profile API is only called when both miss or the name is older than the TTL
+DISPLAY_NAME_TTL_S = 7 * 24 * 3600
+MAX_CACHED_NAMES = 10_000
+_display_names = OrderedDict()  # user_id -> (display_name, refreshed_at), oldest use first
+_display_names_lock = threading.Lock()
+
+def get_aws_client(service):
+    # One boto3 client per service per container
+    with _init_lock:
+        if service not in _aws_clients:
+            import boto3
+            from botocore.config import Config
+            config = Config(connect_timeout=AWS_CONNECT_TIMEOUT_S, read_timeout=AWS_READ_TIMEOUT_S,
+                            retries={"total_max_attempts": AWS_MAX_ATTEMPTS, "mode": "standard"})
+            _aws_clients[service] = boto3.client(service, config=config)
+        return _aws_clients[service]
+
+def get_access_token():
+    global _secrets
+    with _init_lock:
+        if _secrets is None:
+            _secrets = get_secret(SECRET_NAME, client=get_aws_client("secretsmanager"))
+        return _secrets.get('Channel_Access_Token')
+
+def get_line_bot_api():
+    global _line_bot_api
+    with _init_lock:
+        if _line_bot_api is None:
+            from linebot import LineBotApi
+            _line_bot_api = LineBotApi(get_access_token())
+        return _line_bot_api
+
+def get_executor():
+    # Bounded pool, kept with the container like the clients
+    global _executor
+    with _init_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_EVENT_WORKERS, thread_name_prefix="line-event")
+        return _executor
 ######################################
-def update_displayName(user_id): #Find the name of the user
-    headers = {
-        "Authorization": f'Bearer {access_token}'
-    }
-    url = f"https://api.line.me/v2/bot/profile/{user_id}"
-    
-    response = requests.get(url, headers=headers)
+def update_displayName(user_id, deadline=None): #Find the name of the user
+    try:
+        response = line_http.get(f"/v2/bot/profile/{user_id}", get_access_token(), deadline=deadline)
+    except Exception as e:
+        print("Error retrieving user profile:", str(e))
+        return None
     
     if response.status_code == 200:
         user_profile = response.json()
@@ -35,7 +95,7 @@ def update_displayName(user_id): #Find the name of the user
 
 def update_user_role(user_id, new_role):
     try:
-        response = dynamodb.update_item(
+        response = get_aws_client('dynamodb').update_item(
             TableName = 'KendoAIUser',
             Key={'line_id':{'S':user_id}},
             UpdateExpression='SET #r = :new_role',
@@ -49,19 +109,10 @@ def update_user_role(user_id, new_role):
         print(f"Error updating role for user {user_id}:{str(e)}")
         return None
 
-def push_message(message):
-    # LINE API endpoint
-        LINE_API_URL = 'https://api.line.me/v2/bot/message/push'
-
-        # Prepare the HTTP headers with the authorization token
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {access_token}',
-        }
-
+def push_message(to, message, deadline=None):
         # Prepare the message payload
         data = {
-            'to': line_id,
+            'to': to,
             'messages': [
                 {
                     'type': 'text',
@@ -70,11 +121,17 @@ def push_message(message):
             ],
         }
 
-        # Send the push message request
-        response = requests.post(LINE_API_URL, json=data, headers=headers)
+        # Send the push message request on the shared session; the retry key makes
+        # retries safe, and a 409 means an earlier attempt was already accepted
+        try:
+            response = line_http.post('/v2/bot/message/push', get_access_token(), deadline=deadline,
+                                      retry_key=True, json=data)
+        except Exception as e:
+            print(f'Failed to send unauthorized user message: {str(e)}')
+            return
 
         # Check the response
-        if response.status_code == 200:
+        if response.status_code in (200, 409):
             print('Unauthorized user message sent successfully.')
         else:
             print(f'Failed to send unauthorized user message. Status code: {response.status_code}')
@@ -91,6 +148,8 @@ def load_json(json_file):
 def send_imagemap_message(json_file,user_id, reply_token):
     imagemap_message = load_json(json_file)
     if imagemap_message:
+        from linebot.models import ImagemapSendMessage
+
         # Use the ImagemapSendMessage class to send the imagemap
         message = ImagemapSendMessage(
             base_url=imagemap_message["baseUrl"],
@@ -98,13 +157,110 @@ def send_imagemap_message(json_file,user_id, reply_token):
             base_size=imagemap_message["baseSize"],
             actions=imagemap_message["actions"]
         )
-        line_bot_api.reply_message(reply_token, message)
+        get_line_bot_api().reply_message(reply_token, message)
     else:
         print("Error loading imagemap message.")
 
-def message_listener(user_id, user_message, reply_token):
+def message_listener(user_id, user_message, reply_token, deadline=None):
     if user_message == "Practice":
-        push_message("Navigate here to monitor your training! https://kendoai.streamlit.app/")
+        push_message(user_id, "Navigate here to monitor your training! https://kendoai.streamlit.app/", deadline)
+
+def parse_events(msg):
+    events = []
+    for raw_event in msg['events']:
+        message = raw_event.get('message', {})
+        events.append(LineEvent(type=raw_event.get('type'),
+                                user_id=raw_event.get('source', {}).get('userId'),
+                                text=message.get('text') if message.get('type') == 'text' else None,
+                                reply_token=raw_event.get('replyToken')))
+    return events
+
+def cached_display_name(user_id):
+    # Fresh display name from this container's memory, else None
+    with _display_names_lock:
+        cached = _display_names.get(user_id)
+        if cached is None or time.time() - cached[1] >= DISPLAY_NAME_TTL_S:
+            return None
+        _display_names.move_to_end(user_id)
+        return cached[0]
+
+def remember_display_name(user_id, display_name, refreshed_at):
+    with _display_names_lock:
+        _display_names[user_id] = (display_name, refreshed_at)
+        _display_names.move_to_end(user_id)
+        while len(_display_names) > MAX_CACHED_NAMES:
+            _display_names.popitem(last=False)
+
+def register_user(user_id, deadline=None):
+    # Register new users and keep their display name fresh. Returns the display name
+    display_name = cached_display_name(user_id)
+    if display_name is not None:
+        # Only cached after the user's item was read or written, so already registered
+        return display_name
+
+    dynamodb = get_aws_client('dynamodb')
+    # Check if user is registered: one read of only the attributes needed here
+    try:
+        response = dynamodb.get_item(
+            TableName="KendoAIUser",
+            Key={"line_id": {"S": user_id}},
+            ProjectionExpression="line_id, display_name, display_name_refreshed_at",
+        )
+
+        if "Item" not in response:
+            #New User Registration, as a conditional write so that concurrent deliveries
+            #for the same user can't overwrite each other (or a role set in between)
+            display_name = update_displayName(user_id, deadline)
+            refreshed_at = time.time() if display_name is not None else 0
+            item = {
+                "line_id": {"S": user_id},
+                "role": {"S":"solo"},
+                "display_name_refreshed_at": {"N": str(refreshed_at)},
+            }
+            if display_name is not None:
+                item["display_name"] = {"S": display_name}
+            try:
+                dynamodb.put_item(TableName="KendoAIUser", Item=item,
+                                  ConditionExpression="attribute_not_exists(line_id)")
+            except dynamodb.exceptions.ConditionalCheckFailedException:
+                print(f"User {user_id} was registered by another delivery")
+        else:
+            # Registered: use the stored name unless it has expired
+            item = response["Item"]
+            display_name = item.get("display_name", {}).get("S")
+            refreshed_at = float(item.get("display_name_refreshed_at", {}).get("N", 0))
+            if display_name is None or time.time() - refreshed_at >= DISPLAY_NAME_TTL_S:
+                fresh_name = update_displayName(user_id, deadline)
+                if fresh_name is not None:
+                    display_name, refreshed_at = fresh_name, time.time()
+                    dynamodb.update_item(
+                        TableName="KendoAIUser",
+                        Key={"line_id": {"S": user_id}},
+                        UpdateExpression="SET display_name = :name, display_name_refreshed_at = :refreshed_at",
+                        ExpressionAttributeValues={":name": {"S": display_name},
+                                                   ":refreshed_at": {"N": str(refreshed_at)}},
+                    )
+
+        if display_name is not None and refreshed_at:
+            remember_display_name(user_id, display_name, refreshed_at)
+        return display_name
+
+    except Exception as e:
+        print("Error interacting with DynamoDB:", str(e))
+        return None
+
+def handle_user_events(user_id, events, deadline=None):
+    # All of one user's events in the delivery, in order; LINE API calls are cut short at `deadline`
+    register_user(user_id, deadline)
+    for line_event in events:
+        if line_event.text is not None:
+            message_listener(line_event.user_id, line_event.text, line_event.reply_token, deadline)
+
+def time_budget(context):
+    # Seconds left for the events before the Lambda times out
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return max(context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_S, 0)
 
 ######################################
 
@@ -127,43 +283,39 @@ def lambda_handler(event, context):
             "body": json.dumps({"message": "No events in request body"})
         }
 
-    # Declare Variables for DynamoDB
-    dynamodb = boto3.client('dynamodb')
-    global line_id
-    line_id = msg['events'][0]['source']['userId']
-    display_name = update_displayName(line_id)
-    user_message = msg['events'][0]['message']['text']
-    reply_token = msg['events'][0]['replyToken']
-
-    # Check if user is registered
-    try:
-        #Query
-        response = dynamodb.query(
-            TableName="KendoAIUser",
-            KeyConditionExpression="line_id = :line_id",
-            ExpressionAttributeValues = {
-                ":line_id": {"S":line_id}
-            }
-        )
-
-        if "Items" not in response or len(response["Items"]) == 0:
-            #New User Registration
-            dynamodb.put_item(
-                TableName="KendoAIUser",
-                Item={
-                    "line_id": {"S": line_id},
-                    "role": {"S":"solo"},
-                    "display_name":{"S": display_name}
-                    }
-            )
+    # LINE batches events under load; group them by user so that different users are
+    # handled concurrently while each user's events keep their order
+    events_by_user = {}
+    for line_event in parse_events(msg):
+        if line_event.user_id is None:
+            print(f"Skipping {line_event.type} event without a user")
+            continue
+        events_by_user.setdefault(line_event.user_id, []).append(line_event)
 
-    except Exception as e:
-        print("Error interacting with DynamoDB:", str(e))
+    # Create the shared clients once here, rather than in whichever worker gets there first
+    get_access_token()
+    get_aws_client('dynamodb')
 
-    message_listener(line_id, user_message, reply_token)
+    budget = time_budget(context)
+    deadline = time.monotonic() + budget if budget is not None else None
+    executor = get_executor()
+    futures = {executor.submit(handle_user_events, user_id, user_events, deadline): user_id
+               for user_id, user_events in events_by_user.items()}
+    done, not_done = wait(futures, timeout=budget)
+    for future in done:
+        if future.exception() is not None:
+            print(f"Error handling events for user {futures[future]}: {future.exception()}")
+    # Out of time: users still queued are dropped, but cancel() can't stop a handler that
+    # is already running. It carries on after the response (frozen with the container,
+    # resuming on its next thaw); its LINE calls are cut short by the deadline, and AWS
+    # calls by the client timeouts, so it doesn't run long.
+    for future in not_done:
+        started = not future.cancel()
+        print(f"Ran out of time handling events for user {futures[future]}"
+              f"{' (still running)' if started else ' (dropped)'}")
 
     # # Mirror the user's message back (Use this to check if the bot is working)
-    # line_bot_api.reply_message(
+    # get_line_bot_api().reply_message(
     #     msg['events'][0]['replyToken'],
     #     TextSendMessage(text=msg['events'][0]['message']['text'])
     # )
@@ -0,0 +1,93 @@
+import threading
+import time
+import uuid
+
+# One pooled, keep-alive HTTP session to the LINE API per container, so warm
+# invocations reuse the TLS connection instead of opening a new one per call.
+# requests/urllib3 are only imported when the first call is made.
+LINE_API = "https://api.line.me"
+
+# Timeouts stay well inside the Lambda's 3 s, and are shortened further to fit the
+# caller's deadline when one is given
+CONNECT_TIMEOUT_S = 0.5
+READ_TIMEOUT_S = 2.0
+
+# Retries on 429 and 5xx, honouring Retry-After. When LINE asks for a longer wait
+# than MAX_RETRY_AFTER_S, or one that would run past the caller's deadline, the
+# response is returned as it is instead of retrying early. Failed connects
+# are retried too; a read timeout is not, since LINE may already have acted on it.
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.2
+MAX_RETRY_AFTER_S = 1.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+POOL_SIZE = 8  # One connection per event worker (MAX_EVENT_WORKERS in app.py)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            # Connect failures only; statuses are retried by request(), within the deadline
+            retry = Retry(total=MAX_RETRIES, connect=MAX_RETRIES, read=0, status=0, other=0,
+                          backoff_factor=BACKOFF_FACTOR, respect_retry_after_header=False, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+def timeout_for(deadline=None):
+    """
+    (connect, read) timeouts, cut short to end by `deadline` (time.monotonic()) if given.
+    """
+    if deadline is None:
+        return (CONNECT_TIMEOUT_S, READ_TIMEOUT_S)
+    remaining = max(deadline - time.monotonic(), 0.05)
+    return (min(CONNECT_TIMEOUT_S, remaining), min(READ_TIMEOUT_S, remaining))
+
+def retry_wait(response, attempt):
+    """
+    Seconds to wait before retrying `response`: its Retry-After if it has one,
+    exponential backoff otherwise. None if that is longer than MAX_RETRY_AFTER_S.
+    """
+    try:
+        wait = max(float(response.headers.get("Retry-After")), 0.0)
+    except (TypeError, ValueError):
+        wait = BACKOFF_FACTOR * 2 ** attempt
+    return wait if wait <= MAX_RETRY_AFTER_S else None
+
+def request(method, path, access_token, deadline=None, retry_key=False, **kwargs):
+    """
+    Call the LINE API at `path` on the shared session. With retry_key, the request
+    carries an X-Line-Retry-Key (the same one on every retry), so that a retried push
+    is delivered only once; LINE answers 409 if an earlier attempt was accepted.
+    """
+    headers = {"Authorization": f"Bearer {access_token}", **kwargs.pop("headers", {})}
+    if retry_key:
+        headers["X-Line-Retry-Key"] = str(uuid.uuid4())
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        response = session.request(method, LINE_API + path, headers=headers, timeout=timeout_for(deadline), **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        wait = retry_wait(response, attempt)
+        if wait is None:
+            return response  # LINE wants us back later than this invocation can wait
+        if deadline is not None and time.monotonic() + wait + CONNECT_TIMEOUT_S > deadline:
+            return response  # No time left for another attempt
+        print(f"LINE API {path} returned {response.status_code}, retrying in {wait:.2f} s")
+        time.sleep(wait)
+    return response
+
+def get(path, access_token, deadline=None, **kwargs):
+    return request("GET", path, access_token, deadline=deadline, **kwargs)
+
+def post(path, access_token, deadline=None, retry_key=False, **kwargs):
+    return request("POST", path, access_token, deadline=deadline, retry_key=retry_key, **kwargs)
@@ -1,5 +1,12 @@
+# Run from this directory (rolemenu.json is opened relative to it): python post.py
 import json
-import requests
+import os
+import sys
+
+# line_http and SecretsManager live in hello_world/, one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import line_http
 from SecretsManager import get_secret
 
 secrets = get_secret('kendo-line-bot-secret')
@@ -10,16 +17,11 @@ access_token = secrets.get('Channel_Access_Token')\
 with open('rolemenu.json', 'r') as file:
     deployment_data = json.load(file)
 
-#Channel Access Token
-headers = {
-    "Authorization": f"Bearer {access_token}",
-    "Content-Type": "application/json"
-}
-
-response = requests.post('https://api.line.me/v2/bot/message/push', headers=headers, json=deployment_data)
+# Retry key, so a retried deployment isn't pushed twice
+response = line_http.post('/v2/bot/message/push', access_token, retry_key=True, json=deployment_data)
 
-# Response Check
-if response.status_code == 200:
+# Response Check (409: an earlier attempt with the same retry key was already accepted)
+if response.status_code in (200, 409):
     print("Richobject deployed successfully")
 
 else:
@@ -0,0 +1,167 @@
+"""
+Cold-start benchmark for the LINE webhook Lambda (hello_world/app.py).
+
+Each cold start is a fresh interpreter, as in a new Lambda container. It measures
+  - import:  importing the handler module (the Lambda init phase)
+  - first:   the first invocation, which pays for whatever import deferred
+  - warm:    a second invocation in the same container
+and lists which heavy packages ended up loaded.
+
+AWS (Secrets Manager, DynamoDB) and the LINE API are replaced by in-process fakes
+with configurable latency, so no credentials or network are needed. The fakes are
+installed when botocore / requests are first imported, so their import cost
+stays where the handler would pay it.
+
+    python tests/benchmark/cold_start_benchmark.py --runs 10
+    python tests/benchmark/cold_start_benchmark.py --events 10   # one delivery batching 10 users' messages
+    python tests/benchmark/cold_start_benchmark.py --app-dir /tmp/hello_world_before   # e.g. an older commit
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HELLO_WORLD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "hello_world")
+HEAVY_MODULES = ["boto3", "botocore", "requests", "linebot"]
+FAKE_SECRET = {"Channel_Access_Token": "token", "Channel_Secret": "secret"}
+
+def line_event(events=1, text="Practice"):
+    """
+    API Gateway proxy event carrying `events` LINE text messages, each from a different user.
+    """
+    body = {"destination": "Ubot", "events": [{
+        "type": "message", "mode": "active", "timestamp": int(time.time() * 1000),
+        "replyToken": f"reply-token-{i}", "source": {"type": "user", "userId": f"U{i:032d}"},
+        "message": {"id": str(i), "type": "text", "text": text},
+    } for i in range(events)]}
+    return {"body": json.dumps(body), "headers": {"x-line-signature": "signature"}}
+
+class FakeContext:
+    """
+    The parts of the Lambda context object the handler may use.
+    """
+    def __init__(self, timeout_s=3.0):
+        self.deadline = time.monotonic() + timeout_s
+        self.function_name = "HelloWorldFunction"
+        self.aws_request_id = "benchmark"
+
+    def get_remaining_time_in_millis(self):
+        return max(int((self.deadline - time.monotonic()) * 1000), 0)
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = json.dumps(payload)
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+def install_fakes(aws_latency, line_latency):
+    """
+    Patch botocore and requests as soon as they are imported (by the handler, not by us).
+    """
+    import importlib.abc
+    import importlib.machinery
+
+    def fake_api_call(self, operation_name, api_params):
+        time.sleep(aws_latency)
+        if operation_name == "GetSecretValue":
+            return {"SecretString": json.dumps(FAKE_SECRET)}
+        if operation_name == "Query":
+            return {"Items": [], "Count": 0}
+        return {}
+
+    def fake_request(self, method, url, **kwargs):
+        time.sleep(line_latency)
+        if "/profile/" in url:
+            return FakeResponse(200, {"displayName": "Benchmark User", "userId": url.rsplit("/", 1)[-1]})
+        return FakeResponse(200, {})
+
+    patches = {
+        "botocore.client": lambda module: setattr(module.BaseClient, "_make_api_call", fake_api_call),
+        "requests.sessions": lambda module: setattr(module.Session, "request", fake_request),
+    }
+
+    class PatchingLoader(importlib.abc.Loader):
+        def __init__(self, loader, patch):
+            self.loader, self.patch = loader, patch
+
+        def create_module(self, spec):
+            return self.loader.create_module(spec)
+
+        def exec_module(self, module):
+            self.loader.exec_module(module)
+            self.patch(module)
+
+    class PatchingFinder(importlib.abc.MetaPathFinder):
+        def find_spec(self, name, path, target=None):
+            if name not in patches:
+                return None
+            spec = importlib.machinery.PathFinder.find_spec(name, path)
+            if spec is not None:
+                spec.loader = PatchingLoader(spec.loader, patches.pop(name))
+            return spec
+
+    sys.meta_path.insert(0, PatchingFinder())
+
+def cold_start(app_dir, aws_latency, line_latency, events):
+    """
+    Runs in the child interpreter: one cold start, printed as JSON.
+    """
+    os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    install_fakes(aws_latency, line_latency)
+    sys.path.insert(0, app_dir)
+
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    app.lambda_handler(line_event(events), FakeContext())
+    first = time.perf_counter()
+    app.lambda_handler(line_event(events), FakeContext())
+    warm = time.perf_counter()
+
+    print(json.dumps({"import_ms": (imported - start) * 1000, "first_ms": (first - imported) * 1000,
+                      "warm_ms": (warm - first) * 1000,
+                      "loaded": [name for name in HEAVY_MODULES if name in sys.modules]}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=HELLO_WORLD_DIR, help="Directory containing the handler's app.py")
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts to measure")
+    parser.add_argument("--aws-latency-ms", type=float, default=30.0, help="Simulated AWS API round trip")
+    parser.add_argument("--line-latency-ms", type=float, default=60.0, help="Simulated LINE API round trip")
+    parser.add_argument("--events", type=int, default=1, help="Events per webhook delivery")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+
+    if args.child:
+        cold_start(app_dir, args.aws_latency_ms / 1000, args.line_latency_ms / 1000, args.events)
+        return
+
+    results = []
+    for _ in range(args.runs):
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--app-dir", app_dir,
+                                "--aws-latency-ms", str(args.aws_latency_ms),
+                                "--line-latency-ms", str(args.line_latency_ms), "--events", str(args.events)],
+                               capture_output=True, text=True, cwd=app_dir)
+        if child.returncode != 0:
+            raise SystemExit(f"Cold start failed:\n{child.stderr}")
+        results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    print(f"{app_dir}: {args.runs} cold starts, {args.events} event(s) per delivery")
+    print(f"{'':>8} {'import ms':>10} {'first ms':>10} {'init+first':>11} {'warm ms':>9}")
+    for label, pick in (("p50", statistics.median), ("max", max)):
+        print(f"{label:>8} {pick(r['import_ms'] for r in results):>10.1f} {pick(r['first_ms'] for r in results):>10.1f} "
+              f"{pick(r['import_ms'] + r['first_ms'] for r in results):>11.1f} {pick(r['warm_ms'] for r in results):>9.1f}")
+    print(f"loaded after two invocations: {', '.join(results[-1]['loaded']) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+User registration benchmark for the LINE webhook Lambda (hello_world/app.py).
+
+Sends webhook deliveries through lambda_handler against a DynamoDB stand-in and
+reports, per message, the DynamoDB round trips and the latency of:
+  - new:        a user's first message (registration)
+  - returning:  a registered user's message on a container that hasn't cached them yet
+  - race:       several concurrent deliveries for the same new user; counts the
+                registrations that overwrote one another
+
+The stand-in is an in-process table with a fixed latency per request, so no AWS
+access is needed. Pass --endpoint-url to use DynamoDB Local instead (the table is
+created if missing). Secrets Manager and the LINE API are always faked.
+
+    python tests/benchmark/registration_benchmark.py
+    python tests/benchmark/registration_benchmark.py --app-dir /tmp/hello_world_before   # e.g. an older commit
+    python tests/benchmark/registration_benchmark.py --endpoint-url http://localhost:8000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+from cold_start_benchmark import FAKE_SECRET, HELLO_WORLD_DIR, FakeContext, FakeResponse
+
+TABLE_NAME = "KendoAIUser"
+
+class FakeTable:
+    """
+    Just enough of DynamoDB for KendoAIUser: Query/GetItem/PutItem/UpdateItem on the
+    line_id key, attribute_not_exists conditions, projections and SET updates.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.items = {}
+        self.overwrites = 0
+        self._lock = threading.Lock()
+
+    def call(self, client, operation, params):
+        time.sleep(self.latency)
+        with self._lock:
+            if operation == "Query":
+                item = self.items.get(params["ExpressionAttributeValues"][":line_id"]["S"])
+                return {"Items": [dict(item)] if item else [], "Count": int(item is not None)}
+            if operation == "GetItem":
+                item = self.items.get(params["Key"]["line_id"]["S"])
+                if item is None:
+                    return {}
+                if "ProjectionExpression" in params:
+                    names = [name.strip() for name in params["ProjectionExpression"].split(",")]
+                    item = {name: value for name, value in item.items() if name in names}
+                return {"Item": dict(item)}
+            if operation == "PutItem":
+                key = params["Item"]["line_id"]["S"]
+                if key in self.items:
+                    if params.get("ConditionExpression") == "attribute_not_exists(line_id)":
+                        raise client.exceptions.ConditionalCheckFailedException(
+                            {"Error": {"Code": "ConditionalCheckFailedException",
+                                       "Message": "The conditional request failed"}}, operation)
+                    self.overwrites += 1
+                self.items[key] = dict(params["Item"])
+                return {}
+            if operation == "UpdateItem":
+                item = self.items.setdefault(params["Key"]["line_id"]["S"], dict(params["Key"]))
+                names = params.get("ExpressionAttributeNames", {})
+                for assignment in params["UpdateExpression"].removeprefix("SET ").split(","):
+                    name, value = (part.strip() for part in assignment.split("="))
+                    item[names.get(name, name)] = params["ExpressionAttributeValues"][value]
+                return {}
+        raise NotImplementedError(operation)
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.value += 1
+
+def install_fakes(table, endpoint_url, line_latency, dynamodb_calls):
+    import botocore.client
+    import requests.sessions
+
+    real_api_call = botocore.client.BaseClient._make_api_call
+
+    def api_call(self, operation_name, api_params):
+        service = self.meta.service_model.service_name
+        if service == "secretsmanager":
+            return {"SecretString": json.dumps(FAKE_SECRET)}
+        dynamodb_calls.add()
+        if endpoint_url:
+            return real_api_call(self, operation_name, api_params)
+        return table.call(self, operation_name, api_params)
+
+    def fake_request(self, method, url, **kwargs):
+        time.sleep(line_latency)
+        if "/profile/" in url:
+            return FakeResponse(200, {"displayName": "Benchmark User"})
+        return FakeResponse(200, {})
+
+    botocore.client.BaseClient._make_api_call = api_call
+    requests.sessions.Session.request = fake_request
+
+def create_table(endpoint_url):
+    import boto3
+    dynamodb = boto3.client("dynamodb", endpoint_url=endpoint_url)
+    if TABLE_NAME in dynamodb.list_tables()["TableNames"]:
+        return
+    dynamodb.create_table(TableName=TABLE_NAME, BillingMode="PAY_PER_REQUEST",
+                          KeySchema=[{"AttributeName": "line_id", "KeyType": "HASH"}],
+                          AttributeDefinitions=[{"AttributeName": "line_id", "AttributeType": "S"}])
+    dynamodb.get_waiter("table_exists").wait(TableName=TABLE_NAME)
+
+def delivery(user_id, text="Hello"):
+    body = {"destination": "Ubot", "events": [{
+        "type": "message", "mode": "active", "timestamp": int(time.time() * 1000),
+        "replyToken": "reply-token", "source": {"type": "user", "userId": user_id},
+        "message": {"id": "1", "type": "text", "text": text},
+    }]}
+    return {"body": json.dumps(body)}
+
+def forget_cached_users(app):
+    # Older handlers have no in-memory cache
+    if hasattr(app, "_display_names"):
+        app._display_names.clear()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=HELLO_WORLD_DIR, help="Directory containing the handler's app.py")
+    parser.add_argument("--users", type=int, default=50, help="Users registered, then sending again")
+    parser.add_argument("--race", type=int, default=5, help="Concurrent deliveries for one new user")
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=10.0, help="Stand-in DynamoDB round trip")
+    parser.add_argument("--line-latency-ms", type=float, default=0.0, help="Simulated LINE API round trip")
+    parser.add_argument("--endpoint-url", help="Use DynamoDB Local at this URL instead of the stand-in")
+    args = parser.parse_args()
+    app_dir = os.path.abspath(args.app_dir)
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    if args.endpoint_url:
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = args.endpoint_url
+        create_table(args.endpoint_url)
+
+    table = FakeTable(args.dynamodb_latency_ms / 1000)
+    dynamodb_calls = Counter()
+    install_fakes(table, args.endpoint_url, args.line_latency_ms / 1000, dynamodb_calls)
+    sys.path.insert(0, app_dir)
+    os.chdir(app_dir)
+    import app
+
+    run_id = uuid.uuid4().hex[:8]  # Fresh users on every run, also in a persistent DynamoDB Local
+    users = [f"U{run_id}{i:024d}" for i in range(args.users)]
+    app.lambda_handler(delivery(f"U{run_id}warmup"), FakeContext())  # Secrets and clients
+
+    results = {}
+    for scenario in ("new", "returning"):
+        latencies, calls = [], []
+        for user_id in users:
+            forget_cached_users(app)
+            dynamodb_calls.value = 0
+            start = time.perf_counter()
+            app.lambda_handler(delivery(user_id), FakeContext())
+            latencies.append((time.perf_counter() - start) * 1000)
+            calls.append(dynamodb_calls.value)
+        results[scenario] = (statistics.mean(calls), statistics.median(latencies))
+
+    # Concurrent deliveries for one new user, as when LINE redelivers or batches under load
+    table.overwrites = 0
+    racer = f"U{run_id}race"
+    threads = [threading.Thread(target=app.lambda_handler, args=(delivery(racer), FakeContext()))
+               for _ in range(args.race)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"{app_dir}: {args.users} users, DynamoDB "
+          f"{args.endpoint_url or f'stand-in at {args.dynamodb_latency_ms:.0f} ms per request'}")
+    print(f"{'':>10} {'DynamoDB calls':>15} {'p50 ms':>8}")
+    for scenario, (calls, latency) in results.items():
+        print(f"{scenario:>10} {calls:>15.1f} {latency:>8.1f}")
+    if not args.endpoint_url:
+        print(f"{'race':>10} {args.race} concurrent deliveries, {table.overwrites} registration(s) overwritten")
+
+if __name__ == "__main__":
+    main()
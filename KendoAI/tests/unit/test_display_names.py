@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import pytest
+
+# The Lambda imports its modules top-level from hello_world/ (app.py: import line_http)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "hello_world"))
+
+import app
+
+
+class FakeDynamoDB:
+    """ KendoAIUser stand-in: get_item answers from `items`, every call is recorded """
+
+    class exceptions:
+        class ConditionalCheckFailedException(Exception):
+            pass
+
+    def __init__(self, items=None):
+        self.items = items or {}
+        self.calls = []
+
+    def get_item(self, TableName, Key, **kwargs):
+        self.calls.append("get_item")
+        item = self.items.get(Key["line_id"]["S"])
+        return {"Item": item} if item is not None else {}
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.calls.append("put_item")
+        self.items[Item["line_id"]["S"]] = Item
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, **kwargs):
+        self.calls.append("update_item")
+        self.items[Key["line_id"]["S"]].update(
+            display_name=ExpressionAttributeValues[":name"],
+            display_name_refreshed_at=ExpressionAttributeValues[":refreshed_at"])
+
+
+def stored_user(display_name, refreshed_at):
+    return {"line_id": {"S": "U1"}, "role": {"S": "solo"}, "display_name": {"S": display_name},
+            "display_name_refreshed_at": {"N": str(refreshed_at)}}
+
+
+@pytest.fixture()
+def profile_calls(monkeypatch):
+    """ Stubs the LINE profile call and the in-memory cache; returns the user ids looked up """
+    calls = []
+
+    def update_display_name(user_id, deadline=None):
+        calls.append(user_id)
+        return f"Fresh {user_id}"
+
+    monkeypatch.setattr(app, "update_displayName", update_display_name)
+    monkeypatch.setattr(app, "_display_names", OrderedDict())
+    return calls
+
+
+def use_table(monkeypatch, items=None):
+    dynamodb = FakeDynamoDB(items)
+    monkeypatch.setattr(app, "get_aws_client", lambda service: dynamodb)
+    return dynamodb
+
+
+def test_memory_hit_skips_dynamodb(monkeypatch, profile_calls):
+    dynamodb = use_table(monkeypatch)
+    app.remember_display_name("U1", "Cached", time.time())
+
+    assert app.register_user("U1") == "Cached"
+    assert dynamodb.calls == []
+    assert profile_calls == []
+
+
+def test_stored_name_within_ttl_skips_profile_call(monkeypatch, profile_calls):
+    dynamodb = use_table(monkeypatch, {"U1": stored_user("Stored", time.time() - 60)})
+
+    assert app.register_user("U1") == "Stored"
+    assert dynamodb.calls == ["get_item"]
+    assert profile_calls == []
+    # Now remembered in memory
+    assert app.register_user("U1") == "Stored"
+    assert dynamodb.calls == ["get_item"]
+
+
+def test_expired_name_is_refreshed(monkeypatch, profile_calls):
+    expired = time.time() - app.DISPLAY_NAME_TTL_S - 60
+    dynamodb = use_table(monkeypatch, {"U1": stored_user("Old", expired)})
+
+    assert app.register_user("U1") == "Fresh U1"
+    assert profile_calls == ["U1"]
+    assert dynamodb.calls == ["get_item", "update_item"]
+    assert dynamodb.items["U1"]["display_name"] == {"S": "Fresh U1"}
+    assert float(dynamodb.items["U1"]["display_name_refreshed_at"]["N"]) > expired
+
+
+def test_new_user_is_registered_with_name(monkeypatch, profile_calls):
+    dynamodb = use_table(monkeypatch)
+
+    assert app.register_user("U1") == "Fresh U1"
+    assert dynamodb.calls == ["get_item", "put_item"]
+    assert dynamodb.items["U1"]["display_name"] == {"S": "Fresh U1"}
+
+
+def test_memory_cache_evicts_least_recently_used(monkeypatch, profile_calls):
+    monkeypatch.setattr(app, "MAX_CACHED_NAMES", 3)
+    now = time.time()
+    for user_id in ["U1", "U2", "U3"]:
+        app.remember_display_name(user_id, user_id, now)
+    app.cached_display_name("U1")  # U2 is now the least recently used
+    app.remember_display_name("U4", "U4", now)
+
+    assert list(app._display_names) == ["U3", "U1", "U4"]
+    assert app.cached_display_name("U2") is None
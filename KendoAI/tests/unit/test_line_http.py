@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+
+import pytest
+
+# The Lambda imports its modules top-level from hello_world/ (app.py: import line_http)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "hello_world"))
+
+import line_http
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """ Answers with the queued responses in turn and records each request's headers """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, headers=None, timeout=None, **kwargs):
+        self.calls.append(dict(headers))
+        return self.responses.pop(0)
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    """ Records the retry waits instead of sleeping """
+    waits = []
+    monkeypatch.setattr(line_http.time, "sleep", waits.append)
+    return waits
+
+
+def use_session(monkeypatch, *responses):
+    session = FakeSession(*responses)
+    monkeypatch.setattr(line_http, "_session", session)
+    return session
+
+
+def test_retry_after_within_cap_is_honoured(monkeypatch, sleeps):
+    session = use_session(monkeypatch, FakeResponse(429, {"Retry-After": "0.5"}), FakeResponse(200))
+
+    response = line_http.post("/v2/bot/message/push", "token")
+
+    assert response.status_code == 200
+    assert len(session.calls) == 2
+    assert sleeps == [0.5]
+
+
+def test_longer_retry_after_returns_without_retrying(monkeypatch, sleeps):
+    session = use_session(monkeypatch, FakeResponse(429, {"Retry-After": str(line_http.MAX_RETRY_AFTER_S + 1)}),
+                          FakeResponse(200))
+
+    response = line_http.post("/v2/bot/message/push", "token")
+
+    assert response.status_code == 429
+    assert len(session.calls) == 1
+    assert sleeps == []
+
+
+def test_deadline_stops_retries(monkeypatch, sleeps):
+    session = use_session(monkeypatch, FakeResponse(503, {"Retry-After": "0.5"}), FakeResponse(200))
+
+    # Waiting 0.5 s and connecting again would run past the deadline
+    response = line_http.post("/v2/bot/message/push", "token", deadline=time.monotonic() + 0.6)
+
+    assert response.status_code == 503
+    assert len(session.calls) == 1
+    assert sleeps == []
+
+
+def test_retries_stop_after_max_retries(monkeypatch, sleeps):
+    session = use_session(monkeypatch, *[FakeResponse(500) for _ in range(line_http.MAX_RETRIES + 1)])
+
+    response = line_http.get("/v2/bot/profile/U1", "token")
+
+    assert response.status_code == 500
+    assert len(session.calls) == line_http.MAX_RETRIES + 1
+    # Exponential backoff without a Retry-After
+    assert sleeps == [line_http.BACKOFF_FACTOR * 2 ** attempt for attempt in range(line_http.MAX_RETRIES)]
+
+
+def test_same_retry_key_on_every_retry(monkeypatch, sleeps):
+    session = use_session(monkeypatch, FakeResponse(500), FakeResponse(502), FakeResponse(409))
+
+    response = line_http.post("/v2/bot/message/push", "token", retry_key=True, json={"to": "U1"})
+
+    assert response.status_code == 409
+    keys = [headers["X-Line-Retry-Key"] for headers in session.calls]
+    assert len(keys) == 3 and len(set(keys)) == 1
+    assert all(headers["Authorization"] == "Bearer token" for headers in session.calls)
+
+
+def test_no_retry_key_unless_asked(monkeypatch, sleeps):
+    session = use_session(monkeypatch, FakeResponse(200))
+
+    line_http.get("/v2/bot/profile/U1", "token")
+
+    assert "X-Line-Retry-Key" not in session.calls[0]
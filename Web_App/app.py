@@ -2,70 +2,36 @@
 # streamlit run c:/Users/beam_/OneDrive/Desktop/KendoAI/Web_App/app.py
 import streamlit as st
 import pandas as pd
-from influxdb_client import InfluxDBClient
-from scipy.stats import skew, kurtosis
 import numpy as np
-import joblib
-import time
-
-from SecretsManager import get_secret
-
-# Fetch the secrets from AWS Secrets Manager
-secret_data = get_secret('kendo-line-bot-secret')
-
-# InfluxDB Configuration
-INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
-INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
-INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
+import uuid
+
+from camera_relay import fetch_clip
+from imu_filters import StreamingFilterBank
+from imu_frames import sensor_filter
+from live_poller import SharedPoller
+from move_predictions import fetch_latest_predictions
+from running_metrics import RunningMean, RunningSmoothness
+from resources import get_influx_client, get_secret_data, invalidate_resources
+from stage_timer import StageTimer
+
+# Secrets and InfluxDB client are created once per server process (see resources.py),
+# not on every rerun
 INFLUXDB_BUCKET = "SIOT_Test"
 
-# Load model and scaler
-model = joblib.load("Web_App/kendo_move_classifier.pkl")
-scaler = joblib.load("Web_App/RobustScaler.pkl")
-le = joblib.load("Web_App/label_encoder.pkl")
-print("Successfully loaded model and scaler.")
-
-# Initialize InfluxDB Client
-client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-query_api = client.query_api()
-
-# Parameters
-window_size = 10  # Number of samples per window
-REFRESH_INTERVAL = 0.5  # Time interval for updates
-# Install dependencies before running (streamlit, pandas, influxdb-client, json, boto3)
-# streamlit run c:/Users/beam_/OneDrive/Desktop/KendoAI/Web_App/app.py
-import streamlit as st
-import pandas as pd
-from influxdb_client import InfluxDBClient
-from scipy.stats import skew, kurtosis
-import numpy as np
-import joblib
-import time
-
-from SecretsManager import get_secret
-
-# Fetch the secrets from AWS Secrets Manager
-secret_data = get_secret('kendo-line-bot-secret')
-
-# InfluxDB Configuration
-INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
-INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
-INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
-INFLUXDB_BUCKET = "SIOT_Test"
-
-# Load model and scaler
-model = joblib.load("Web_App/kendo_move_classifier.pkl")
-scaler = joblib.load("Web_App/RobustScaler.pkl")
-le = joblib.load("Web_App/label_encoder.pkl")
-print("Successfully loaded model and scaler.")
-
-# Initialize InfluxDB Client
-client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-query_api = client.query_api()
+# Moves are classified by the predictor (Cloud_Computing/app.py), which publishes them to
+# move_predictions; the dashboard only reads them, so it needs neither the model nor sklearn
+LIVE_SENSOR = "individual"  # Sensor tag of the dashboard's IMU (SENSOR_PORTS in imu_upload.py)
 
 # Parameters
 window_size = 10  # Number of samples per window
 REFRESH_INTERVAL = 0.5  # Time interval for updates
+# Accelerometer low-pass applied before differencing into jerk. The sample rate is measured
+# from the stream; below 20 Hz (e.g. the ~1.35 Hz legacy uploader) samples pass unfiltered
+JERK_LOWPASS_HZ = 10.0
+MAX_CHART_ROWS = 3000  # Visible chart history (30 s at 100 Hz); older points are trimmed
+IDLE_LABEL = "kamae"  # Stance; every other predicted label is a strike
+REPLAY_PADDING_S = 0.5  # Video kept either side of the strike's window
+REPLAY_FRAMES = 6  # Frames shown in the strike replay
 
 # Streamlit Configuration
 st.set_page_config(page_title="KiAI - Kendo Assistant", page_icon="🤺")
@@ -76,10 +42,15 @@ if "is_running" not in st.session_state:
     st.session_state.is_running = False
 
 if "accel_data" not in st.session_state:
-    st.session_state.accel_data = pd.DataFrame(columns=["accelX", "accelY", "accelZ"])
+    st.session_state.accel_data = pd.DataFrame(columns=["accelX", "accelY", "accelZ"], dtype=float)
 
 if "gyro_data" not in st.session_state:
-    st.session_state.gyro_data = pd.DataFrame(columns=["gyroX", "gyroY", "gyroZ"])
+    st.session_state.gyro_data = pd.DataFrame(columns=["gyroX", "gyroY", "gyroZ"], dtype=float)
+
+# Lease id for the shared poller, and the last snapshot this session has shown
+if "poller_session" not in st.session_state:
+    st.session_state.poller_session = uuid.uuid4().hex
+    st.session_state.last_snapshot = 0
 
 # Initialize last updated values for metrics in session state
 metrics_defaults = {
@@ -90,31 +61,27 @@ metrics_defaults = {
     "last_humidity": "N/A",
     "last_smoothness": 0.00,
     "last_prediction": "None",
+    "last_replay": None,
 }
 
 for key, default in metrics_defaults.items():
     if key not in st.session_state:
         st.session_state[key] = default
 
-# Define feature extraction
-def extract_features(window):
-    features = {}
-    for axis in ['accelX', 'accelY', 'accelZ', 'gyroX', 'gyroY', 'gyroZ', 'roll', 'pitch']:
-        axis_data = window[axis]
-        features[f'{axis}_mean'] = axis_data.mean()
-        features[f'{axis}_std'] = axis_data.std()
-        features[f'{axis}_max'] = axis_data.max()
-        features[f'{axis}_min'] = axis_data.min()
-        features[f'{axis}_skew'] = skew(axis_data)
-        features[f'{axis}_kurtosis'] = kurtosis(axis_data, fisher=False)
-    return pd.DataFrame([features])
-
-# Define movement smoothness calculation
-def calculate_smoothness(data, smooth_threshold=0.5):
-    data['accel_magnitude'] = np.sqrt(data['accelX']**2 + data['accelY']**2 + data['accelZ']**2)
-    data['jerk'] = data['accel_magnitude'].diff().fillna(0) / data.index.to_series().diff().dt.total_seconds().fillna(1)
-    smooth_movements = data['jerk'].abs() < smooth_threshold
-    return smooth_movements.mean() * 100 if not data.empty else 0
+# Filter only the accelerometer samples that arrived since the last poll and add them
+# to the running jerk/smoothness aggregates, which keep the same 30 s window as the query
+def update_jerk_metrics(data, jerk_state):
+    metrics = jerk_state["metrics"]
+    samples = data[["accelX", "accelY", "accelZ"]].dropna()
+    if metrics.last_time is None:
+        new_rows = samples
+    else:
+        # The filter restarts itself after a gap (e.g. after Stop/Start), relative to the
+        # measured sample interval; the aggregates keep the rows still in the window
+        new_rows = samples[samples.index > metrics.last_time]
+    if not new_rows.empty:
+        new_rows = jerk_state["filter"].process_frame(new_rows)
+    return metrics.update(new_rows, window_start=data.index[0])
 
 # Fetch environment data
 def fetch_environment_data():
@@ -127,107 +94,227 @@ def fetch_environment_data():
       |> limit(n: 1)
     '''
     try:
-        tables = query_api.query(query)
+        tables = get_influx_client().query_api().query(query)
         if tables:
             records = [record.values for table in tables for record in table.records]
             if records:
                 return pd.DataFrame(records)
     except Exception as e:
-        st.error(f"Error fetching environment data from InfluxDB: {e}")
+        print(f"Error fetching environment data from InfluxDB: {e}")
     return pd.DataFrame()
 
-# Start/Stop Button
-if st.button("Start/Stop Data Fetching"):
-    st.session_state.is_running = not st.session_state.is_running
-
-status = "Running" if st.session_state.is_running else "Stopped"
-st.write(f"Status: **{status}**")
-
-# Metrics Section
-col1, col2, col3, col4 = st.columns(4)
-avg_accel_metric = col1.metric("Avg Acceleration (m/s²)", f"{st.session_state.last_avg_accel:.2f}")
-mic_metric = col1.metric("Mic Status", st.session_state.last_mic_status)
-jerk_metric = col2.metric("Avg Jerk (m/s³)", f"{st.session_state.last_jerk:.2f}")
-temp_metric = col2.metric("Temperature (°C)", st.session_state.last_temp)
-smoothness_metric = col3.metric("Smooth Movements (%)", f"{st.session_state.last_smoothness:.2f}")
-hum_metric = col3.metric("Humidity (%)", st.session_state.last_humidity)
-prediction_metric = col4.metric("Prediction", st.session_state.last_prediction)
-
-# Chart Placeholders
-st.header("Accelerometer Data:")
-accel_chart = st.line_chart(st.session_state.accel_data)
+# Pull the camera frames covering a strike's window from the relay's replay buffer.
+# The JPEGs are passed through untouched; only the browser decodes them
+def fetch_replay(prediction):
+    relay_url = get_secret_data().get('camera_relay_link')
+    if not relay_url:
+        return None
+    start = prediction["window_start"].timestamp() - REPLAY_PADDING_S
+    end = prediction["window_end"].timestamp() + REPLAY_PADDING_S
+    try:
+        frames = fetch_clip(relay_url, start, end, max_frames=REPLAY_FRAMES, timeout=REFRESH_INTERVAL)
+    except Exception as e:
+        print(f"Error fetching strike replay from the camera relay: {e}")
+        return None
+    return {"label": prediction["move"], "time": prediction["window_end"], "frames": frames}
 
-st.header("Gyroscope Data:")
-gyro_chart = st.line_chart(st.session_state.gyro_data)
+# Fetch the latest data and prediction and compute the metrics. Runs on the shared
+# poller thread, once per REFRESH_INTERVAL for all sessions; no st.* calls in here
+def poll_live_data(jerk_state, replay_state, timer):
+    live = {"environment": None, "data": pd.DataFrame(), "metrics": None, "replay": None}
 
-while st.session_state.is_running:
     # Fetch environmental data
-    environment_data = fetch_environment_data()
+    with timer.stage("environment_query"):
+        environment_data = fetch_environment_data()
     if not environment_data.empty:
         latest = environment_data.iloc[0]
-        mic_status = "High" if latest.get("mic", None) == 1 else "Low"
-        st.session_state.last_mic_status = mic_status
-        st.session_state.last_temp = latest.get("temperature", "N/A")
-        st.session_state.last_humidity = latest.get("humidity", "N/A")
-
-        mic_metric.metric("Mic Status", st.session_state.last_mic_status)
-        temp_metric.metric("Temperature (°C)", st.session_state.last_temp)
-        hum_metric.metric("Humidity (%)", st.session_state.last_humidity)
+        live["environment"] = {
+            "mic_status": "High" if latest.get("mic", None) == 1 else "Low",
+            "temperature": latest.get("temperature", "N/A"),
+            "humidity": latest.get("humidity", "N/A"),
+        }
 
-    # Fetch movement data
+    # Fetch movement data (this player's IMU only; the team gateway writes to the same measurement)
     query = f'''
     from(bucket: "{INFLUXDB_BUCKET}")
       |> range(start: -30s)
-      |> filter(fn: (r) => r._measurement == "gyro_status")
+      |> filter(fn: (r) => r._measurement == "gyro_status" and {sensor_filter(LIVE_SENSOR)})
       |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
     '''
-    data = query_api.query_data_frame(query)
+    with timer.stage("motion_query"):
+        data = get_influx_client().query_api().query_data_frame(query)
+    # Tagged and untagged series come back as separate tables
+    if isinstance(data, list):
+        data = pd.concat(data, ignore_index=True) if data else pd.DataFrame()
     if not data.empty:
-        data["_time"] = pd.to_datetime(data["_time"])
-        data.set_index("_time", inplace=True)
-        
-        st.session_state.accel_data = data[["accelX", "accelY", "accelZ"]]
-        st.session_state.gyro_data = data[["gyroX", "gyroY", "gyroZ"]]
-        
-        # Update Charts
-        accel_chart.line_chart(st.session_state.accel_data)
-        gyro_chart.line_chart(st.session_state.gyro_data)
-
-        # Calculate and update metrics
+        with timer.stage("dataframe_prep"):
+            data["_time"] = pd.to_datetime(data["_time"])
+            data = data.set_index("_time").sort_index()
+        live["data"] = data
+
+        # Calculate metrics
         if len(data) >= window_size:
-            # Average Acceleration
-            avg_accel = st.session_state.accel_data.mean().mean()
-            st.session_state.last_avg_accel = avg_accel
-
-            # Jerk Calculation
-            data['accel_magnitude'] = np.sqrt(data['accelX']**2 + data['accelY']**2 + data['accelZ']**2)
-            data['jerk'] = data['accel_magnitude'].diff().fillna(0) / data.index.to_series().diff().dt.total_seconds().fillna(1)
-            avg_jerk = data['jerk'].mean()
-            st.session_state.last_jerk = avg_jerk
-
-            # Smoothness
-            smoothness = calculate_smoothness(data)
-            st.session_state.last_smoothness = smoothness
-
-            # Prediction
-            latest_window = data.iloc[-window_size:]
-            features_df = extract_features(latest_window)
-            prediction = model.predict(scaler.transform(features_df))[0]
-            st.session_state.last_prediction = le.inverse_transform([prediction])[0]
-
-            # Update metrics on the dashboard
-            avg_accel_metric.metric("Avg Acceleration (m/s²)", f"{st.session_state.last_avg_accel:.2f}")
-            jerk_metric.metric("Avg Jerk (m/s³)", f"{st.session_state.last_jerk:.2f}")
-            smoothness_metric.metric("Smooth Movements (%)", f"{st.session_state.last_smoothness:.2f}")
-            prediction_metric.metric("Prediction", st.session_state.last_prediction)
-
-    time.sleep(REFRESH_INTERVAL)
+            with timer.stage("jerk_smoothness"):
+                # Average Acceleration
+                avg_accel = jerk_state["accel_mean"].update(data).means().mean()
+
+                # Jerk and Smoothness, on the low-passed signal (a raw first difference is mostly noise)
+                jerk_metrics = update_jerk_metrics(data, jerk_state)
+
+            # Prediction, as published by the predictor
+            with timer.stage("prediction_query"):
+                predictions = fetch_latest_predictions(get_influx_client().query_api(), INFLUXDB_BUCKET,
+                                                       [LIVE_SENSOR])
+            prediction = predictions.get(LIVE_SENSOR)
+            label = prediction["move"] if prediction is not None else "None"
+
+            live["metrics"] = {
+                "avg_accel": avg_accel,
+                "jerk": jerk_metrics.mean_jerk(),
+                "smoothness": jerk_metrics.smooth_percentage(),
+                "prediction": label,
+            }
+
+            # New strike: grab its video once, every session shows the same replay. A strike is
+            # told apart by its window's end, so a repeat of the same move gets its own replay
+            if prediction is not None and prediction["window_end"] != replay_state["window_end"]:
+                if label != IDLE_LABEL:
+                    with timer.stage("replay_fetch"):
+                        replay = fetch_replay(prediction)
+                    if replay is not None and replay["frames"]:
+                        replay_state["replay"] = replay
+                replay_state["window_end"] = prediction["window_end"]
+    live["replay"] = replay_state["replay"]
+    return live
+
+# Rolling per-stage timings of the poll and render cycles, shared by every session;
+# cycles slower than the refresh interval and a periodic summary are logged as JSON
+@st.cache_resource
+def get_stage_timer():
+    return StageTimer(budget=REFRESH_INTERVAL)
+
+# One poller per server process, shared by every open tab
+@st.cache_resource
+def get_live_poller():
+    # Streaming low-pass and running 30 s aggregates for the metrics; state carries over
+    # between polls, so each poll only processes the samples that are new
+    jerk_state = {
+        "filter": StreamingFilterBank("lowpass", cutoff_hz=JERK_LOWPASS_HZ, sample_rate_hz=None),
+        "metrics": RunningSmoothness(smooth_threshold=0.5, fill_jerk=0.0),
+        "accel_mean": RunningMean(["accelX", "accelY", "accelZ"]),
+    }
+    # Window end of the last prediction seen and the replay of the last strike
+    replay_state = {"window_end": None, "replay": None}
+    timer = get_stage_timer()
+
+    def poll():
+        with timer.cycle("poll"):
+            return poll_live_data(jerk_state, replay_state, timer)
+
+    return SharedPoller(poll, REFRESH_INTERVAL, name="dashboard-poller")
+
+# Copy the latest shared snapshot into this session's metrics and chart history
+def refresh_live_data():
+    poller = get_live_poller()
+    snapshot = poller.subscribe(st.session_state.poller_session, timeout=REFRESH_INTERVAL)
+    if poller.last_error is not None:
+        st.error(f"Error fetching data from InfluxDB: {poller.last_error}")
+    if snapshot is None or snapshot.version == st.session_state.last_snapshot:
+        return
+    st.session_state.last_snapshot = snapshot.version
+    live = snapshot.value
+
+    if live["environment"] is not None:
+        st.session_state.last_mic_status = live["environment"]["mic_status"]
+        st.session_state.last_temp = live["environment"]["temperature"]
+        st.session_state.last_humidity = live["environment"]["humidity"]
+
+    data = live["data"]
+    if not data.empty:
+        # Append the rows this session hasn't seen yet to its bounded chart history
+        history = st.session_state.accel_data
+        new_rows = data if history.empty else data[data.index > history.index[-1]]
+        new_accel = new_rows[["accelX", "accelY", "accelZ"]]
+        new_gyro = new_rows[["gyroX", "gyroY", "gyroZ"]]
+        if not history.empty:
+            new_accel_history = pd.concat([history, new_accel])
+            new_gyro_history = pd.concat([st.session_state.gyro_data, new_gyro])
+        else:
+            new_accel_history, new_gyro_history = new_accel, new_gyro
+        st.session_state.accel_data = new_accel_history.iloc[-MAX_CHART_ROWS:]
+        st.session_state.gyro_data = new_gyro_history.iloc[-MAX_CHART_ROWS:]
+
+    if live["metrics"] is not None:
+        st.session_state.last_avg_accel = live["metrics"]["avg_accel"]
+        st.session_state.last_jerk = live["metrics"]["jerk"]
+        st.session_state.last_smoothness = live["metrics"]["smoothness"]
+        st.session_state.last_prediction = live["metrics"]["prediction"]
+    st.session_state.last_replay = live["replay"]
+
+# Start/Stop Button
+if st.button("Start/Stop Data Fetching"):
+    st.session_state.is_running = not st.session_state.is_running
+    if not st.session_state.is_running:
+        get_live_poller().unsubscribe(st.session_state.poller_session)
+
+status = "Running" if st.session_state.is_running else "Stopped"
+st.write(f"Status: **{status}**")
+
+# Pick up rotated secrets without restarting the server
+if st.sidebar.button("Reload secrets"):
+    invalidate_resources()
+
+# Debug panel with the rolling stage timings
+st.sidebar.checkbox("Show refresh timings", key="show_timings")
+
+# Live section: while running, only this fragment reruns every REFRESH_INTERVAL;
+# the rest of the page (title, button, video embed) is rendered once per page run
+@st.fragment(run_every=REFRESH_INTERVAL if st.session_state.is_running else None)
+def live_dashboard():
+    timer = get_stage_timer()
+    with timer.cycle("render"):
+        if st.session_state.is_running:
+            with timer.stage("snapshot_read"):
+                refresh_live_data()
+
+        # Metrics Section
+        with timer.stage("metric_render"):
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Avg Acceleration (m/s²)", f"{st.session_state.last_avg_accel:.2f}")
+            col1.metric("Mic Status", st.session_state.last_mic_status)
+            col2.metric("Avg Jerk (m/s³)", f"{st.session_state.last_jerk:.2f}")
+            col2.metric("Temperature (°C)", st.session_state.last_temp)
+            col3.metric("Smooth Movements (%)", f"{st.session_state.last_smoothness:.2f}")
+            col3.metric("Humidity (%)", st.session_state.last_humidity)
+            col4.metric("Prediction", st.session_state.last_prediction)
+
+        # Instant replay of the last strike, next to the prediction
+        replay = st.session_state.last_replay
+        if replay is not None:
+            with timer.stage("replay_render"):
+                st.caption(f"Replay: **{replay['label']}** at {replay['time'].strftime('%H:%M:%S.%f')[:-3]}")
+                for column, frame in zip(st.columns(REPLAY_FRAMES), replay["frames"]):
+                    column.image(frame.jpeg)
+
+        # Charts, redrawn from the history, which never holds more than MAX_CHART_ROWS
+        with timer.stage("chart_render"):
+            st.header("Accelerometer Data:")
+            st.line_chart(st.session_state.accel_data)
+            st.header("Gyroscope Data:")
+            st.line_chart(st.session_state.gyro_data)
+
+    if st.session_state.show_timings:
+        st.subheader("Refresh timings (ms)")
+        st.dataframe(pd.DataFrame(timer.summary()).T)
+
+live_dashboard()
 
 # Live Video Feed
 st.header("Live Video Feed")
 
-# Embed the video feed from ESP32
-video_feed_url = secret_data.get('esp32cam_link')
+# Embed the video feed through the camera relay (camera_relay.py), so viewers don't each
+# open a stream to the ESP32; falls back to the camera itself if no relay is configured
+video_feed_url = get_secret_data().get('camera_relay_link') or get_secret_data().get('esp32cam_link')
 st.markdown(
     f"""
     <div style="text-align:center;">
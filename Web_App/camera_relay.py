@@ -0,0 +1,382 @@
+"""
+MJPEG fan-out relay for the ESP32 camera.
+
+The ESP32 can barely serve one client at full frame rate, so the relay pulls its
+stream once and re-serves it to any number of viewers:
+
+    GET /stream     multipart/x-mixed-replace MJPEG, for the dashboard iframe
+    GET /snapshot   the latest JPEG
+    GET /stats      JSON with the upstream and per-client frame rates
+    GET /clip?start=<epoch s>&end=<epoch s>
+                    JSON with the buffered frames captured in that window (base64
+                    JPEGs), for strike replays; see fetch_clip()
+
+Frames are passed through as JPEG bytes and never decoded. The last RING_BYTES
+of frames are kept in a FrameRing for replays. Every viewer has a
+one-frame slot: a client that can't keep up simply gets the newest frame when it
+is ready for the next one, and the frames it missed are counted as dropped.
+
+    python camera_relay.py --port 8081                      # source from esp32cam_link
+    python camera_relay.py --source http://192.168.1.50:81/stream
+"""
+import argparse
+import base64
+import itertools
+import json
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from frame_ring import FrameRing, RING_BYTES
+
+# One JPEG from the camera; `timestamp` is when the relay received it (epoch seconds)
+Frame = namedtuple("Frame", ["seq", "timestamp", "jpeg"])
+
+RELAY_PORT = 8081
+BOUNDARY = "kendoframe"
+READ_CHUNK = 64 * 1024
+RECONNECT_MAX_DELAY = 5.0
+# Small per-viewer socket buffer: a slow viewer blocks the write (and starts dropping
+# frames) after a couple of frames instead of queueing seconds of video in the kernel
+SEND_BUFFER_BYTES = 64 * 1024
+MAX_CLIP_FRAMES = 30  # Longer replay windows are thinned to this many frames
+
+class RateMeter:
+    """
+    Events per second over the last `window` seconds. Ticked by the streaming
+    thread and read by /stats requests on other threads.
+    """
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.times = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.times and self.times[0] < now - self.window:
+            self.times.popleft()
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.times.append(now)
+            self._expire(now)
+
+    def rate(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return len(self.times) / self.window
+
+class MJPEGParser:
+    """
+    Split a multipart/x-mixed-replace byte stream into JPEG payloads.
+
+    Parts are cut by their Content-Length header when the camera sends one (the
+    ESP32 camera server does), otherwise at the next boundary.
+    """
+
+    def __init__(self, boundary):
+        self.delimiter = b"--" + boundary.encode("latin-1")
+        self.buffer = b""
+        self.length = None  # Content-Length of the part being read, once its headers are in
+
+    @staticmethod
+    def boundary_from(content_type):
+        """
+        Boundary parameter of a multipart Content-Type header.
+        """
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "boundary":
+                value = value.strip('"')
+                # Some servers include the leading dashes in the parameter
+                return value[2:] if value.startswith("--") else value
+        raise ValueError(f"No boundary in Content-Type: {content_type}")
+
+    def feed(self, data):
+        """
+        Add bytes from the stream and return the JPEGs they complete.
+        """
+        self.buffer += data
+        frames = []
+        while True:
+            if self.length is None:
+                start = self.buffer.find(self.delimiter)
+                if start < 0:
+                    # Keep a tail in case the delimiter is split across reads
+                    self.buffer = self.buffer[-len(self.delimiter):]
+                    return frames
+                end_of_headers = self.buffer.find(b"\r\n\r\n", start)
+                if end_of_headers < 0:
+                    self.buffer = self.buffer[start:]
+                    return frames
+                headers = self.buffer[start + len(self.delimiter):end_of_headers].decode("latin-1")
+                self.buffer = self.buffer[end_of_headers + 4:]
+                self.length = -1
+                for line in headers.split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length" and value.strip().isdigit():
+                        self.length = int(value)
+
+            if self.length >= 0:
+                if len(self.buffer) < self.length:
+                    return frames
+                part, self.buffer = self.buffer[:self.length], self.buffer[self.length:]
+            else:
+                end = self.buffer.find(self.delimiter)
+                if end < 0:
+                    return frames
+                part, self.buffer = self.buffer[:end].rstrip(b"\r\n"), self.buffer[end:]
+            self.length = None
+            if part:
+                frames.append(part)
+
+class ClientSlot:
+    """
+    A viewer's one-frame mailbox plus its delivery statistics.
+    """
+
+    def __init__(self, client_id, address):
+        self.client_id = client_id
+        self.address = address
+        self.connected_at = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.meter = RateMeter()
+        self._frame = None
+        self._ready = threading.Condition()
+
+    def put(self, frame):
+        with self._ready:
+            if self._frame is not None:
+                # The client hasn't taken the previous frame yet; it is replaced
+                self.dropped += 1
+            self._frame = frame
+            self._ready.notify()
+
+    def take(self, timeout):
+        """
+        Wait for the next frame; None on timeout.
+        """
+        with self._ready:
+            if self._frame is None:
+                self._ready.wait(timeout)
+            frame, self._frame = self._frame, None
+            return frame
+
+    def sent_frame(self):
+        self.sent += 1
+        self.meter.tick()
+
+    def stats(self):
+        return {"id": self.client_id, "address": self.address, "sent": self.sent,
+                "dropped": self.dropped, "fps": round(self.meter.rate(), 2),
+                "connected_s": round(time.time() - self.connected_at, 1)}
+
+class CameraRelay:
+    """
+    Pulls the MJPEG stream from `source_url` on a background thread (reconnecting
+    with backoff), hands each frame to every connected viewer's slot and keeps
+    the most recent `ring_bytes` of frames in `ring` for replays.
+    """
+
+    def __init__(self, source_url, timeout=10.0, ring_bytes=RING_BYTES):
+        self.source_url = source_url
+        self.timeout = timeout
+        self.latest = None
+        self.connected = False
+        self.upstream_errors = 0
+        self.upstream_meter = RateMeter()
+        self.ring = FrameRing(ring_bytes)
+        self._clients = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._pull, name="camera-upstream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def subscribe(self, address):
+        slot = ClientSlot(next(self._ids), address)
+        with self._lock:
+            self._clients[slot.client_id] = slot
+            if self.latest is not None:
+                # New viewers get a picture straight away
+                slot.put(self.latest)
+        return slot
+
+    def unsubscribe(self, slot):
+        with self._lock:
+            self._clients.pop(slot.client_id, None)
+
+    def publish(self, jpeg):
+        with self._lock:
+            seq = self.latest.seq + 1 if self.latest else 1
+            frame = Frame(seq, time.time(), jpeg)
+            self.latest = frame
+            clients = list(self._clients.values())
+        self.upstream_meter.tick()
+        for slot in clients:
+            slot.put(frame)
+        self.ring.append(frame)
+
+    def stats(self):
+        with self._lock:
+            clients = [slot.stats() for slot in self._clients.values()]
+        return {"source": self.source_url, "connected": self.connected,
+                "frames": self.latest.seq if self.latest else 0,
+                "fps": round(self.upstream_meter.rate(), 2),
+                "upstream_errors": self.upstream_errors, "clients": clients,
+                "ring": {"frames": len(self.ring), "bytes": self.ring.bytes, "span": self.ring.span()}}
+
+    def _pull(self):
+        delay = 0.5
+        while not self._stop.is_set():
+            try:
+                with urllib.request.urlopen(self.source_url, timeout=self.timeout) as response:
+                    parser = MJPEGParser(MJPEGParser.boundary_from(response.headers["Content-Type"]))
+                    self.connected = True
+                    delay = 0.5
+                    print(f"Connected to camera stream: {self.source_url}")
+                    while not self._stop.is_set():
+                        data = response.read1(READ_CHUNK)
+                        if not data:
+                            break
+                        for jpeg in parser.feed(data):
+                            self.publish(jpeg)
+            except Exception as e:
+                self.upstream_errors += 1
+                print(f"Camera stream error: {e}")
+            self.connected = False
+            if not self._stop.is_set():
+                print(f"Reconnecting to camera in {delay:.1f} s...")
+                self._stop.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+class RelayHandler(BaseHTTPRequestHandler):
+    relay = None  # set by make_server()
+
+    def setup(self):
+        self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
+        super().setup()
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/stream":
+            self._stream()
+        elif path == "/snapshot":
+            frame = self.relay.latest
+            if frame is None:
+                self.send_error(503, "No frame received from the camera yet")
+                return
+            self._send(200, "image/jpeg", frame.jpeg)
+        elif path == "/stats":
+            self._send(200, "application/json", json.dumps(self.relay.stats()).encode("utf-8"))
+        elif path == "/clip":
+            self._clip(urllib.parse.parse_qs(query))
+        else:
+            self.send_error(404)
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _clip(self, params):
+        try:
+            start, end = float(params["start"][0]), float(params["end"][0])
+            max_frames = int(params.get("max_frames", [MAX_CLIP_FRAMES])[0])
+        except (KeyError, ValueError):
+            self.send_error(400, "start and end (epoch seconds) are required")
+            return
+        frames = self.relay.ring.between(start, end, max_frames=max_frames)
+        body = json.dumps({"frames": [{"seq": frame.seq, "timestamp": frame.timestamp,
+                                       "jpeg": base64.b64encode(frame.jpeg).decode("ascii")}
+                                      for frame in frames]})
+        self._send(200, "application/json", body.encode("utf-8"))
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        slot = self.relay.subscribe(f"{self.client_address[0]}:{self.client_address[1]}")
+        try:
+            while True:
+                frame = slot.take(timeout=self.relay.timeout)
+                if frame is None:
+                    continue
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(frame.jpeg)}\r\n\r\n".encode("latin-1"))
+                self.wfile.write(frame.jpeg)
+                self.wfile.write(b"\r\n")
+                slot.sent_frame()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            pass
+        finally:
+            self.relay.unsubscribe(slot)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(relay, host="0.0.0.0", port=RELAY_PORT):
+    handler = type("BoundRelayHandler", (RelayHandler,), {"relay": relay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def fetch_clip(relay_url, start, end, max_frames=MAX_CLIP_FRAMES, timeout=2.0):
+    """
+    Frames the relay at `relay_url` (any URL on it, e.g. its /stream link) captured
+    between `start` and `end` (epoch seconds), as Frames holding the JPEG bytes.
+    """
+    parts = urllib.parse.urlsplit(relay_url)
+    query = urllib.parse.urlencode({"start": start, "end": end, "max_frames": max_frames})
+    url = urllib.parse.urlunsplit((parts.scheme, parts.netloc, "/clip", query, ""))
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        clip = json.load(response)
+    return [Frame(frame["seq"], frame["timestamp"], base64.b64decode(frame["jpeg"]))
+            for frame in clip["frames"]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Camera MJPEG URL (default: esp32cam_link from the app secrets)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=RELAY_PORT)
+    parser.add_argument("--ring-mb", type=float, default=RING_BYTES / 2**20, help="Replay buffer size")
+    args = parser.parse_args()
+
+    source = args.source
+    if source is None:
+        from SecretsManager import get_secret
+        source = get_secret('kendo-line-bot-secret').get('esp32cam_link')
+
+    relay = CameraRelay(source, ring_bytes=int(args.ring_mb * 2**20))
+    relay.start()
+    server = make_server(relay, args.host, args.port)
+    print(f"Relaying {source} on http://{args.host}:{args.port}/stream")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping relay.")
+    finally:
+        relay.stop()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Fan-out benchmark for the camera relay (camera_relay.py).
+
+Starts a local fake ESP32 MJPEG server, the relay in front of it, and a mix of
+fast and bandwidth-limited viewers, then reports what each viewer received and
+the relay's own per-client stats. The camera should see exactly one connection
+however many viewers there are. No camera or network access is needed.
+
+    python camera_relay_benchmark.py --viewers 10 --slow 3 --fps 25 --seconds 10
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from camera_relay import CameraRelay, MJPEGParser, fetch_clip, make_server
+
+ESP32_BOUNDARY = "123456789000000000000987654321"  # what the ESP32 camera server uses
+
+def fake_jpeg(seq, size):
+    """
+    JPEG-shaped bytes (SOI ... EOI) with the frame number in them; never decoded.
+    """
+    body = seq.to_bytes(4, "big") + os.urandom(max(size - 8, 0))
+    return b"\xff\xd8" + body + b"\xff\xd9"
+
+class FakeCamera(ThreadingHTTPServer):
+    """
+    Serves an endless MJPEG stream in the ESP32 CameraWebServer format.
+    """
+    daemon_threads = True
+
+    def __init__(self, fps, frame_bytes):
+        self.fps = fps
+        self.frame_bytes = frame_bytes
+        self.connections = 0
+        super().__init__(("127.0.0.1", 0), FakeCameraHandler)
+
+class FakeCameraHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.connections += 1
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace;boundary={ESP32_BOUNDARY}")
+        self.end_headers()
+        period = 1 / self.server.fps
+        next_frame = time.monotonic()
+        seq = 0
+        try:
+            while True:
+                seq += 1
+                jpeg = fake_jpeg(seq, self.server.frame_bytes)
+                self.wfile.write(f"\r\n--{ESP32_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                 f"Content-Length: {len(jpeg)}\r\nX-Timestamp: {time.time():.6f}\r\n\r\n"
+                                 .encode("latin-1") + jpeg)
+                next_frame += period
+                time.sleep(max(next_frame - time.monotonic(), 0))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+def viewer(url, seconds, bytes_per_second, result):
+    """
+    Read the relay stream for `seconds`, optionally throttled to `bytes_per_second`.
+    """
+    sock = socket.create_connection(url, timeout=10)
+    if bytes_per_second:
+        # A small receive buffer so throttling pushes back on the relay quickly
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16 * 1024)
+    result["address"] = "%s:%d" % sock.getsockname()
+    sock.sendall(b"GET /stream HTTP/1.1\r\nHost: relay\r\n\r\n")
+    header = b""
+    while b"\r\n\r\n" not in header:
+        header += sock.recv(1)
+    content_type = [line for line in header.decode("latin-1").split("\r\n")
+                    if line.lower().startswith("content-type:")][0].split(":", 1)[1]
+    parser = MJPEGParser(MJPEGParser.boundary_from(content_type))
+    chunk = 4096
+    frames = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        data = sock.recv(chunk)
+        if not data:
+            break
+        frames += [int.from_bytes(jpeg[2:6], "big") for jpeg in parser.feed(data)]
+        if bytes_per_second:
+            time.sleep(len(data) / bytes_per_second)
+    sock.close()
+    result["frames"] = len(frames)
+    result["fps"] = len(frames) / seconds
+    result["skipped"] = sum(b - a - 1 for a, b in zip(frames, frames[1:]) if b > a)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", type=int, default=10)
+    parser.add_argument("--slow", type=int, default=3, help="How many of the viewers are bandwidth-limited")
+    parser.add_argument("--slow-kbps", type=float, default=200.0, help="Bandwidth of a slow viewer (KB/s)")
+    parser.add_argument("--fps", type=float, default=25.0, help="Camera frame rate")
+    parser.add_argument("--frame-kb", type=float, default=30.0, help="JPEG size")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--ring-mb", type=float, default=2.0, help="Relay replay buffer size")
+    args = parser.parse_args()
+
+    camera = FakeCamera(args.fps, int(args.frame_kb * 1024))
+    threading.Thread(target=camera.serve_forever, daemon=True).start()
+    relay = CameraRelay(f"http://127.0.0.1:{camera.server_address[1]}/stream", ring_bytes=int(args.ring_mb * 2**20))
+    relay.start()
+    server = make_server(relay, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = server.server_address
+
+    while relay.latest is None:
+        time.sleep(0.05)
+
+    results = [{} for _ in range(args.viewers)]
+    threads = []
+    for i in range(args.viewers):
+        limit = args.slow_kbps * 1024 if i < args.slow else 0
+        threads.append(threading.Thread(target=viewer, args=(address, args.seconds, limit, results[i])))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds * 0.9)
+    with urllib.request.urlopen(f"http://127.0.0.1:{address[1]}/stats") as response:
+        stats = json.load(response)
+    for thread in threads:
+        thread.join()
+
+    print(f"Camera {args.fps:.0f} fps x {args.frame_kb:.0f} KB, relay upstream {stats['fps']:.1f} fps, "
+          f"camera connections: {camera.connections}")
+    print(f"{'viewer':>6} {'kind':>6} {'frames':>7} {'fps':>6} {'skipped':>8} {'relay fps':>10} {'relay dropped':>14}")
+    clients = {client["address"]: client for client in stats["clients"]}
+    for i, result in enumerate(results):
+        client = clients[result["address"]]
+        kind = "slow" if i < args.slow else "fast"
+        print(f"{i:>6} {kind:>6} {result['frames']:>7} {result['fps']:>6.1f} {result['skipped']:>8} "
+              f"{client['fps']:>10.1f} {client['dropped']:>14}")
+
+    # Replay buffer: the last second of video, as a strike replay would request it
+    now = time.time()
+    clip = fetch_clip(f"http://127.0.0.1:{address[1]}/stream", now - 1.0, now, max_frames=100)
+    print(f"\nReplay ring: {stats['ring']['frames']} frames, {stats['ring']['bytes'] / 2**20:.1f} MB "
+          f"(cap {relay.ring.max_bytes / 2**20:.0f} MB); last 1 s clip: {len(clip)} frames")
+    relay.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,13 @@
+import threading
 import serial
-import json
 from influxdb_client import InfluxDBClient, Point
 from influxdb_client.client.write_api import SYNCHRONOUS
 
 from SecretsManager import get_secret
+from serial_frames import FrameDecoder
 
 # InfluxDB configurations
-secret_data = get_secret('kendo-line-bot-secret')
-
 INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
-INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
-INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
 INFLUXDB_BUCKET = "environment_data"
 
 # Serial port configurations
@@ -20,28 +17,74 @@ BAUD_RATE = 9600
 def initialize_client():
     """
     Initialize the InfluxDB client with extended timeout and synchronous write options.
+    Secrets are fetched here rather than at import so the ingestion path can be
+    benchmarked without AWS access.
     """
-    return InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG, timeout=300_000)
+    secret_data = get_secret('kendo-line-bot-secret')
+    return InfluxDBClient(url=INFLUXDB_URL,
+                          token=secret_data.get('InfluxDB_Token'),
+                          org=secret_data.get('InfluxDB_organisation'),
+                          timeout=300_000)
 
-def write_to_influxdb(write_api, data):
+def to_point(data):
     """
-    Write parsed sensor data to InfluxDB and handle errors.
+    Build the sensor_data point for one parsed reading.
     """
-    try:
-        point = Point("sensor_data") \
-            .field("mic", data["mic"]) \
-            .field("temperature", data.get("temperature", None)) \
-            .field("humidity", data.get("humidity", None))
+    return Point("sensor_data") \
+        .field("mic", data["mic"]) \
+        .field("temperature", data.get("temperature", None)) \
+        .field("humidity", data.get("humidity", None))
 
-        write_api.write(bucket=INFLUXDB_BUCKET, record=point)
-        print("Data written to InfluxDB:", point)
+def write_to_influxdb(write_api, readings):
+    """
+    Write every parsed reading from one serial read to InfluxDB in a single request and handle errors.
+    """
+    try:
+        points = [to_point(data) for data in readings]
+        write_api.write(bucket=INFLUXDB_BUCKET, record=points)
+        print(f"{len(points)} point(s) written to InfluxDB:", points[-1])
     except Exception as e:
         print(f"Failed to write to InfluxDB: {e}")
 
+def ingest(ser, write_api, decoder, stop_event):
+    """
+    Read from the serial port and write to InfluxDB until stop_event is set.
+    """
+    while not stop_event.is_set():
+        try:
+            # Decode everything waiting in the buffer at once
+            records = decoder.feed(ser.read(ser.in_waiting or 1))
+            if not records:
+                continue
+
+            readings = []
+            for data in records:
+                if "error" in data:
+                    print("Sensor error:", data["error"])
+                elif "mic" not in data:
+                    print("Incomplete reading:", data)
+                else:
+                    readings.append(data)
+
+            # Write data to InfluxDB
+            if readings:
+                write_to_influxdb(write_api, readings)
+
+        except serial.SerialException as e:
+            print(f"Serial port error: {e}")
+            print("Attempting to reconnect...")
+            ser.close()
+            ser.open()
+            decoder.clear()
+
 def main():
     """
     Main loop to read from the serial port and write to InfluxDB.
     """
+    stop_event = threading.Event()
+
+    # Binary frames or JSON lines, whichever the sensor firmware sends
+    decoder = FrameDecoder()
     try:
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
         print("Connected to serial port:", SERIAL_PORT)
@@ -49,38 +92,15 @@ def main():
         client = initialize_client()
         write_api = client.write_api(write_options=SYNCHRONOUS)
 
-        while True:
-            try:
-                line = ser.readline().decode('utf-8').strip()
-                if line:
-                    print("Raw data:", line)
-
-                    # Parse the JSON data
-                    try:
-                        data = json.loads(line)
-                        print("Parsed data:", data)
-
-                        if "error" in data:
-                            print("Sensor error:", data["error"])
-                            continue
-
-                        # Write data to InfluxDB
-                        write_to_influxdb(write_api, data)
-
-                    except json.JSONDecodeError:
-                        print("Failed to parse JSON:", line)
-
-            except serial.SerialException as e:
-                print(f"Serial port error: {e}")
-                print("Attempting to reconnect...")
-                ser.close()
-                ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
+        ingest(ser, write_api, decoder, stop_event)
 
     except KeyboardInterrupt:
         print("Stopping script.")
     except Exception as e:
         print(f"Unexpected error: {e}")
     finally:
+        print(f"Frames decoded: {decoder.frames}, dropped: {decoder.dropped}, "
+              f"CRC errors: {decoder.crc_errors}, parse errors: {decoder.parse_errors}")
         try:
             ser.close()
             print("Serial port closed.")
@@ -0,0 +1,64 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy.stats import skew, kurtosis
+
+FEATURE_AXES = ['accelX', 'accelY', 'accelZ', 'gyroX', 'gyroY', 'gyroZ', 'roll', 'pitch']
+FEATURE_STATS = ['mean', 'std', 'max', 'min', 'skew', 'kurtosis']
+FEATURES_MEASUREMENT = "move_features"
+
+# Define the feature order explicitly (must match the order the scaler was fitted with)
+feature_order = [f'{axis}_{stat}' for axis in FEATURE_AXES for stat in FEATURE_STATS]
+
+# Define feature extraction
+def extract_features(window):
+    features = {}
+    for axis in FEATURE_AXES:
+        axis_data = window[axis]
+        features[f'{axis}_mean'] = axis_data.mean()
+        features[f'{axis}_std'] = axis_data.std()
+        features[f'{axis}_max'] = axis_data.max()
+        features[f'{axis}_min'] = axis_data.min()
+        features[f'{axis}_skew'] = skew(axis_data)
+        features[f'{axis}_kurtosis'] = kurtosis(axis_data, fisher=False)
+    return pd.DataFrame([features])
+
+def window_features(values):
+    """
+    Same 48 features as extract_features, computed for all axes at once on an
+    (n_samples, 8) array with columns in FEATURE_AXES order.
+    Returns a flat array in feature_order.
+    """
+    values = np.asarray(values, dtype=float)
+    stats = np.stack([
+        values.mean(axis=0),
+        values.std(axis=0, ddof=1),  # pandas' std is the sample std
+        values.max(axis=0),
+        values.min(axis=0),
+        skew(values, axis=0),
+        kurtosis(values, axis=0, fisher=False),
+    ], axis=1)
+    return stats.ravel()
+
+class FeatureWindower:
+    """
+    Emit features for the last `window_size` samples every `hop` samples.
+    """
+
+    def __init__(self, window_size=10, hop=5):
+        self.window_size = window_size
+        self.hop = hop
+        self.samples = deque(maxlen=window_size)
+        self.since_last = 0
+
+    def push(self, timestamp, values):
+        """
+        Add one sample. Returns (window_end_timestamp, features) when a window is due, else None.
+        """
+        self.samples.append(values)
+        self.since_last += 1
+        if len(self.samples) < self.window_size or self.since_last < self.hop:
+            return None
+        self.since_last = 0
+        return timestamp, window_features(self.samples)
@@ -0,0 +1,55 @@
+import threading
+from collections import deque
+
+RING_BYTES = 32 * 1024 * 1024  # ~40 s of 25 fps x 30 KB frames
+
+class FrameRing:
+    """
+    The most recent camera frames, capped by total JPEG bytes rather than count.
+
+    Frames are stored exactly as received (camera_relay.Frame: seq, capture
+    timestamp, JPEG bytes) and are never decoded here; once the cap is reached
+    the oldest frames are dropped, so memory stays fixed at `max_bytes` plus the
+    per-frame overhead however long the relay runs.
+    """
+
+    def __init__(self, max_bytes=RING_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evicted = 0
+        self._frames = deque()
+        self._lock = threading.Lock()
+
+    def append(self, frame):
+        if len(frame.jpeg) > self.max_bytes:
+            return
+        with self._lock:
+            self._frames.append(frame)
+            self.bytes += len(frame.jpeg)
+            while self.bytes > self.max_bytes:
+                self.bytes -= len(self._frames.popleft().jpeg)
+                self.evicted += 1
+
+    def between(self, start, end, max_frames=None):
+        """
+        Frames captured from `start` to `end` (epoch seconds), oldest first; evenly
+        thinned to at most `max_frames` if given.
+        """
+        with self._lock:
+            frames = [frame for frame in self._frames if start <= frame.timestamp <= end]
+        if max_frames and len(frames) > max_frames:
+            step = len(frames) / max_frames
+            frames = [frames[int(i * step)] for i in range(max_frames)]
+        return frames
+
+    def span(self):
+        """
+        (oldest, newest) capture timestamps held, or None when empty.
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            return self._frames[0].timestamp, self._frames[-1].timestamp
+
+    def __len__(self):
+        return len(self._frames)
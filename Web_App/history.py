@@ -0,0 +1,121 @@
+# Install dependencies before running (streamlit, pandas, influxdb-client)
+# streamlit run history.py
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timezone
+
+from history_pages import HistoryLoader, page_every_ms, page_start
+from imu_frames import sensor_filter
+from resources import get_influx_client
+
+INFLUXDB_BUCKET = "SIOT_Test"
+SENSOR = "individual"  # Sensor tag of the IMU shown (SENSOR_PORTS in imu_upload.py)
+
+# Zoom levels: the time span shown on screen (one page)
+ZOOM_LEVELS = {
+    "30 s": "30s",
+    "1 min": "1min",
+    "5 min": "5min",
+    "15 min": "15min",
+    "1 h": "1h",
+    "4 h": "4h",
+}
+ACCEL_FIELDS = ["accelX", "accelY", "accelZ"]
+GYRO_FIELDS = ["gyroX", "gyroY", "gyroZ"]
+CHART_WIDTH_PX = 1200  # Points fetched per page; about one per pixel of the chart
+
+def fetch_history(start, stop, every_ms):
+    """
+    One page of the session, downsampled by InfluxDB to `every_ms` means.
+    """
+    fields = " or ".join(f'r["_field"] == "{field}"' for field in ACCEL_FIELDS + GYRO_FIELDS)
+    columns = ", ".join(f'"{field}"' for field in ["_time"] + ACCEL_FIELDS + GYRO_FIELDS)
+    query = f'''
+    from(bucket: "{INFLUXDB_BUCKET}")
+      |> range(start: time(v: "{start.isoformat()}"), stop: time(v: "{stop.isoformat()}"))
+      |> filter(fn: (r) => r["_measurement"] == "gyro_status" and {sensor_filter(SENSOR)})
+      |> filter(fn: (r) => {fields})
+      |> group(columns: ["_field"])  // Tagged and untagged rows of a field form one series
+      |> aggregateWindow(every: {every_ms}ms, fn: mean, createEmpty: false)
+      |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+      |> keep(columns: [{columns}])
+    '''
+    data = get_influx_client().query_api().query_data_frame(query)
+    if isinstance(data, list):
+        data = pd.concat(data, ignore_index=True) if data else pd.DataFrame()
+    if data.empty:
+        return pd.DataFrame(columns=ACCEL_FIELDS + GYRO_FIELDS)
+    data["_time"] = pd.to_datetime(data["_time"])
+    return data.set_index("_time").sort_index()[[f for f in ACCEL_FIELDS + GYRO_FIELDS if f in data]]
+
+@st.cache_resource
+def get_history_loader():
+    """
+    One page cache (and prefetch pool) per server process, shared by all viewers.
+    """
+    return HistoryLoader(fetch_history)
+
+# Streamlit Configuration
+st.set_page_config(page_title="KiAI - Session History", page_icon="🤺", layout="wide")
+st.title("Session History")
+
+zoom_names = list(ZOOM_LEVELS)
+
+# Initialize Session State: start on the most recent page at 5 min zoom
+if "history_zoom" not in st.session_state:
+    st.session_state.history_zoom = "5 min"
+    span = pd.Timedelta(ZOOM_LEVELS["5 min"])
+    st.session_state.history_start = page_start(pd.Timestamp.now(tz="UTC") - span, span)
+
+span = pd.Timedelta(ZOOM_LEVELS[st.session_state.history_zoom])
+
+# Jump to a time in the session
+with st.sidebar:
+    st.header("Go to")
+    day = st.date_input("Date", value=st.session_state.history_start.date())
+    at = st.time_input("Time (UTC)", value=st.session_state.history_start.time().replace(microsecond=0),
+                       step=60)
+    if st.button("Go"):
+        target = pd.Timestamp(datetime.combine(day, at, tzinfo=timezone.utc))
+        st.session_state.history_start = page_start(target, span)
+
+# Pan and zoom; zooming keeps the centre of the view in place
+def zoom_to(name):
+    centre = st.session_state.history_start + span / 2
+    st.session_state.history_zoom = name
+    st.session_state.history_start = page_start(centre, pd.Timedelta(ZOOM_LEVELS[name]))
+
+col1, col2, col3, col4 = st.columns(4)
+if col1.button("◀ Earlier"):
+    st.session_state.history_start -= span
+if col2.button("Later ▶"):
+    st.session_state.history_start += span
+zoom_index = zoom_names.index(st.session_state.history_zoom)
+if col3.button("Zoom in", disabled=zoom_index == 0):
+    zoom_to(zoom_names[zoom_index - 1])
+if col4.button("Zoom out", disabled=zoom_index == len(zoom_names) - 1):
+    zoom_to(zoom_names[zoom_index + 1])
+
+span = pd.Timedelta(ZOOM_LEVELS[st.session_state.history_zoom])
+start = st.session_state.history_start
+loader = get_history_loader()
+try:
+    page = loader.get(start, span, CHART_WIDTH_PX)
+except Exception as e:
+    st.error(f"Error fetching history from InfluxDB: {e}")
+    page = pd.DataFrame(columns=ACCEL_FIELDS + GYRO_FIELDS)
+
+st.write(f"**{start:%Y-%m-%d %H:%M:%S}** to **{start + span:%H:%M:%S}** UTC "
+         f"({st.session_state.history_zoom}, {page_every_ms(span, CHART_WIDTH_PX)} ms per point)")
+
+if page.empty:
+    st.info("No data in this part of the session.")
+else:
+    st.header("Accelerometer Data:")
+    st.line_chart(page[[f for f in ACCEL_FIELDS if f in page]])
+    st.header("Gyroscope Data:")
+    st.line_chart(page[[f for f in GYRO_FIELDS if f in page]])
+
+stats = loader.stats()
+st.caption(f"{len(page)} points on screen · page cache: {stats['pages']} pages, "
+           f"{stats['hits']} hits / {stats['misses']} misses, {stats['prefetched']} prefetched")
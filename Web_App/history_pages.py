@@ -0,0 +1,126 @@
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+MIN_EVERY_MS = 10  # The IMU samples at 100 Hz; no point aggregating below one sample
+
+def page_every_ms(span, width_px):
+    """
+    Aggregation interval that gives about one point per pixel for a page of `span`.
+    """
+    return max(math.ceil(pd.Timedelta(span).total_seconds() * 1000 / max(width_px, 1)), MIN_EVERY_MS)
+
+def page_start(at, span):
+    """
+    Start of the page containing `at`. Pages are aligned to multiples of their span,
+    so every viewer asks for (and caches) the same pages at a given zoom.
+    """
+    span = pd.Timedelta(span)
+    at = pd.Timestamp(at)
+    epoch = pd.Timestamp(0, tz=at.tz)
+    return epoch + ((at - epoch) // span) * span
+
+class HistoryLoader:
+    """
+    Paginated, downsampled reads of a long session.
+
+    A page is `span` of time downsampled to about `width_px` points, fetched with
+    fetch_fn(start, stop, every_ms) -> DataFrame. Finished pages are kept in an
+    LRU cache of `max_pages`, and after every read the pages either side are
+    fetched in the background, so panning back or forward is served from memory.
+    Pages that reach into the future are never cached, since they are still filling.
+
+    A miss is fetched on the caller's thread, so a read never queues behind
+    prefetches; a prefetch of the same page that hasn't started yet is taken over.
+    """
+
+    def __init__(self, fetch_fn, max_pages=64, prefetch_workers=2):
+        self.fetch_fn = fetch_fn
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self._pages = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="history-prefetch")
+
+    def get(self, start, span, width_px, prefetch=True):
+        """
+        The page starting at `start` (see page_start()), fetching it if needed.
+        """
+        span = pd.Timedelta(span)
+        key = (pd.Timestamp(start), span, page_every_ms(span, width_px))
+        with self._lock:
+            if key in self._pages:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                page = self._pages[key]
+                future, load_here = None, False
+            else:
+                self.misses += 1
+                future = self._inflight.get(key)
+                if future is not None and future.cancel():
+                    future = None  # Still queued behind other prefetches
+                load_here = future is None
+                if load_here:
+                    future = Future()
+                    future.set_running_or_notify_cancel()  # Other readers wait on it, not cancel it
+                    self._inflight[key] = future
+        if load_here:
+            try:
+                page = self._load(key)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            future.set_result(page)
+        elif future is not None:
+            page = future.result()
+        if prefetch:
+            self.prefetch(key[0] - span, span, width_px)
+            self.prefetch(key[0] + span, span, width_px)
+        return page
+
+    def prefetch(self, start, span, width_px):
+        key = (pd.Timestamp(start), pd.Timedelta(span), page_every_ms(span, width_px))
+        if key[0] > pd.Timestamp.now(tz=key[0].tz):
+            return
+        with self._lock:
+            if key in self._pages or key in self._inflight:
+                return
+            self.prefetched += 1
+            self._submit(key)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"pages": len(self._pages), "hits": self.hits, "misses": self.misses,
+                    "prefetched": self.prefetched, "inflight": len(self._inflight)}
+
+    def _submit(self, key):
+        # Called with the lock held
+        future = self._executor.submit(self._load, key)
+        self._inflight[key] = future
+        return future
+
+    def _load(self, key):
+        start, span, every_ms = key
+        page = None
+        try:
+            page = self.fetch_fn(start, start + span, every_ms)
+        finally:
+            # Cached before it stops being in flight, so a read in between can't miss both
+            with self._lock:
+                if page is not None and start + span <= pd.Timestamp.now(tz=start.tz):
+                    self._pages[key] = page
+                    self._pages.move_to_end(key)
+                    while len(self._pages) > self.max_pages:
+                        self._pages.popitem(last=False)
+                self._inflight.pop(key, None)
+        return page
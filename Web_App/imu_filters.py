@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+# Rate the IMU gateway samples at; the cutoffs below are only meaningful relative to it
+IMU_SAMPLE_RATE_HZ = 100.0
+
+# Gravity is the (near) DC part of the accelerometer signal
+GRAVITY_CUTOFF_HZ = 0.3
+
+# A pause longer than this many sample intervals restarts the filter (process_frame)
+MAX_GAP_SAMPLES = 5
+
+class StreamingFilterBank:
+    """
+    Butterworth filter (second-order sections) applied to several IMU channels at once.
+
+    The filter state is carried between calls, so each poll only filters the
+    samples that arrived since the previous one and the output is identical to
+    filtering the whole stream in one go.
+
+    kind: "lowpass", "highpass" or "gravity" (high-pass at GRAVITY_CUTOFF_HZ).
+
+    With sample_rate_hz=None the rate is measured from the timestamps given to
+    process_frame() (median interval) and the filter is designed then. A cutoff at or
+    above the Nyquist frequency can't be realised; samples are then passed through
+    unchanged (e.g. the ~1.35 Hz legacy stream under a 10 Hz low-pass).
+    """
+
+    def __init__(self, kind="lowpass", cutoff_hz=10.0, sample_rate_hz=IMU_SAMPLE_RATE_HZ, order=2):
+        if kind == "gravity":
+            kind, cutoff_hz = "highpass", GRAVITY_CUTOFF_HZ
+        self.kind = kind
+        self.cutoff_hz = cutoff_hz
+        self.order = order
+        self.measure_rate = sample_rate_hz is None
+        self.sample_rate_hz = None
+        self.sos = None
+        self.zi = None
+        self.last_time = None
+        if not self.measure_rate:
+            self._design(sample_rate_hz)
+
+    def _design(self, sample_rate_hz):
+        self.sample_rate_hz = sample_rate_hz
+        if self.cutoff_hz < sample_rate_hz / 2:
+            self.sos = butter(self.order, self.cutoff_hz, btype=self.kind, fs=sample_rate_hz, output='sos')
+        else:
+            self.sos = None
+            print(f"{self.kind} at {self.cutoff_hz} Hz is above the Nyquist frequency of "
+                  f"{sample_rate_hz:.2f} Hz samples; passing them through unfiltered")
+
+    @property
+    def passthrough(self):
+        return self.sample_rate_hz is not None and self.sos is None
+
+    def reset(self):
+        """
+        Forget the filter state, e.g. after a gap in the data. A measured sample
+        rate is measured again.
+        """
+        self.zi = None
+        self.last_time = None
+        if self.measure_rate:
+            self.sample_rate_hz = None
+            self.sos = None
+
+    def process(self, chunk):
+        """
+        Filter an (n_samples, n_channels) array of new samples, all channels in one call.
+        """
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        if self.sample_rate_hz is None:
+            raise ValueError("Sample rate not measured yet; filter a frame with process_frame() first")
+        if len(chunk) == 0 or self.sos is None:
+            return chunk
+        if self.zi is None:
+            # Start from steady state at the first sample instead of ringing up from zero
+            self.zi = sosfilt_zi(self.sos)[:, :, None] * chunk[0]
+        filtered, self.zi = sosfilt(self.sos, chunk, axis=0, zi=self.zi)
+        return filtered
+
+    def process_frame(self, frame):
+        """
+        Same as process() for a DataFrame indexed by sample time; keeps the index and
+        column names. Measures the sample rate if needed, and restarts the filter
+        after a pause of more than MAX_GAP_SAMPLES intervals.
+        """
+        if frame.empty:
+            return frame.copy()
+        times = pd.DatetimeIndex(frame.index)
+        if self.last_time is not None:
+            times = times.insert(0, self.last_time)
+        intervals = np.diff(times.as_unit("ns").asi8) / 1e9
+        if self.sample_rate_hz is None:
+            positive = intervals[intervals > 0]
+            if not len(positive):
+                # A single sample says nothing about the rate; wait for the next one
+                self.last_time = frame.index[-1]
+                return frame.copy()
+            self._design(1 / np.median(positive))
+        elif self.last_time is not None and intervals[0] > MAX_GAP_SAMPLES / self.sample_rate_hz:
+            self.zi = None
+        self.last_time = frame.index[-1]
+        return pd.DataFrame(self.process(frame.to_numpy()), index=frame.index, columns=frame.columns)
@@ -0,0 +1,80 @@
+import json
+import math
+import time
+
+# Fields written to the gyro_status measurement, in the order the sensor sends them
+IMU_FIELDS = ['accelX', 'accelY', 'accelZ', 'gyroX', 'gyroY', 'gyroZ', 'roll', 'pitch']
+IMU_MEASUREMENT = "gyro_status"
+
+def sensor_filter(sensor, include_untagged=True):
+    """
+    Flux predicate selecting one sensor's gyro_status rows. Samples from the legacy
+    single-IMU uploader carry no sensor tag; with include_untagged they count as
+    this sensor's, so a single-player view works with either uploader.
+    """
+    tagged = f'r["sensor"] == "{sensor}"'
+    return f'(not exists r["sensor"] or {tagged})' if include_untagged else tagged
+
+# The sensor stamps every frame with micros(), which wraps every ~71 minutes
+DEVICE_CLOCK_WRAP_US = 2**32
+
+def parse_imu_line(line):
+    """
+    Parse one JSON frame from the IMU sensor, e.g.
+    {"t": 81234567, "accelX": 0.05, ..., "pitch": -2.56}
+
+    Returns (device_time_us, values) or None if the frame is incomplete.
+    """
+    data = json.loads(line)
+    if "error" in data or "t" not in data:
+        return None
+    try:
+        values = [float(data[field]) for field in IMU_FIELDS]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not all(math.isfinite(value) for value in values):
+        return None
+    return int(data["t"]), values
+
+class SourceClock:
+    """
+    Map the sensor's micros() counter onto wall-clock nanoseconds.
+
+    The offset is anchored on the first frame so every sample keeps the spacing
+    it was measured with, instead of the spacing it happened to arrive with over
+    serial. The anchor is reset when the sensor reboots or drifts too far.
+    """
+
+    def __init__(self, max_skew_ns=250_000_000, now_ns=time.time_ns):
+        self.max_skew_ns = max_skew_ns
+        self.now_ns = now_ns
+        self.offset_ns = None
+        self.last_device_us = None
+        self.wraps = 0
+
+    def to_epoch_ns(self, device_us):
+        """
+        Convert a device timestamp (µs since boot) into an epoch timestamp (ns).
+        """
+        now = self.now_ns()
+        if self.last_device_us is not None and device_us < self.last_device_us:
+            # A wrap lands just past zero shortly after the counter neared its limit;
+            # anything else going backwards means the sensor rebooted
+            if self.last_device_us - device_us > DEVICE_CLOCK_WRAP_US // 2:
+                self.wraps += 1
+            else:
+                self.offset_ns = None
+        self.last_device_us = device_us
+
+        device_ns = (device_us + self.wraps * DEVICE_CLOCK_WRAP_US) * 1000
+        if self.offset_ns is None or abs(device_ns + self.offset_ns - now) > self.max_skew_ns:
+            self.offset_ns = now - device_ns
+        return device_ns + self.offset_ns
+
+def to_line_protocol(sensor, timestamp_ns, values, measurement=IMU_MEASUREMENT, fields=IMU_FIELDS):
+    """
+    Encode one sample as an InfluxDB line-protocol record.
+    Building the string directly is much cheaper than a Point per sample at 100 Hz.
+    """
+    field_set = ",".join(f"{name}={value!r}" for name, value in zip(fields, values))
+    return f"{measurement},sensor={sensor} {field_set} {timestamp_ns}"
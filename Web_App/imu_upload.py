@@ -0,0 +1,134 @@
+import json
+import threading
+import numpy as np
+import serial
+from influxdb_client import InfluxDBClient, WriteOptions, WritePrecision
+
+from SecretsManager import get_secret
+from imu_frames import parse_imu_line, SourceClock, to_line_protocol
+from features import FeatureWindower, FEATURES_MEASUREMENT, feature_order
+
+# InfluxDB configurations
+secret_data = get_secret('kendo-line-bot-secret')
+
+INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
+INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
+INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
+INFLUXDB_BUCKET = "SIOT_Test"
+
+# Serial port configurations (one port per sensor, keyed by the sensor tag written to Influx).
+# For a team session use the position tags from team_view.TEAM_SENSORS, e.g. {"sempo": "COM5", "jiho": "COM6", ...}
+SENSOR_PORTS = {"individual": "COM5"}
+BAUD_RATE = 921600  # 100 Hz of JSON frames does not fit through 115200 baud
+
+# Batching: at 100 Hz per sensor this is roughly one gzip'd request per second
+BATCH_SIZE = 500
+FLUSH_INTERVAL_MS = 1000
+
+# Edge features: the predictor's window size, published every FEATURE_HOP samples
+PUBLISH_FEATURES = True
+FEATURE_WINDOW_SIZE = 10
+FEATURE_HOP = 5
+
+def initialize_client():
+    """
+    Initialize the InfluxDB client with gzip enabled for the write requests.
+    """
+    return InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG,
+                          timeout=30_000, enable_gzip=True)
+
+def initialize_write_api(client):
+    """
+    Batching write API: records are buffered and flushed in the background
+    every BATCH_SIZE records or FLUSH_INTERVAL_MS, whichever comes first.
+    """
+    return client.write_api(write_options=WriteOptions(batch_size=BATCH_SIZE,
+                                                       flush_interval=FLUSH_INTERVAL_MS,
+                                                       jitter_interval=0,
+                                                       retry_interval=5_000))
+
+def read_sensor(sensor, port, write_api, stop_event):
+    """
+    Read frames from one sensor, timestamp them with the sensor's own clock and
+    queue them for the batched writer. Window features are computed alongside
+    and written to the move_features measurement.
+    """
+    clock = SourceClock()
+    windower = FeatureWindower(FEATURE_WINDOW_SIZE, FEATURE_HOP)
+    ser = serial.Serial(port, BAUD_RATE, timeout=1)
+    print(f"Connected to serial port {port} for sensor '{sensor}'")
+    buffer = b""
+    try:
+        while not stop_event.is_set():
+            try:
+                # Drain everything that is waiting instead of one readline() per frame
+                buffer += ser.read(ser.in_waiting or 1)
+            except serial.SerialException as e:
+                print(f"Serial port error on {port}: {e}")
+                print("Attempting to reconnect...")
+                ser.close()
+                ser = serial.Serial(port, BAUD_RATE, timeout=1)
+                clock = SourceClock()
+                windower = FeatureWindower(FEATURE_WINDOW_SIZE, FEATURE_HOP)
+                buffer = b""
+                continue
+
+            *lines, buffer = buffer.split(b"\n")
+            records = []
+            for raw in lines:
+                line = raw.decode('utf-8', errors='ignore').strip()
+                if not line:
+                    continue
+                try:
+                    frame = parse_imu_line(line)
+                except json.JSONDecodeError:
+                    print("Failed to parse JSON:", line)
+                    continue
+                if frame is None:
+                    continue
+                device_us, values = frame
+                timestamp_ns = clock.to_epoch_ns(device_us)
+                records.append(to_line_protocol(sensor, timestamp_ns, values))
+
+                window = windower.push(timestamp_ns, values) if PUBLISH_FEATURES else None
+                if window is not None:
+                    window_end_ns, features = window
+                    # Skew/kurtosis are undefined on a perfectly still window; the predictor can't use it either
+                    if np.all(np.isfinite(features)):
+                        records.append(to_line_protocol(sensor, window_end_ns, features.tolist(),
+                                                        measurement=FEATURES_MEASUREMENT, fields=feature_order))
+
+            if records:
+                write_api.write(bucket=INFLUXDB_BUCKET, record=records, write_precision=WritePrecision.NS)
+    finally:
+        ser.close()
+        print(f"Serial port {port} closed.")
+
+def main():
+    """
+    Start one reader thread per sensor, all feeding the same batched writer.
+    """
+    client = initialize_client()
+    write_api = initialize_write_api(client)
+    stop_event = threading.Event()
+    readers = [threading.Thread(target=read_sensor, args=(sensor, port, write_api, stop_event), daemon=True)
+               for sensor, port in SENSOR_PORTS.items()]
+    try:
+        for reader in readers:
+            reader.start()
+        while any(reader.is_alive() for reader in readers):
+            for reader in readers:
+                reader.join(timeout=1)
+    except KeyboardInterrupt:
+        print("Stopping script.")
+    finally:
+        stop_event.set()
+        for reader in readers:
+            reader.join(timeout=2)
+        # Flushes whatever is still buffered before disconnecting
+        write_api.close()
+        client.close()
+        print("Disconnected from InfluxDB.")
+
+if __name__ == "__main__":
+    main()
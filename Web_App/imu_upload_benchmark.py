@@ -0,0 +1,94 @@
+"""
+Throughput benchmark for the IMU gateway (imu_upload.py).
+
+Replays synthetic 100 Hz+ JSON frames for several sensors through the same
+parse -> source timestamp -> line protocol -> gzip batch path the gateway uses,
+without a serial port or an InfluxDB instance.
+
+    python imu_upload_benchmark.py --sensors 5 --rate 200 --seconds 60
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import time
+
+from imu_frames import IMU_FIELDS, parse_imu_line, SourceClock, to_line_protocol
+
+def synthetic_stream(rate_hz, seconds, seed):
+    """
+    Serial bytes for one sensor sending `rate_hz` frames for `seconds`.
+    """
+    rng = random.Random(seed)
+    period_us = int(1_000_000 / rate_hz)
+    frames = []
+    for i in range(int(rate_hz * seconds)):
+        phase = i / rate_hz
+        frame = {"t": 5_000_000 + i * period_us}
+        for j, field in enumerate(IMU_FIELDS):
+            frame[field] = round(math.sin(phase * (j + 1)) * 2 + rng.gauss(0, 0.05), 2)
+        frames.append(json.dumps(frame, separators=(",", ":")))
+    return ("\n".join(frames) + "\n").encode("utf-8")
+
+def run_sensor(sensor, stream, chunk_size, batch_size):
+    """
+    Push one sensor's stream through the gateway path in serial-sized chunks.
+    Returns (samples, seconds, raw line-protocol bytes, gzip'd bytes).
+    """
+    clock = SourceClock()
+    buffer = b""
+    batch = []
+    samples = raw_bytes = gzip_bytes = 0
+
+    start = time.perf_counter()
+    for offset in range(0, len(stream), chunk_size):
+        buffer += stream[offset:offset + chunk_size]
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            frame = parse_imu_line(raw.decode("utf-8"))
+            if frame is None:
+                continue
+            device_us, values = frame
+            batch.append(to_line_protocol(sensor, clock.to_epoch_ns(device_us), values))
+        if len(batch) >= batch_size:
+            body = "\n".join(batch).encode("utf-8")
+            raw_bytes += len(body)
+            gzip_bytes += len(gzip.compress(body))
+            samples += len(batch)
+            batch = []
+    if batch:
+        body = "\n".join(batch).encode("utf-8")
+        raw_bytes += len(body)
+        gzip_bytes += len(gzip.compress(body))
+        samples += len(batch)
+    return samples, time.perf_counter() - start, raw_bytes, gzip_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, default=5, help="number of simulated sensors")
+    parser.add_argument("--rate", type=float, default=100.0, help="frames per second per sensor")
+    parser.add_argument("--seconds", type=float, default=30.0, help="seconds of data per sensor")
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes per serial read")
+    parser.add_argument("--batch", type=int, default=500, help="records per write batch")
+    args = parser.parse_args()
+
+    print(f"{args.sensors} sensors x {args.rate:g} Hz x {args.seconds:g} s")
+    total_samples = total_time = 0
+    for n in range(args.sensors):
+        sensor = f"sensor{n}"
+        stream = synthetic_stream(args.rate, args.seconds, seed=n)
+        samples, seconds, raw_bytes, gzip_bytes = run_sensor(sensor, stream, args.chunk, args.batch)
+        total_samples += samples
+        total_time += seconds
+        print(f"{sensor}: {samples / seconds:,.0f} samples/s sustained "
+              f"({samples / seconds / args.rate:,.1f}x real time), "
+              f"{raw_bytes / samples:.0f} B/sample raw, {gzip_bytes / samples:.1f} B/sample gzip")
+
+    # One gateway process handles every sensor, so the budget is shared
+    overall = total_samples / total_time
+    print(f"overall: {overall:,.0f} samples/s -> "
+          f"{overall / args.rate:,.0f} sensors at {args.rate:g} Hz on one core")
+
+if __name__ == "__main__":
+    main()
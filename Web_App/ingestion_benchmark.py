@@ -0,0 +1,164 @@
+"""
+Reproducible throughput benchmark for the environment upload path.
+
+A simulated sensor writes readings into a pseudo-terminal at a fixed rate,
+environment_upload.ingest() reads them through pyserial exactly as it does on
+the gateway, and writes go to a local fake InfluxDB /api/v2/write endpoint.
+No hardware, AWS or InfluxDB Cloud access is needed (Linux/macOS pty).
+
+    python ingestion_benchmark.py --rate 50 --seconds 30 --format binary
+    python ingestion_benchmark.py --rate 50 --seconds 30 --format json --write-delay-ms 120
+
+Reports sustained points/s, end-to-end latency percentiles (reading sent on
+the serial line -> point received by the endpoint), dropped readings and
+ingestion CPU time per point.
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import threading
+import time
+import tty
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import serial
+from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+import environment_upload
+from serial_frames import FrameDecoder, encode_environment_frame
+
+# Each reading's sequence number is carried in its values so the endpoint can match it:
+# temperature holds seq % 10000 and humidity seq // 10000, both in hundredths
+def reading_values(seq):
+    return (seq % 10000) / 100, (seq // 10000) / 100
+
+def reading_seq(temperature, humidity):
+    return round(temperature * 100) + round(humidity * 100) * 10000
+
+def encode_reading(seq, fmt):
+    temperature, humidity = reading_values(seq)
+    if fmt == "binary":
+        return encode_environment_frame(seq, seq % 2, temperature, humidity)
+    return (json.dumps({"mic": seq % 2, "temperature": temperature, "humidity": humidity}) + "\n").encode("utf-8")
+
+class FakeInfluxDB(ThreadingHTTPServer):
+    """
+    Accepts /api/v2/write, records when each reading arrived, optionally adds latency.
+    """
+
+    def __init__(self, write_delay):
+        super().__init__(("127.0.0.1", 0), WriteHandler)
+        self.write_delay = write_delay
+        self.received = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+class WriteHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        arrived = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+
+        received = {}
+        for line in body.decode("utf-8").splitlines():
+            fields = dict(pair.split("=", 1) for pair in line.split(" ")[1].split(","))
+            received[reading_seq(float(fields["temperature"]), float(fields["humidity"]))] = arrived
+
+        with self.server.lock:
+            self.server.received.update(received)
+            self.server.requests += 1
+        if self.server.write_delay:
+            time.sleep(self.server.write_delay)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def send_readings(master_fd, rate, seconds, fmt, sent):
+    """
+    Simulated sensor: one reading every 1/rate s. A real UART has no flow control,
+    so a reading that doesn't fit in the pty buffer is lost (an overrun).
+    """
+    os.set_blocking(master_fd, False)
+    overruns = 0
+    start = time.perf_counter()
+    for seq in range(int(rate * seconds)):
+        delay = start + seq / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            os.write(master_fd, encode_reading(seq, fmt))
+            sent[seq] = time.perf_counter()
+        except BlockingIOError:
+            overruns += 1
+    return overruns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20.0, help="readings per second from the sensor")
+    parser.add_argument("--seconds", type=float, default=20.0, help="how long the sensor sends for")
+    parser.add_argument("--format", choices=["binary", "json"], default="binary", help="serial link format")
+    parser.add_argument("--write-delay-ms", type=float, default=0.0, help="simulated InfluxDB write round trip")
+    parser.add_argument("--drain-seconds", type=float, default=5.0, help="wait for in-flight writes after sending")
+    args = parser.parse_args()
+
+    server = FakeInfluxDB(args.write_delay_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = InfluxDBClient(url=f"http://127.0.0.1:{server.server_port}", token="benchmark", org="benchmark")
+    write_api = client.write_api(write_options=SYNCHRONOUS)
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(slave_fd)
+    ser = serial.Serial(os.ttyname(slave_fd), timeout=0.1)
+
+    decoder = FrameDecoder()
+    stop_event = threading.Event()
+    cpu = {}
+
+    def run_ingest():
+        cpu_start = time.thread_time()
+        environment_upload.ingest(ser, write_api, decoder, stop_event)
+        cpu["seconds"] = time.thread_time() - cpu_start
+
+    sent = {}
+    # ingest() prints every write; keep that cost but not the noise
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        ingest_thread = threading.Thread(target=run_ingest)
+        ingest_thread.start()
+        overruns = send_readings(master_fd, args.rate, args.seconds, args.format, sent)
+
+        drain_until = time.perf_counter() + args.drain_seconds
+        while time.perf_counter() < drain_until and len(server.received) < len(sent):
+            time.sleep(0.05)
+        stop_event.set()
+        ingest_thread.join()
+
+    ser.close()
+    os.close(master_fd)
+    os.close(slave_fd)
+    client.close()
+    server.shutdown()
+
+    received = {seq: t for seq, t in server.received.items() if seq in sent}
+    latencies = np.array([received[seq] - sent[seq] for seq in received]) * 1000
+    total = int(args.rate * args.seconds)
+    print(f"format={args.format} rate={args.rate:g}/s seconds={args.seconds:g} write_delay={args.write_delay_ms:g}ms")
+    print(f"readings: {total} generated, {overruns} overrun at the serial buffer, "
+          f"{len(sent) - len(received)} lost after sending, {total - len(received)} dropped in total")
+    if not received:
+        print("no points reached the endpoint")
+        return
+    elapsed = max(received.values()) - min(sent.values())
+    print(f"throughput: {len(received) / elapsed:,.1f} points/s sustained over {server.requests} write requests")
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"latency: p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, max {latencies.max():.1f} ms")
+    print(f"cpu: {cpu['seconds'] / len(received) * 1e6:,.0f} µs of ingestion thread time per point")
+
+if __name__ == "__main__":
+    main()
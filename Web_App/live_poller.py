@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import namedtuple
+
+# One published poll result; `version` increases by one per successful poll
+Snapshot = namedtuple("Snapshot", ["version", "fetched_at", "value"])
+
+class SharedPoller:
+    """
+    Process-wide background poller shared by all dashboard sessions.
+
+    One thread calls `fetch_fn` every `interval` seconds and publishes its result as
+    the latest Snapshot, so N viewers cost one set of queries and one prediction
+    instead of N. Sessions subscribe with a lease that they renew on every refresh;
+    the thread only runs while at least one lease is live and exits once the last
+    viewer stops or closes the tab (leases expire after `lease_seconds`). The next
+    subscriber starts it again.
+
+    Published values are shared between sessions and must be treated as read-only.
+    Keep one instance per process with st.cache_resource.
+    """
+
+    def __init__(self, fetch_fn, interval, lease_seconds=10.0, name="live-poller"):
+        self.fetch_fn = fetch_fn
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._leases = {}  # session id -> monotonic expiry
+        self._thread = None
+        self._snapshot = None
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+
+    def subscribe(self, session_id, timeout=0):
+        """
+        Take or renew the lease for `session_id`, starting the poller if it is idle,
+        and return the latest Snapshot (None before the first poll). With a timeout,
+        wait up to that many seconds for the first poll to finish (or fail).
+        """
+        with self._lock:
+            self._leases[session_id] = time.monotonic() + self.lease_seconds
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            if self._snapshot is None and timeout:
+                errors = self.errors
+                self._published.wait_for(lambda: self._snapshot is not None or self.errors > errors, timeout)
+            return self._snapshot
+
+    def unsubscribe(self, session_id):
+        """
+        Give up the lease, e.g. when the viewer presses Stop.
+        """
+        with self._lock:
+            self._leases.pop(session_id, None)
+
+    def snapshot(self):
+        """
+        Latest Snapshot without taking a lease.
+        """
+        with self._lock:
+            return self._snapshot
+
+    def subscribers(self):
+        with self._lock:
+            now = time.monotonic()
+            return sum(expiry > now for expiry in self._leases.values())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._leases = {session: expiry for session, expiry in self._leases.items() if expiry > now}
+                if not self._leases:
+                    # Nobody is watching; the next subscribe() starts a new thread
+                    self._thread = None
+                    return
+
+            started = time.monotonic()
+            try:
+                value = self.fetch_fn()
+            except Exception as e:
+                print(f"{self.name}: poll failed: {e}")
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = e
+                    self._published.notify_all()
+            else:
+                with self._lock:
+                    version = self._snapshot.version + 1 if self._snapshot else 1
+                    self._snapshot = Snapshot(version, time.time(), value)
+                    self.polls += 1
+                    self.last_error = None
+                    self._published.notify_all()
+
+            time.sleep(max(self.interval - (time.monotonic() - started), 0))
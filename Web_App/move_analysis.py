@@ -1,58 +1,70 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from influxdb_client import InfluxDBClient
-from SecretsManager import get_secret
-import time
-
-# InfluxDB connection details
-secret_data = get_secret('kendo-line-bot-secret')
-
-# InfluxDB Configuration
-INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
-INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
-INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
+import uuid
+from imu_frames import sensor_filter
+from live_poller import SharedPoller
+from running_metrics import RunningSmoothness
+from resources import get_influx_client
+from smoothness_plot import SmoothnessPlot
+
+# InfluxDB Configuration (the client itself is shared, see resources.py)
 INFLUXDB_BUCKET = "SIOT_Test"
+REFRESH_INTERVAL = 0.5  # Seconds between refreshes of the live analysis
+SENSOR = "individual"  # Sensor tag of the IMU analysed (SENSOR_PORTS in imu_upload.py)
 
 # Function to fetch data from InfluxDB
 def fetch_data_from_influxdb():
     """Fetch data from InfluxDB."""
-    with InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG) as client:
-        query = f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -3m)
-          |> filter(fn: (r) => r["_measurement"] == "gyro_status")
-          |> filter(fn: (r) => r["_field"] == "accelX" or 
-                               r["_field"] == "accelY" or 
-                               r["_field"] == "accelZ")
-          |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
-        '''
-        tables = client.query_api().query(query, org=INFLUXDB_ORG)
-        # Convert to Pandas DataFrame
-        data = []
-        for table in tables:
-            for record in table.records:
-                data.append(record.values)
-        df = pd.DataFrame(data)
-        # Rename and clean up columns
-        df.rename(columns={"_time": "timestamp"}, inplace=True)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])  # Ensure timestamp is datetime
-        return df
+    query = f'''
+    from(bucket: "{INFLUXDB_BUCKET}")
+      |> range(start: -3m)
+      |> filter(fn: (r) => r["_measurement"] == "gyro_status" and {sensor_filter(SENSOR)})
+      |> filter(fn: (r) => r["_field"] == "accelX" or 
+                           r["_field"] == "accelY" or 
+                           r["_field"] == "accelZ")
+      |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
+    '''
+    tables = get_influx_client().query_api().query(query)
+    # Convert to Pandas DataFrame
+    data = []
+    for table in tables:
+        for record in table.records:
+            data.append(record.values)
+    df = pd.DataFrame(data)
+    # Rename and clean up columns
+    df.rename(columns={"_time": "timestamp"}, inplace=True)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])  # Ensure timestamp is datetime
+    # Tagged and untagged series arrive as separate tables, one after the other
+    return df.sort_values('timestamp', ignore_index=True)
 
 # Analyze smoothness
-def analyze_smoothness(data, smooth_threshold=0.5):
-    """Analyze the smoothness of the movement."""
-    # Calculate acceleration magnitude
-    data['accel_magnitude'] = np.sqrt(data['accelX']**2 + data['accelY']**2 + data['accelZ']**2)
-    
-    # Calculate jerk (rate of change of acceleration)
-    data['jerk'] = data['accel_magnitude'].diff() / data['timestamp'].diff().dt.total_seconds()
-    
-    # Classify smoothness
-    data['is_smooth'] = data['jerk'].abs() < smooth_threshold
-    
-    return data
+def analyze_smoothness(data, smoothness):
+    """
+    Add the newly arrived samples of the 3 minute window to the running smoothness
+    aggregates and drop the ones that aged out. `data` itself is not modified.
+    """
+    return smoothness.update(data, times=data['timestamp'])
+
+# Fetch, analyse and render once per refresh for all sessions (runs on the poller thread)
+def poll_analysis(plot, smoothness):
+    data = fetch_data_from_influxdb()
+    analyze_smoothness(data, smoothness)
+    # Only the line data changes, the figure itself is kept
+    smoothness_df = smoothness.rows()
+    plot.update(smoothness_df['timestamp'], smoothness_df['accel_magnitude'], smoothness_df['is_smooth'])
+    return {
+        "avg_accel": smoothness.avg_magnitude(),
+        "smooth_percentage": smoothness.smooth_percentage(),
+        "plot_png": plot.to_png(),
+    }
+
+@st.cache_resource
+def get_live_poller():
+    """One poller, one figure and one set of running aggregates per server process."""
+    plot = SmoothnessPlot()
+    smoothness = RunningSmoothness(smooth_threshold=0.5)
+    return SharedPoller(lambda: poll_analysis(plot, smoothness), REFRESH_INTERVAL, name="smoothness-poller")
 
 # Streamlit configuration
 st.set_page_config(page_title="Smoothness Analysis", page_icon="📈")
@@ -62,49 +74,49 @@ st.title("Smoothness Analysis for Kendo Movements")
 if "is_running" not in st.session_state:
     st.session_state.is_running = False
 
+# Lease id for the shared poller
+if "poller_session" not in st.session_state:
+    st.session_state.poller_session = uuid.uuid4().hex
+
 # Start/Stop Button
 if st.button("Start/Stop Analysis"):
     st.session_state.is_running = not st.session_state.is_running
+    if not st.session_state.is_running:
+        get_live_poller().unsubscribe(st.session_state.poller_session)
 
 # Display current status
 status = "Running" if st.session_state.is_running else "Stopped"
 st.write(f"Status: **{status}**")
 
-# Metrics
-col1, col2 = st.columns(2)
-with col1:
-    avg_accel_metric = st.metric("Avg Acceleration (m/s²)", "0.00")
-with col2:
-    smoothness_metric = st.metric("Smooth Movements (%)", "0.00%")
+# Live section: only this fragment reruns every REFRESH_INTERVAL while running
+@st.fragment(run_every=REFRESH_INTERVAL if st.session_state.is_running else None)
+def live_analysis():
+    # Metrics
+    col1, col2 = st.columns(2)
+    with col1:
+        avg_accel_metric = st.empty()
+    with col2:
+        smoothness_metric = st.empty()
 
-# Plot placeholder
-plot_placeholder = st.empty()
+    if not st.session_state.is_running:
+        avg_accel_metric.metric("Avg Acceleration (m/s²)", "0.00")
+        smoothness_metric.metric("Smooth Movements (%)", "0.00%")
+        return
+
+    # Latest shared analysis
+    poller = get_live_poller()
+    snapshot = poller.subscribe(st.session_state.poller_session, timeout=REFRESH_INTERVAL)
+    if poller.last_error is not None:
+        st.error(f"Error fetching data from InfluxDB: {poller.last_error}")
+    if snapshot is None:
+        return
+    analysis = snapshot.value
 
-# Main loop
-while st.session_state.is_running:
-    # Fetch data
-    data = fetch_data_from_influxdb()
-    
-    # Analyze smoothness
-    smoothness_df = analyze_smoothness(data)
-    
     # Update metrics
-    avg_accel = smoothness_df['accel_magnitude'].mean()
-    smooth_percentage = smoothness_df['is_smooth'].mean() * 100
-    
-    avg_accel_metric.metric("Avg Acceleration (m/s²)", f"{avg_accel:.2f}")
-    smoothness_metric.metric("Smooth Movements (%)", f"{smooth_percentage:.2f}%")
-    
-    # Plot results
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(smoothness_df['timestamp'], smoothness_df['accel_magnitude'], label='Acceleration Magnitude')
-    ax.scatter(smoothness_df['timestamp'], smoothness_df['is_smooth'], color='red', label='Smoothness', alpha=0.6)
-    ax.set_xlabel('Timestamp')
-    ax.set_ylabel('Acceleration Magnitude')
-    ax.set_title('Smoothness Analysis')
-    ax.legend()
-    ax.grid()
-    plot_placeholder.pyplot(fig)
-    
-    # Refresh interval
-    time.sleep(0.5)
+    avg_accel_metric.metric("Avg Acceleration (m/s²)", f"{analysis['avg_accel']:.2f}")
+    smoothness_metric.metric("Smooth Movements (%)", f"{analysis['smooth_percentage']:.2f}%")
+
+    # Plot results, rendered once by the poller
+    st.image(analysis["plot_png"])
+
+live_analysis()
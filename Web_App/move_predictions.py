@@ -0,0 +1,52 @@
+import pandas as pd
+
+# Written by the predictor (Cloud_Computing/prediction_publisher.py): one point per
+# classified window at the window's last sample, tagged with sensor and model_version,
+# with the label in `move` and the window's first sample (ns) in `window_start`
+PREDICTIONS_MEASUREMENT = "move_predictions"
+PREDICTIONS_RANGE = "-30s"  # Older predictions are stale; the predictor is probably down
+
+def latest_predictions_flux(bucket, sensors, start=PREDICTIONS_RANGE):
+    """
+    Flux for the newest prediction of each sensor (no yield, so it can be part of a
+    larger query).
+    """
+    sensor_filter = " or ".join(f'r["sensor"] == "{sensor}"' for sensor in sensors)
+    return f'''
+    from(bucket: "{bucket}")
+      |> range(start: {start})
+      |> filter(fn: (r) => r["_measurement"] == "{PREDICTIONS_MEASUREMENT}")
+      |> filter(fn: (r) => {sensor_filter})
+      |> last()
+      |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+    '''
+
+def latest_predictions(rows):
+    """
+    {sensor: {"move", "model_version", "window_start", "window_end"}} from the rows
+    of latest_predictions_flux(), keeping the newest row of each sensor.
+    """
+    if rows.empty or "move" not in rows:
+        return {}
+    rows = rows.dropna(subset=["move"]).copy()
+    rows["_time"] = pd.to_datetime(rows["_time"])
+    predictions = {}
+    for _, row in rows.sort_values("_time").groupby("sensor").tail(1).iterrows():
+        window_end = row["_time"]
+        window_start = row.get("window_start")
+        predictions[row["sensor"]] = {
+            "move": row["move"],
+            "model_version": row.get("model_version"),
+            "window_start": pd.Timestamp(int(window_start), tz="UTC") if pd.notna(window_start) else window_end,
+            "window_end": window_end,
+        }
+    return predictions
+
+def fetch_latest_predictions(query_api, bucket, sensors, start=PREDICTIONS_RANGE):
+    """
+    Newest prediction of each of `sensors`; sensors without a recent one are left out.
+    """
+    rows = query_api.query_data_frame(latest_predictions_flux(bucket, sensors, start))
+    if isinstance(rows, list):
+        rows = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+    return latest_predictions(rows)
@@ -2,19 +2,15 @@
 # streamlit run environment_dashboard.py
 import streamlit as st
 import pandas as pd
-from influxdb_client import InfluxDBClient
 from datetime import datetime
-import time
+import uuid
 
-from SecretsManager import get_secret
+from live_poller import SharedPoller
+from resources import get_influx_client
 
-# InfluxDB configurations
-secret_data = get_secret('kendo-line-bot-secret')
-
-INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
-INFLUXDB_TOKEN = secret_data.get('InfluxDB_Token')
-INFLUXDB_ORG = secret_data.get('InfluxDB_organisation')
+# InfluxDB configurations (the client itself is shared, see resources.py)
 INFLUXDB_BUCKET = "environment_data"
+REFRESH_INTERVAL = 1  # Seconds between refreshes of the live metrics
 
 # Streamlit page configuration
 st.set_page_config(page_title="Environment Dashboard", page_icon="🌍")
@@ -23,12 +19,10 @@ st.set_page_config(page_title="Environment Dashboard", page_icon="🌍")
 st.title("Environment Dashboard")
 st.write("Real-time monitoring of environment data.")
 
-# Initialize InfluxDB client
-client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-
 def fetch_latest_data():
     """
     Fetch the latest environment data from InfluxDB.
+    Runs on the shared poller thread; errors are reported by the poller.
     """
     query = f'''
     from(bucket: "{INFLUXDB_BUCKET}")
@@ -38,19 +32,20 @@ def fetch_latest_data():
       |> sort(columns: ["_time"], desc: true)
       |> limit(n: 1)
     '''
-    try:
-        query_api = client.query_api()
-        tables = query_api.query(query)
-        if tables:
-            records = [record.values for table in tables for record in table.records]
-            if records:
-                return pd.DataFrame(records)
-    except Exception as e:
-        st.error(f"Error fetching data from InfluxDB: {e}")
+    query_api = get_influx_client().query_api()
+    tables = query_api.query(query)
+    if tables:
+        records = [record.values for table in tables for record in table.records]
+        if records:
+            return pd.DataFrame(records)
     return pd.DataFrame()
 
-# Metrics Section
-col1, col2, col3 = st.columns(3)
+@st.cache_resource
+def get_live_poller():
+    """
+    One poller per server process: every open tab reads the same snapshot.
+    """
+    return SharedPoller(fetch_latest_data, REFRESH_INTERVAL, name="environment-poller")
 
 # Main Loop
 if "is_running" not in st.session_state:
@@ -59,14 +54,32 @@ if "is_running" not in st.session_state:
 if "last_updated" not in st.session_state:
     st.session_state.last_updated = None
 
+# Lease id for the shared poller
+if "poller_session" not in st.session_state:
+    st.session_state.poller_session = uuid.uuid4().hex
+
 if st.button("Start/Stop"):
     st.session_state.is_running = not st.session_state.is_running
+    if not st.session_state.is_running:
+        get_live_poller().unsubscribe(st.session_state.poller_session)
 
 status = "Running" if st.session_state.is_running else "Stopped"
 st.write(f"Status: **{status}**")
 
-while st.session_state.is_running:
-    data = fetch_latest_data()
+# Only this fragment reruns every REFRESH_INTERVAL while running, not the whole page
+@st.fragment(run_every=REFRESH_INTERVAL if st.session_state.is_running else None)
+def live_environment():
+    if not st.session_state.is_running:
+        return
+
+    poller = get_live_poller()
+    snapshot = poller.subscribe(st.session_state.poller_session, timeout=REFRESH_INTERVAL)
+    if poller.last_error is not None:
+        st.error(f"Error fetching data from InfluxDB: {poller.last_error}")
+    data = snapshot.value if snapshot is not None else pd.DataFrame()
+
+    # Metrics Section
+    col1, col2, col3 = st.columns(3)
 
     if not data.empty:
         # Parse the latest data
@@ -94,5 +107,4 @@ while st.session_state.is_running:
     # Display last updated time
     st.write(f"Last updated: {st.session_state.last_updated}")
 
-    # Refresh interval
-    time.sleep(1)
+live_environment()
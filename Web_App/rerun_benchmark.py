@@ -0,0 +1,101 @@
+"""
+Rerun cost benchmark for the Streamlit pages.
+
+Runs a page with Streamlit's AppTest harness and reruns it repeatedly, as a
+button press does, counting the external work each rerun triggers: Secrets
+Manager calls, pickle loads and InfluxDB clients created. Secrets Manager is
+replaced by an in-process fake with configurable latency, so no AWS access is
+needed. The current pages load no model at all; pickle loads are only counted
+if joblib is installed (e.g. for older pages).
+
+    python rerun_benchmark.py --reruns 20
+    python rerun_benchmark.py --script /tmp/app_before.py   # e.g. a page from an older commit
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+import boto3
+from influxdb_client import InfluxDBClient
+from streamlit.testing.v1 import AppTest
+
+try:
+    import joblib
+except ImportError:  # Not a dashboard dependency since the pages stopped loading the model
+    joblib = None
+
+WEB_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_SECRET = {"InfluxDB_Token": "token", "InfluxDB_organisation": "org", "esp32cam_link": "http://camera.local/"}
+
+class Counters:
+    def __init__(self):
+        self.secrets = self.pickles = self.clients = 0
+
+class FakeSecretsManager:
+    def __init__(self, counters, latency):
+        self.counters = counters
+        self.latency = latency
+
+    def get_secret_value(self, SecretId):
+        self.counters.secrets += 1
+        time.sleep(self.latency)
+        return {"SecretString": json.dumps(FAKE_SECRET)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default=os.path.join(WEB_APP_DIR, "app.py"), help="Streamlit page to run")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns after the first run")
+    parser.add_argument("--secret-latency-ms", type=float, default=80.0, help="Simulated Secrets Manager round trip")
+    args = parser.parse_args()
+    script = os.path.abspath(args.script)
+
+    counters = Counters()
+    real_init = InfluxDBClient.__init__
+
+    def counting_load(*load_args, **kwargs):
+        counters.pickles += 1
+        return real_load(*load_args, **kwargs)
+
+    def counting_init(self, *init_args, **kwargs):
+        counters.clients += 1
+        real_init(self, *init_args, **kwargs)
+
+    fake_client = FakeSecretsManager(counters, args.secret_latency_ms / 1000)
+    # Older pages load the pickles relative to the repository root
+    os.chdir(os.path.dirname(WEB_APP_DIR))
+    sys.path.insert(0, WEB_APP_DIR)
+
+    with ExitStack() as patches:
+        patches.enter_context(mock.patch.object(boto3, "client", lambda *a, **k: fake_client))
+        patches.enter_context(mock.patch.object(InfluxDBClient, "__init__", counting_init))
+        if joblib is not None:
+            real_load = joblib.load
+            patches.enter_context(mock.patch.object(joblib, "load", counting_load))
+        app = AppTest.from_file(script, default_timeout=60)
+        rows = []
+        for run in range(args.reruns + 1):
+            before = (counters.secrets, counters.pickles, counters.clients)
+            start = time.perf_counter()
+            app.run()
+            elapsed = (time.perf_counter() - start) * 1000
+            if app.exception:
+                raise SystemExit(f"Page raised: {app.exception[0].message}")
+            rows.append((elapsed, counters.secrets - before[0], counters.pickles - before[1],
+                         counters.clients - before[2]))
+
+    print(f"{args.script}: first run + {args.reruns} reruns")
+    print(f"{'':>12} {'ms':>8} {'secrets':>8} {'pickles':>8} {'clients':>8}")
+    print(f"{'first run':>12} {rows[0][0]:>8.1f} {rows[0][1]:>8} {rows[0][2]:>8} {rows[0][3]:>8}")
+    reruns = rows[1:]
+    if reruns:
+        print(f"{'rerun p50':>12} {statistics.median(r[0] for r in reruns):>8.1f} "
+              f"{sum(r[1] for r in reruns) / len(reruns):>8.1f} {sum(r[2] for r in reruns) / len(reruns):>8.1f} "
+              f"{sum(r[3] for r in reruns) / len(reruns):>8.1f}   (counts are per rerun)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import streamlit as st
+from influxdb_client import InfluxDBClient
+
+from SecretsManager import get_secret
+
+# Shared, process-wide resources for the Streamlit pages.
+# Streamlit re-executes a page's top level on every rerun; everything here is
+# created lazily on first use and then reused by all reruns and sessions until
+# invalidate_resources() is called.
+
+SECRET_NAME = 'kendo-line-bot-secret'
+INFLUXDB_URL = "https://us-east-1-1.aws.cloud2.influxdata.com"
+
+# No model here: the pages read the predictor's published predictions (move_predictions.py)
+
+# The client get_influx_client() created, so invalidate_resources() can close it;
+# st.cache_resource can only drop it
+_influx_clients = []
+
+@st.cache_resource(show_spinner=False)
+def get_secret_data():
+    """
+    The app secrets from AWS Secrets Manager, fetched once.
+    """
+    return get_secret(SECRET_NAME)
+
+@st.cache_resource(show_spinner=False)
+def get_influx_client():
+    """
+    One InfluxDB client (and its connection pool) shared by every page and session.
+    """
+    secret_data = get_secret_data()
+    client = InfluxDBClient(url=INFLUXDB_URL,
+                            token=secret_data.get('InfluxDB_Token'),
+                            org=secret_data.get('InfluxDB_organisation'))
+    _influx_clients.append(client)
+    return client
+
+def invalidate_resources():
+    """
+    Drop the cached secrets and client, e.g. after a secret rotation. They are
+    recreated on next use. The old client is closed, releasing its connection pool
+    and any write threads, once it is out of the cache.
+    """
+    old_clients = list(_influx_clients)
+    get_influx_client.clear()
+    get_secret_data.clear()
+    for client in old_clients:
+        _influx_clients.remove(client)
+        try:
+            client.close()
+        except Exception as e:
+            print(f"Error closing the InfluxDB client: {e}")
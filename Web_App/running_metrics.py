@@ -0,0 +1,224 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+ACCEL_AXES = ["accelX", "accelY", "accelZ"]
+
+class _SlidingWindow:
+    """
+    Rows of a time window that slides forward with every poll. Only rows newer
+    than the last one seen are added, and rows older than the window start are
+    evicted; subclasses keep their aggregates in step in _add()/_evict().
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.times = deque()
+        self.last_time = None
+
+    def update(self, frame, window_start=None, times=None):
+        """
+        Add the rows of `frame` newer than the last update and evict the rows before
+        `window_start` (default: the first row of `frame`, i.e. the frame is the
+        whole current window). Row times come from the index unless `times` is given.
+        Neither the frame nor its columns are modified.
+        """
+        times = pd.DatetimeIndex(frame.index if times is None else times)
+        if window_start is None and len(times):
+            window_start = times[0]
+        if self.last_time is not None and len(times):
+            first_new = times.searchsorted(self.last_time, side="right")
+            frame, times = frame.iloc[first_new:], times[first_new:]
+        if len(times):
+            self._add(frame, times)
+            self.times.extend(times)
+            self.last_time = times[-1]
+        if window_start is not None:
+            while self.times and self.times[0] < window_start:
+                self.times.popleft()
+                self._evict()
+        return self
+
+    def __len__(self):
+        return len(self.times)
+
+class RunningMean(_SlidingWindow):
+    """
+    Per-column mean over the window, skipping NaN like DataFrame.mean().
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.values = deque()
+        self.sums = np.zeros(len(self.columns))
+        self.counts = np.zeros(len(self.columns), dtype=int)
+
+    def _add(self, frame, times):
+        values = np.column_stack([frame[column].to_numpy(dtype=float) for column in self.columns])
+        present = ~np.isnan(values)
+        self.sums += np.where(present, values, 0.0).sum(axis=0)
+        self.counts += present.sum(axis=0)
+        self.values.extend(values)
+
+    def _evict(self):
+        row = self.values.popleft()
+        present = ~np.isnan(row)
+        self.sums -= np.where(present, row, 0.0)
+        self.counts -= present
+        if not self.values:
+            self.sums[:] = 0.0
+
+    def means(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(np.where(self.counts > 0, self.sums / np.maximum(self.counts, 1), np.nan),
+                             index=self.columns)
+
+class RunningSmoothness(_SlidingWindow):
+    """
+    Acceleration magnitude, jerk and smooth percentage over the window, updated
+    only with the samples that arrived since the last poll.
+
+    jerk is the first difference of the magnitude over the time step, and a
+    sample is smooth when |jerk| < smooth_threshold. The window's first sample
+    has no predecessor; `fill_jerk` sets what it (and any NaN difference) counts as:
+      - 0.0:  jerk 0 and smooth, as in app.py (diff().fillna(0))
+      - None: jerk NaN and not smooth, as in move_analysis.py (plain diff())
+    Results are identical to recomputing over the whole window every poll.
+    """
+
+    def __init__(self, smooth_threshold=0.5, fill_jerk=None, axes=ACCEL_AXES):
+        self.smooth_threshold = smooth_threshold
+        self.fill_jerk = fill_jerk
+        self.axes = list(axes)
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.magnitude = deque()
+        self.jerk = deque()
+        self.smooth = deque()
+        # Aggregates over all rows held, each row's jerk taken against its predecessor
+        self.magnitude_sum = 0.0
+        self.magnitude_count = 0
+        self.jerk_sum = 0.0  # finite jerks only; infinities are counted separately
+        self.jerk_count = 0
+        self.jerk_pos_inf = 0
+        self.jerk_neg_inf = 0
+        self.smooth_count = 0
+        self._changes = 0
+
+    def _add(self, frame, times):
+        values = np.column_stack([frame[axis].to_numpy(dtype=float) for axis in self.axes])
+        magnitude = np.sqrt((values**2).sum(axis=1))
+        previous_magnitude = self.magnitude[-1] if self.magnitude else np.nan
+        diff = np.diff(magnitude, prepend=previous_magnitude)
+        first_dt = (times[0] - self.last_time).total_seconds() if self.last_time is not None else np.nan
+        dt = np.concatenate([[first_dt], np.diff(times.as_unit("ns").asi8) / 1e9])
+        if self.fill_jerk is not None:
+            diff = np.where(np.isnan(diff), self.fill_jerk, diff)
+            dt = np.where(np.isnan(dt), 1.0, dt)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            jerk = diff / dt
+        smooth = np.abs(jerk) < self.smooth_threshold
+
+        for m, j, s in zip(magnitude, jerk, smooth):
+            self._count(m, j, s, 1)
+        self.magnitude.extend(magnitude)
+        self.jerk.extend(jerk)
+        self.smooth.extend(smooth)
+
+    def _evict(self):
+        self._count(self.magnitude.popleft(), self.jerk.popleft(), self.smooth.popleft(), -1)
+        self._changes += 1
+        if self._changes > max(len(self.jerk), 1000):
+            self._resync()
+
+    def _count(self, magnitude, jerk, smooth, sign):
+        if not math.isnan(magnitude):
+            self.magnitude_sum += sign * magnitude
+            self.magnitude_count += sign
+        if math.isinf(jerk):
+            if jerk > 0:
+                self.jerk_pos_inf += sign
+            else:
+                self.jerk_neg_inf += sign
+        elif not math.isnan(jerk):
+            self.jerk_sum += sign * jerk
+            self.jerk_count += sign
+        self.smooth_count += sign * bool(smooth)
+
+    def _resync(self):
+        # Recompute the running sums exactly so float error can't build up over a long session
+        magnitude = np.array(self.magnitude, dtype=float)
+        jerk = np.array(self.jerk, dtype=float)
+        finite = np.isfinite(jerk)
+        self.magnitude_sum = math.fsum(magnitude[~np.isnan(magnitude)])
+        self.jerk_sum = math.fsum(jerk[finite])
+        self._changes = 0
+
+    def _head(self):
+        """
+        Stored and window-start values of the first row: (jerk, smooth) as
+        stored, and as the definitions count them for the window's first sample.
+        """
+        first_jerk = np.nan if self.fill_jerk is None else self.fill_jerk
+        return self.jerk[0], self.smooth[0], first_jerk, abs(first_jerk) < self.smooth_threshold
+
+    def avg_magnitude(self):
+        """
+        Mean acceleration magnitude (NaN if there is none).
+        """
+        return self.magnitude_sum / self.magnitude_count if self.magnitude_count else np.nan
+
+    def mean_jerk(self):
+        """
+        Mean signed jerk, skipping NaN like Series.mean().
+        """
+        if not self.jerk:
+            return np.nan
+        stored_jerk, _, first_jerk, _ = self._head()
+        total, count = self.jerk_sum, self.jerk_count
+        pos_inf, neg_inf = self.jerk_pos_inf, self.jerk_neg_inf
+        # Swap the head's stored jerk for the window-start value
+        for jerk, sign in ((stored_jerk, -1), (first_jerk, 1)):
+            if math.isinf(jerk):
+                pos_inf += sign * (jerk > 0)
+                neg_inf += sign * (jerk < 0)
+            elif not math.isnan(jerk):
+                total += sign * jerk
+                count += sign
+        if pos_inf and neg_inf:
+            return np.nan
+        if pos_inf or neg_inf:
+            return np.inf if pos_inf else -np.inf
+        return total / count if count else np.nan
+
+    def smooth_percentage(self):
+        """
+        Share of smooth samples in the window, in percent (0 when empty).
+        """
+        if not self.smooth:
+            return 0
+        _, stored_smooth, _, first_smooth = self._head()
+        smooth_count = self.smooth_count - bool(stored_smooth) + bool(first_smooth)
+        return smooth_count / len(self.smooth) * 100
+
+    def rows(self):
+        """
+        The window as a new DataFrame: timestamp, accel_magnitude, jerk, is_smooth.
+        """
+        jerk = np.array(self.jerk, dtype=float)
+        smooth = np.array(self.smooth, dtype=bool)
+        if len(jerk):
+            _, _, jerk[0], smooth[0] = self._head()
+        return pd.DataFrame({"timestamp": pd.DatetimeIndex(list(self.times)),
+                             "accel_magnitude": np.array(self.magnitude, dtype=float),
+                             "jerk": jerk, "is_smooth": smooth})
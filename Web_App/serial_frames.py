@@ -0,0 +1,193 @@
+import binascii
+import json
+import struct
+
+# Binary environment frame (little endian), CRC-16/CCITT-FALSE appended, then COBS encoded
+# and terminated by a 0x00 byte:
+#   type    uint8   FRAME_ENVIRONMENT
+#   seq     uint16  increments every frame, lets the gateway count drops
+#   flags   uint8   FLAG_* bits below
+#   mic     uint8   0/1
+#   temp    int16   centi-degrees C
+#   hum     uint16  centi-percent RH
+ENV_FRAME = struct.Struct('<BHBBhH')
+CRC = struct.Struct('<H')
+FRAME_ENVIRONMENT = 0x01
+
+FLAG_ERROR = 0x01
+FLAG_TEMPERATURE = 0x02
+FLAG_HUMIDITY = 0x04
+
+FRAME_DELIMITER = b'\x00'
+
+# Undecided link: bytes kept while waiting for a record to tell the format from
+MAX_DETECT_BYTES = 1024
+
+def crc16(data):
+    """
+    CRC-16/CCITT-FALSE, computed in C by binascii.
+    """
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def cobs_encode(data):
+    """
+    Consistent Overhead Byte Stuffing: removes every 0x00 so it can delimit frames.
+    """
+    out = bytearray()
+    for block in data.split(b'\x00'):
+        # Blocks longer than 254 bytes are split with an extra 0xFF code
+        while len(block) >= 0xFE:
+            out.append(0xFF)
+            out += block[:0xFE]
+            block = block[0xFE:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+def cobs_decode(data):
+    """
+    Inverse of cobs_encode. Raises ValueError on a malformed frame.
+    """
+    out = bytearray()
+    i = 0
+    length = len(data)
+    while i < length:
+        code = data[i]
+        if code == 0 or i + code > length:
+            raise ValueError("Malformed COBS frame")
+        out += data[i + 1:i + code]
+        i += code
+        if code != 0xFF and i < length:
+            out.append(0)
+    return bytes(out)
+
+def encode_environment_frame(seq, mic, temperature=None, humidity=None, error=False):
+    """
+    Build one delimited frame, as the sensor firmware sends it.
+    """
+    flags = FLAG_ERROR if error else 0
+    if temperature is not None:
+        flags |= FLAG_TEMPERATURE
+    if humidity is not None:
+        flags |= FLAG_HUMIDITY
+    payload = ENV_FRAME.pack(FRAME_ENVIRONMENT, seq & 0xFFFF, flags, int(mic),
+                             round((temperature or 0) * 100), round((humidity or 0) * 100))
+    return cobs_encode(payload + CRC.pack(crc16(payload))) + FRAME_DELIMITER
+
+def environment_record(payload):
+    """
+    Turn a decoded environment payload into the same dict the JSON sensor sends.
+    """
+    _, seq, flags, mic, temperature, humidity = ENV_FRAME.unpack(payload)
+    if flags & FLAG_ERROR:
+        return {"error": "sensor reported a read failure", "seq": seq}
+    return {
+        "seq": seq,
+        "mic": mic,
+        "temperature": temperature / 100 if flags & FLAG_TEMPERATURE else None,
+        "humidity": humidity / 100 if flags & FLAG_HUMIDITY else None,
+    }
+
+class FrameDecoder:
+    """
+    Decode everything available in the serial read buffer in one call.
+
+    The link format is detected from the first complete record: 0x00-delimited
+    binary frames, or newline-delimited JSON from older sensor firmware.
+    """
+
+    def __init__(self, mode="auto"):
+        self.mode = None if mode == "auto" else mode
+        self.buffer = b""
+        self.frames = 0
+        self.crc_errors = 0
+        self.parse_errors = 0
+        self.dropped = 0
+        self.last_seq = None
+
+    def clear(self):
+        """
+        Drop any partial frame, e.g. after the serial port reconnects.
+        """
+        self.buffer = b""
+        self.last_seq = None
+
+    def detect(self):
+        """
+        Decide the link format once there is enough data to tell.
+        JSON text never contains 0x00, and binary frames never start with '{'.
+        A port opened mid-record starts with the tail of a line, so complete lines
+        that aren't JSON objects are dropped until one is.
+        """
+        if FRAME_DELIMITER in self.buffer:
+            self.mode = "binary"
+            return
+        while b"\n" in self.buffer:
+            line, rest = self.buffer.split(b"\n", 1)
+            if line.strip().startswith(b"{"):
+                self.mode = "json"
+                return
+            self.buffer = rest
+        # Noise without a record boundary: don't let it grow without bound
+        self.buffer = self.buffer[-MAX_DETECT_BYTES:]
+
+    def feed(self, data):
+        """
+        Append bytes from the serial port and return every complete record as a dict.
+        """
+        self.buffer += data
+        if self.mode is None:
+            self.detect()
+            if self.mode is None:
+                return []
+        if self.mode == "binary":
+            return self._decode_binary()
+        return self._decode_json()
+
+    def _decode_binary(self):
+        *chunks, self.buffer = self.buffer.split(FRAME_DELIMITER)
+        records = []
+        for chunk in chunks:
+            if not chunk:
+                continue
+            try:
+                frame = cobs_decode(chunk)
+            except ValueError:
+                self.parse_errors += 1
+                continue
+            if len(frame) != ENV_FRAME.size + CRC.size or frame[0] != FRAME_ENVIRONMENT:
+                self.parse_errors += 1
+                continue
+            payload = frame[:ENV_FRAME.size]
+            if crc16(payload) != CRC.unpack_from(frame, ENV_FRAME.size)[0]:
+                self.crc_errors += 1
+                continue
+            record = environment_record(payload)
+            self._track_seq(record["seq"])
+            records.append(record)
+        self.frames += len(records)
+        return records
+
+    def _decode_json(self):
+        *lines, self.buffer = self.buffer.split(b"\n")
+        records = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                self.parse_errors += 1
+                continue
+            if not isinstance(record, dict):
+                self.parse_errors += 1
+                continue
+            records.append(record)
+        self.frames += len(records)
+        return records
+
+    def _track_seq(self, seq):
+        if self.last_seq is not None:
+            self.dropped += (seq - self.last_seq - 1) & 0xFFFF
+        self.last_seq = seq
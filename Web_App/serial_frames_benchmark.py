@@ -0,0 +1,54 @@
+"""
+Decode throughput of the environment sensor link (serial_frames.FrameDecoder).
+
+Compares binary COBS frames against the JSON lines the sensor used to send,
+feeding the decoder in serial-read-sized chunks.
+
+    python serial_frames_benchmark.py --frames 200000 --chunk 4096
+"""
+import argparse
+import json
+import random
+import time
+
+from serial_frames import FrameDecoder, encode_environment_frame
+
+def binary_stream(frames, rng):
+    return b"".join(encode_environment_frame(seq, rng.randint(0, 1), rng.uniform(15, 30), rng.uniform(30, 70))
+                    for seq in range(frames))
+
+def json_stream(frames, rng):
+    return b"".join((json.dumps({"mic": rng.randint(0, 1),
+                                 "temperature": round(rng.uniform(15, 30), 2),
+                                 "humidity": round(rng.uniform(30, 70), 2)}) + "\n").encode("utf-8")
+                    for _ in range(frames))
+
+def decode(stream, chunk_size):
+    """
+    Returns (frames decoded, seconds).
+    """
+    decoder = FrameDecoder()
+    start = time.perf_counter()
+    decoded = 0
+    for offset in range(0, len(stream), chunk_size):
+        decoded += len(decoder.feed(stream[offset:offset + chunk_size]))
+    return decoded, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes per serial read")
+    parser.add_argument("--baud", type=int, default=9600, help="link speed used for the frames-per-second ceiling")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for name, stream in (("binary", binary_stream(args.frames, rng)), ("json", json_stream(args.frames, rng))):
+        decoded, seconds = decode(stream, args.chunk)
+        bytes_per_frame = len(stream) / args.frames
+        # 8N1 framing: 10 bits on the wire per byte
+        link_ceiling = args.baud / 10 / bytes_per_frame
+        print(f"{name:>6}: {decoded / seconds:,.0f} frames/s decoded, "
+              f"{bytes_per_frame:.1f} B/frame, {link_ceiling:,.0f} frames/s max at {args.baud} baud")
+
+if __name__ == "__main__":
+    main()
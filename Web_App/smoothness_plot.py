@@ -0,0 +1,61 @@
+import io
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+MAX_PLOT_POINTS = 2000  # Points drawn per refresh; longer series are decimated
+
+class SmoothnessPlot:
+    """
+    Persistent acceleration/smoothness figure for the live analysis.
+
+    The figure, axes and artists are built once; each refresh only swaps the
+    line and scatter data. The Figure is created without pyplot, so it is never
+    registered in pyplot's global figure list and is freed with its owner.
+    """
+
+    def __init__(self, max_points=MAX_PLOT_POINTS):
+        self.max_points = max_points
+        self.fig = Figure(figsize=(10, 6))
+        self.ax = self.fig.subplots()
+        self.line, = self.ax.plot([], [], label='Acceleration Magnitude')
+        self.scatter = self.ax.scatter([], [], color='red', label='Smoothness', alpha=0.6)
+        self.ax.xaxis_date()
+        self.ax.set_xlabel('Timestamp')
+        self.ax.set_ylabel('Acceleration Magnitude')
+        self.ax.set_title('Smoothness Analysis')
+        self.ax.legend()
+        self.ax.grid()
+
+    def update(self, timestamps, accel_magnitude, is_smooth):
+        """
+        Replace the plotted data and return the figure, ready for st.pyplot.
+        """
+        # InfluxDB timestamps are tz-aware; matplotlib wants plain UTC datetime64
+        x = mdates.date2num(pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True)).tz_convert(None).to_numpy())
+        magnitude = np.asarray(accel_magnitude, dtype=float)
+        smooth = np.asarray(is_smooth, dtype=float)
+
+        # Never draw more than max_points, however long the window is
+        step = max(-(-len(x) // self.max_points), 1)
+        x, magnitude, smooth = x[::step], magnitude[::step], smooth[::step]
+
+        self.line.set_data(x, magnitude)
+        self.scatter.set_offsets(np.column_stack([x, smooth]))
+
+        # relim() only looks at lines, so include the 0/1 smoothness markers by hand
+        self.ax.relim()
+        if len(x):
+            self.ax.update_datalim(np.column_stack([x, smooth]))
+        self.ax.autoscale_view()
+        return self.fig
+
+    def to_png(self, dpi=200):
+        """
+        Render the current figure to PNG bytes (same settings as st.pyplot).
+        """
+        image = io.BytesIO()
+        self.fig.savefig(image, format="png", bbox_inches="tight", dpi=dpi)
+        return image.getvalue()
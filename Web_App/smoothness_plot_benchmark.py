@@ -0,0 +1,120 @@
+"""
+Memory benchmark for the live plot in move_analysis.py.
+
+Simulates the dashboard refreshing every REFRESH_INTERVAL for an hour (7200
+refreshes at 0.5 s): each tick builds a fresh 3-minute window of 100 Hz IMU
+data, updates the persistent SmoothnessPlot and renders it to PNG the way
+st.pyplot does. Resident memory, the number of live figures and the time per
+refresh are sampled along the way, and the growth after the warm-up is
+reported. The short pass/fail version runs with the tests
+(tests/test_smoothness_plot.py).
+
+    python smoothness_plot_benchmark.py                       # one simulated hour
+    python smoothness_plot_benchmark.py --refreshes 600 --legacy   # old plt.subplots path, for comparison
+"""
+import argparse
+import gc
+import io
+import os
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from smoothness_plot import SmoothnessPlot
+
+SAMPLE_RATE_HZ = 100
+WINDOW_SECONDS = 180  # move_analysis queries range(start: -3m)
+REFRESH_INTERVAL = 0.5
+
+def rss_mb():
+    """
+    Current resident set size of this process in MB.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+
+def live_figures():
+    return sum(isinstance(obj, Figure) for obj in gc.get_objects())
+
+def window_at(tick, rng):
+    """
+    The 3-minute query result the dashboard would see at refresh `tick`.
+    """
+    rows = WINDOW_SECONDS * SAMPLE_RATE_HZ
+    end = pd.Timestamp("2024-01-01", tz="UTC") + pd.Timedelta(seconds=tick * REFRESH_INTERVAL)
+    timestamps = pd.date_range(end=end, periods=rows, freq=f"{1000 // SAMPLE_RATE_HZ}ms")
+    phase = np.arange(rows) / SAMPLE_RATE_HZ + tick * REFRESH_INTERVAL
+    data = pd.DataFrame({"timestamp": timestamps,
+                         "accelX": np.sin(phase * 3) + rng.normal(0, 0.05, rows),
+                         "accelY": np.cos(phase * 2) + rng.normal(0, 0.05, rows),
+                         "accelZ": 1 + rng.normal(0, 0.05, rows)})
+    # Same definitions as RunningSmoothness (running_metrics.py), recomputed over the whole window
+    data['accel_magnitude'] = np.sqrt(data['accelX']**2 + data['accelY']**2 + data['accelZ']**2)
+    data['jerk'] = data['accel_magnitude'].diff() / data['timestamp'].diff().dt.total_seconds()
+    data['is_smooth'] = data['jerk'].abs() < 0.5
+    return data
+
+def legacy_figure(data):
+    """
+    What move_analysis.py used to do on every refresh: a new pyplot figure, never closed.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(data['timestamp'], data['accel_magnitude'], label='Acceleration Magnitude')
+    ax.scatter(data['timestamp'], data['is_smooth'], color='red', label='Smoothness', alpha=0.6)
+    ax.legend()
+    ax.grid()
+    return fig
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--refreshes", type=int, default=7200, help="Refreshes to simulate (7200 = one hour at 0.5 s)")
+    parser.add_argument("--dpi", type=int, default=100, help="DPI used when rendering each refresh")
+    parser.add_argument("--warmup", type=float, default=0.1, help="Fraction of the run ignored before measuring growth")
+    parser.add_argument("--legacy", action="store_true", help="Use the old figure-per-refresh code instead")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    plot = SmoothnessPlot()
+    report_every = max(args.refreshes // 20, 1)
+    warmup_tick = int(args.refreshes * args.warmup)
+    baseline = None
+
+    print(f"{'refresh':>8} {'sim time':>9} {'RSS MB':>8} {'figures':>8} {'ms/refresh':>11}")
+    start = time.perf_counter()
+    last_report, last_tick = start, 0
+    for tick in range(1, args.refreshes + 1):
+        data = window_at(tick, rng)
+        if args.legacy:
+            fig = legacy_figure(data)
+        else:
+            fig = plot.update(data['timestamp'], data['accel_magnitude'], data['is_smooth'])
+        fig.savefig(io.BytesIO(), format="png", dpi=args.dpi)
+        del data, fig
+
+        if tick == warmup_tick or (baseline is None and tick == args.refreshes):
+            gc.collect()
+            baseline = rss_mb()
+        if tick % report_every == 0 or tick == args.refreshes:
+            gc.collect()
+            now = time.perf_counter()
+            per_refresh = (now - last_report) * 1000 / (tick - last_tick)
+            last_report, last_tick = now, tick
+            sim_minutes = tick * REFRESH_INTERVAL / 60
+            print(f"{tick:>8} {sim_minutes:>7.1f} m {rss_mb():>8.1f} {live_figures():>8} {per_refresh:>11.1f}")
+
+    gc.collect()
+    growth = rss_mb() - baseline
+    print(f"\n{args.refreshes} refreshes in {time.perf_counter() - start:.0f} s, "
+          f"RSS growth after warm-up: {growth:+.1f} MB")
+
+if __name__ == "__main__":
+    main()
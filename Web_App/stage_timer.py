@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+TIMINGS_LOGGER = "kiai.timings"
+
+def json_logger(name=TIMINGS_LOGGER):
+    """
+    Logger that writes one JSON object per line to stderr. Set up once; further
+    calls (e.g. Streamlit reruns) return the same logger without adding handlers.
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+class StageTimer:
+    """
+    Rolling per-stage timings of a refresh cycle.
+
+    Wrap each cycle in cycle() and its steps in stage(); the last `window`
+    durations of every stage are kept for p50/p95/max. Stages are collected per
+    thread, so the poller thread and session threads can share one timer.
+
+    Structured logs (JSON lines on `logger`):
+      - "timings": the rolling summary, at most every `log_interval` seconds
+      - "slow_cycle": the stage breakdown of any cycle longer than `budget` seconds
+    """
+
+    def __init__(self, window=200, budget=None, log_interval=30.0, logger=None):
+        self.window = window
+        self.budget = budget
+        self.log_interval = log_interval
+        self.logger = logger or json_logger()
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_log = time.monotonic()
+
+    @contextmanager
+    def cycle(self, name):
+        self._local.stages = {}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            stages, self._local.stages = self._local.stages, None
+            self.record(f"{name}_total", total)
+            if self.budget is not None and total > self.budget:
+                self._log({"event": "slow_cycle", "cycle": name, "total_ms": round(total * 1000, 1),
+                           "budget_ms": round(self.budget * 1000, 1),
+                           "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in stages.items()}})
+            self._maybe_log_summary()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.record(name, elapsed)
+            stages = getattr(self._local, "stages", None)
+            if stages is not None:
+                stages[name] = stages.get(name, 0.0) + elapsed
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+            self._samples[name].append(seconds)
+
+    def summary(self):
+        """
+        {stage: {"n", "last_ms", "p50_ms", "p95_ms", "max_ms"}} over the rolling window.
+        """
+        with self._lock:
+            samples = {name: np.array(values) * 1000 for name, values in self._samples.items()}
+        return {name: {"n": len(values),
+                       "last_ms": round(float(values[-1]), 1),
+                       "p50_ms": round(float(np.percentile(values, 50)), 1),
+                       "p95_ms": round(float(np.percentile(values, 95)), 1),
+                       "max_ms": round(float(values.max()), 1)}
+                for name, values in samples.items() if len(values)}
+
+    def _maybe_log_summary(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_log < self.log_interval:
+                return
+            self._last_log = now
+        self._log({"event": "timings", "window": self.window, "stages": self.summary()})
+
+    def _log(self, record):
+        record["ts"] = round(time.time(), 3)
+        self.logger.info(json.dumps(record))
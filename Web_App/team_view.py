@@ -0,0 +1,135 @@
+# Install dependencies before running (streamlit, pandas, influxdb-client)
+# streamlit run team_view.py
+import streamlit as st
+import pandas as pd
+import numpy as np
+import uuid
+
+from live_poller import SharedPoller
+from move_predictions import latest_predictions, latest_predictions_flux
+from resources import get_influx_client
+
+INFLUXDB_BUCKET = "SIOT_Test"
+
+# Team positions from the LINE role menu (richobject/rolemenu.json), mapped to the
+# `sensor` tag each player's IMU is uploaded with (see SENSOR_PORTS in imu_upload.py)
+TEAM_SENSORS = {
+    "Sempo": "sempo",
+    "Jiho": "jiho",
+    "Chuken": "chuken",
+    "Fukusho": "fukusho",
+    "Taisho": "taisho",
+}
+
+# Parameters
+REFRESH_INTERVAL = 0.5  # Seconds between refreshes of the team grid
+SPARKLINE_RANGE = "-30s"
+SPARKLINE_EVERY = "500ms"  # Server-side downsampling: 60 points per 30 s sparkline
+
+def fetch_team_data():
+    """
+    One round trip for the whole team: the latest published prediction of every
+    player (see move_predictions.py) and their downsampled acceleration (for the
+    sparklines), as two named results of a single Flux query.
+    """
+    sensor_filter = " or ".join(f'r["sensor"] == "{sensor}"' for sensor in TEAM_SENSORS.values())
+    query = f'''
+    predictions = {latest_predictions_flux(INFLUXDB_BUCKET, TEAM_SENSORS.values()).strip()}
+      |> yield(name: "predictions")
+
+    spark = from(bucket: "{INFLUXDB_BUCKET}")
+      |> range(start: {SPARKLINE_RANGE})
+      |> filter(fn: (r) => r["_measurement"] == "gyro_status")
+      |> filter(fn: (r) => {sensor_filter})
+      |> filter(fn: (r) => r["_field"] == "accelX" or r["_field"] == "accelY" or r["_field"] == "accelZ")
+      |> aggregateWindow(every: {SPARKLINE_EVERY}, fn: mean, createEmpty: false)
+      |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+      |> yield(name: "spark")
+    '''
+    frames = get_influx_client().query_api().query_data_frame(query)
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame()
+    data = pd.concat(frames, ignore_index=True)
+    data["_time"] = pd.to_datetime(data["_time"])
+    return data[data["result"] == "predictions"], data[data["result"] == "spark"]
+
+def poll_team():
+    """
+    Fetch the whole team's predictions and sparklines in one query.
+    Runs on the shared poller thread.
+    """
+    predictions, spark = fetch_team_data()
+    team = {position: {"prediction": "No data", "avg_accel": None, "sparkline": None}
+            for position in TEAM_SENSORS}
+
+    # Classified by the predictor, which publishes one prediction per window and player
+    predictions = latest_predictions(predictions)
+    for position, sensor in TEAM_SENSORS.items():
+        if sensor in predictions:
+            team[position]["prediction"] = predictions[sensor]["move"]
+
+    # Sparklines are already downsampled by the query
+    for position, sensor in TEAM_SENSORS.items():
+        if spark.empty:
+            break
+        points = spark[spark["sensor"] == sensor].sort_values("_time").set_index("_time")
+        if points.empty:
+            continue
+        axes = points[["accelX", "accelY", "accelZ"]]
+        team[position]["avg_accel"] = axes.mean().mean()
+        team[position]["sparkline"] = np.sqrt((axes**2).sum(axis=1)).rename("accel")
+    return team
+
+@st.cache_resource
+def get_live_poller():
+    """
+    One poller per server process: every open tab reads the same snapshot.
+    """
+    return SharedPoller(poll_team, REFRESH_INTERVAL, name="team-poller")
+
+# Streamlit Configuration
+st.set_page_config(page_title="KiAI - Team View", page_icon="🤺", layout="wide")
+st.title("KiAI - Team View")
+
+# Initialize Session State
+if "is_running" not in st.session_state:
+    st.session_state.is_running = False
+
+# Lease id for the shared poller
+if "poller_session" not in st.session_state:
+    st.session_state.poller_session = uuid.uuid4().hex
+
+# Start/Stop Button
+if st.button("Start/Stop Data Fetching"):
+    st.session_state.is_running = not st.session_state.is_running
+    if not st.session_state.is_running:
+        get_live_poller().unsubscribe(st.session_state.poller_session)
+
+status = "Running" if st.session_state.is_running else "Stopped"
+st.write(f"Status: **{status}**")
+
+# Live section: one column per position, only this fragment reruns while running
+@st.fragment(run_every=REFRESH_INTERVAL if st.session_state.is_running else None)
+def live_team():
+    team = None
+    if st.session_state.is_running:
+        poller = get_live_poller()
+        snapshot = poller.subscribe(st.session_state.poller_session, timeout=REFRESH_INTERVAL)
+        if poller.last_error is not None:
+            st.error(f"Error fetching data from InfluxDB: {poller.last_error}")
+        if snapshot is not None:
+            team = snapshot.value
+
+    for column, position in zip(st.columns(len(TEAM_SENSORS)), TEAM_SENSORS):
+        player = team[position] if team else None
+        column.subheader(position)
+        column.metric("Prediction", player["prediction"] if player else "None")
+        avg_accel = player["avg_accel"] if player else None
+        column.metric("Avg Acceleration (m/s²)", f"{avg_accel:.2f}" if avg_accel is not None else "N/A")
+        if player and player["sparkline"] is not None:
+            column.line_chart(player["sparkline"], height=120)
+
+live_team()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The dashboard's modules are flat scripts run from Web_App/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
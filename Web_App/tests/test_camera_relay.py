@@ -0,0 +1,233 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+
+import pytest
+
+from camera_relay import MAX_CLIP_FRAMES, CameraRelay, Frame, MJPEGParser, RateMeter, fetch_clip, make_server
+from camera_relay_benchmark import ESP32_BOUNDARY, FakeCamera, fake_jpeg
+from frame_ring import FrameRing
+
+def esp32_part(jpeg, content_length=True):
+    length = f"Content-Length: {len(jpeg)}\r\n" if content_length else ""
+    return (f"\r\n--{ESP32_BOUNDARY}\r\nContent-Type: image/jpeg\r\n{length}\r\n"
+            .encode("latin-1") + jpeg)
+
+def frame_seq(jpeg):
+    # fake_jpeg() puts the frame number right after the SOI marker
+    return int.from_bytes(jpeg[2:6], "big")
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture()
+def relay_url():
+    """
+    Fake ESP32 camera -> CameraRelay -> relay HTTP server, all on localhost.
+    """
+    camera = FakeCamera(fps=50, frame_bytes=2000)
+    threading.Thread(target=camera.serve_forever, daemon=True).start()
+    relay = CameraRelay(f"http://127.0.0.1:{camera.server_address[1]}/stream", timeout=2.0)
+    relay.start()
+    server = make_server(relay, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    assert wait_until(lambda: relay.latest is not None and relay.latest.seq >= 5)
+    yield f"http://127.0.0.1:{server.server_address[1]}", relay, camera
+    relay.stop()
+    server.shutdown()
+    server.server_close()
+    camera.shutdown()
+    camera.server_close()
+
+def test_parser_splits_by_content_length_across_reads():
+    jpegs = [fake_jpeg(seq, 500) for seq in range(1, 4)]
+    stream = b"".join(esp32_part(jpeg) for jpeg in jpegs)
+    parser = MJPEGParser(ESP32_BOUNDARY)
+
+    # Small reads split the delimiter, headers and payloads
+    frames = []
+    for i in range(0, len(stream), 7):
+        frames += parser.feed(stream[i:i + 7])
+
+    assert frames == jpegs
+
+def test_parser_splits_at_boundary_without_content_length():
+    jpegs = [fake_jpeg(seq, 300) for seq in range(1, 4)]
+    stream = b"".join(esp32_part(jpeg, content_length=False) for jpeg in jpegs)
+    parser = MJPEGParser(ESP32_BOUNDARY)
+
+    # A part ends at the next boundary, so the last one is still pending
+    assert parser.feed(stream) == jpegs[:2]
+    assert parser.feed(f"\r\n--{ESP32_BOUNDARY}\r\n".encode("latin-1")) == jpegs[2:]
+
+def test_boundary_from_content_type():
+    assert MJPEGParser.boundary_from(f"multipart/x-mixed-replace;boundary={ESP32_BOUNDARY}") == ESP32_BOUNDARY
+    assert MJPEGParser.boundary_from('multipart/x-mixed-replace; boundary="--frame"') == "frame"
+    with pytest.raises(ValueError):
+        MJPEGParser.boundary_from("image/jpeg")
+
+def test_rate_meter_window():
+    meter = RateMeter(window=2.0)
+    for now in [0.0, 0.5, 1.0, 1.5, 2.0]:
+        meter.tick(now)
+
+    assert meter.rate(2.0) == 2.5
+    assert meter.rate(3.25) == 1.0  # Only 1.5 and 2.0 are within the window
+    assert meter.rate(10.0) == 0.0
+
+class YieldingDeque(deque):
+    """
+    Gives other threads a chance to run between checking the oldest tick and removing it.
+    """
+
+    def popleft(self):
+        time.sleep(0.001)
+        return super().popleft()
+
+def test_rate_meter_expires_once_across_threads():
+    meter = RateMeter(window=1.0)
+    meter.times = YieldingDeque([0.0])  # One tick that every reader will want to expire
+    errors = []
+
+    def read_rate():
+        try:
+            assert meter.rate(now=5.0) == 0.0
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read_rate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+def test_frame_ring_keeps_newest_frames_within_byte_cap():
+    ring = FrameRing(max_bytes=1000)
+    for seq in range(1, 11):
+        ring.append(Frame(seq, 100.0 + seq, b"x" * 300))
+    ring.append(Frame(11, 111.0, b"x" * 2000))  # Larger than the whole ring: not kept
+
+    assert len(ring) == 3 and ring.bytes == 900
+    assert ring.evicted == 7
+    assert ring.span() == (108.0, 110.0)
+    assert FrameRing().span() is None
+
+def test_stream_relays_camera_frames_in_order(relay_url):
+    url, relay, camera = relay_url
+
+    with urllib.request.urlopen(url + "/stream", timeout=5) as response:
+        parser = MJPEGParser(MJPEGParser.boundary_from(response.headers["Content-Type"]))
+        frames = []
+        while len(frames) < 5:
+            frames += parser.feed(response.read1(65536))
+
+    assert all(jpeg.startswith(b"\xff\xd8") and jpeg.endswith(b"\xff\xd9") for jpeg in frames)
+    seqs = [frame_seq(jpeg) for jpeg in frames]
+    assert seqs == sorted(seqs) and len(set(seqs)) == len(seqs)
+
+def test_viewers_share_one_camera_connection(relay_url):
+    url, relay, camera = relay_url
+    viewers = [urllib.request.urlopen(url + "/stream", timeout=5) for _ in range(3)]
+    try:
+        for viewer in viewers:
+            assert viewer.read1(65536)
+        assert wait_until(lambda: len(relay.stats()["clients"]) == 3)
+    finally:
+        for viewer in viewers:
+            viewer.close()
+
+    assert camera.connections == 1
+
+def test_snapshot_and_stats(relay_url):
+    url, relay, camera = relay_url
+
+    with urllib.request.urlopen(url + "/snapshot", timeout=5) as response:
+        assert response.headers["Content-Type"] == "image/jpeg"
+        snapshot = response.read()
+    with urllib.request.urlopen(url + "/stats", timeout=5) as response:
+        stats = json.load(response)
+
+    assert frame_seq(snapshot) <= relay.latest.seq
+    assert stats["connected"] and stats["upstream_errors"] == 0
+    assert stats["frames"] >= 5 and stats["fps"] > 0
+    assert stats["ring"]["frames"] >= 5
+
+def test_unknown_path_is_404(relay_url):
+    url, relay, camera = relay_url
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(url + "/nope", timeout=5)
+    assert error.value.code == 404
+
+CLIP_START = 1_700_000_000.0  # Capture time of the first buffered frame, 10 fps for 10 s
+
+@pytest.fixture()
+def clip_relay_url():
+    """
+    Relay HTTP server over a FrameRing holding 100 known frames; no camera attached.
+    """
+    relay = CameraRelay("http://127.0.0.1:9/stream")
+    for seq in range(1, 101):
+        relay.ring.append(Frame(seq, CLIP_START + (seq - 1) / 10, fake_jpeg(seq, 200)))
+    server = make_server(relay, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/stream", relay
+    server.shutdown()
+    server.server_close()
+
+def test_ring_between_full_partial_and_empty_ranges():
+    ring = FrameRing()
+    for seq in range(1, 11):
+        ring.append(Frame(seq, float(seq), b"x"))
+
+    assert [frame.seq for frame in ring.between(3.0, 5.0)] == [3, 4, 5]  # Inclusive
+    assert [frame.seq for frame in ring.between(8.5, 20.0)] == [9, 10]  # Runs past the newest
+    assert [frame.seq for frame in ring.between(-5.0, 1.5)] == [1]  # Starts before the oldest
+    assert ring.between(20.0, 30.0) == []
+    assert ring.between(5.2, 5.8) == []  # Between two frames
+    assert [frame.seq for frame in ring.between(1.0, 10.0, max_frames=4)] == [1, 3, 6, 8]
+
+def test_clip_returns_frames_in_range(clip_relay_url):
+    url, relay = clip_relay_url
+    frames = fetch_clip(url, CLIP_START + 2.0, CLIP_START + 2.45)
+
+    assert [frame.seq for frame in frames] == [21, 22, 23, 24, 25]
+    # Timestamps and JPEG bytes come back exactly as buffered
+    assert frames == relay.ring.between(CLIP_START + 2.0, CLIP_START + 2.45)
+
+def test_clip_partly_outside_the_buffer(clip_relay_url):
+    url, relay = clip_relay_url
+    before = fetch_clip(url, CLIP_START - 5.0, CLIP_START + 0.25)
+    after = fetch_clip(url, CLIP_START + 9.75, CLIP_START + 60.0)
+
+    assert [frame.seq for frame in before] == [1, 2, 3]
+    assert [frame.seq for frame in after] == [99, 100]
+
+def test_clip_outside_the_buffer_is_empty(clip_relay_url):
+    url, relay = clip_relay_url
+    assert fetch_clip(url, CLIP_START - 60.0, CLIP_START - 1.0) == []
+    assert fetch_clip(url, CLIP_START + 20.0, CLIP_START + 30.0) == []
+
+def test_long_clip_is_thinned(clip_relay_url):
+    url, relay = clip_relay_url
+    frames = fetch_clip(url, CLIP_START, CLIP_START + 10.0, max_frames=MAX_CLIP_FRAMES)
+
+    assert len(frames) == MAX_CLIP_FRAMES
+    assert frames[0].seq == 1
+    assert [frame.seq for frame in frames] == sorted(frame.seq for frame in frames)
+
+def test_clip_without_range_is_400(clip_relay_url):
+    url, relay = clip_relay_url
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(url.replace("/stream", "/clip?start=1"), timeout=5)
+    assert error.value.code == 400
@@ -0,0 +1,72 @@
+import ast
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import kurtosis, skew
+
+from features import FEATURE_AXES, FeatureWindower, feature_order, window_features
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PREDICTOR = os.path.join(HERE, "..", "..", "Cloud_Computing", "app.py")
+LEGACY_EXPORT = os.path.join(HERE, "..", "..", "last_minute_data.csv")
+
+# scipy warns about skew/kurtosis of windows where an axis doesn't change; both sides get nan
+pytestmark = pytest.mark.filterwarnings("ignore:Precision loss:RuntimeWarning")
+
+def load_predictor():
+    """
+    The predictor's own extract_features and feature_order, taken from its source:
+    Cloud_Computing/app.py connects to InfluxDB and starts predicting when imported.
+    """
+    with open(PREDICTOR) as file:
+        tree = ast.parse(file.read())
+    wanted = [node for node in tree.body
+              if isinstance(node, ast.FunctionDef) and node.name == "extract_features"
+              or isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "feature_order"
+                                                       for target in node.targets)]
+    namespace = {"pd": pd, "skew": skew, "kurtosis": kurtosis}
+    exec(compile(ast.Module(body=wanted, type_ignores=[]), PREDICTOR, "exec"), namespace)
+    return namespace["extract_features"], namespace["feature_order"]
+
+predictor_extract_features, predictor_feature_order = load_predictor()
+
+def legacy_windows(window_size=10, hop=5):
+    samples = pd.read_csv(LEGACY_EXPORT)[FEATURE_AXES]
+    for start in range(0, len(samples) - window_size + 1, hop):
+        yield samples.iloc[start:start + window_size].reset_index(drop=True)
+
+def predictor_features(window):
+    return predictor_extract_features(window)[predictor_feature_order].to_numpy()[0]
+
+def test_feature_order_matches_predictor():
+    assert feature_order == predictor_feature_order
+
+def test_window_features_match_predictor_on_legacy_windows():
+    windows = list(legacy_windows())
+    assert len(windows) > 10
+
+    for window in windows:
+        np.testing.assert_allclose(window_features(window.to_numpy()), predictor_features(window),
+                                   rtol=1e-9, atol=1e-12, equal_nan=True)
+
+def test_window_features_match_predictor_with_constant_axis():
+    rng = np.random.default_rng(0)
+    window = pd.DataFrame(rng.normal(size=(10, len(FEATURE_AXES))), columns=FEATURE_AXES)
+    window["roll"] = -78.75  # A sensor that didn't move: zero std, undefined skew and kurtosis
+
+    np.testing.assert_allclose(window_features(window.to_numpy()), predictor_features(window),
+                               rtol=1e-9, atol=1e-12, equal_nan=True)
+
+@pytest.mark.parametrize("window_size, hop", [(10, 5), (10, 10), (4, 1)])
+def test_windower_emits_predictor_windows(window_size, hop):
+    samples = pd.read_csv(LEGACY_EXPORT)[FEATURE_AXES]
+    windower = FeatureWindower(window_size, hop)
+    emitted = [windower.push(i, row) for i, row in enumerate(samples.to_numpy())]
+    emitted = [features for features in emitted if features is not None]
+    expected = [predictor_features(window) for window in legacy_windows(window_size, hop)]
+
+    assert len(emitted) == len(expected)
+    for (_, features), reference in zip(emitted, expected):
+        np.testing.assert_allclose(features, reference, rtol=1e-9, atol=1e-12, equal_nan=True)
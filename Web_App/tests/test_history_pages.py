@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pandas as pd
+
+from history_pages import HistoryLoader
+
+START = pd.Timestamp("2024-01-01", tz="UTC")
+SPAN = pd.Timedelta("5min")
+WIDTH = 1200
+
+class RecordingFetch:
+    """
+    fetch_fn that records its calls; pages listed in `blocked` wait for `release`.
+    """
+
+    def __init__(self, blocked=()):
+        self.calls = []
+        self.blocked = set(blocked)
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, start, stop, every_ms):
+        with self._lock:
+            self.calls.append(start)
+        if start in self.blocked:
+            self.release.wait(5)
+        return pd.DataFrame({"accelX": [start.value]})
+
+def test_hit_after_miss():
+    fetch = RecordingFetch()
+    loader = HistoryLoader(fetch)
+
+    first = loader.get(START, SPAN, WIDTH, prefetch=False)
+    again = loader.get(START, SPAN, WIDTH, prefetch=False)
+
+    assert again is first
+    assert fetch.calls == [START]
+    assert loader.stats() == {"pages": 1, "hits": 1, "misses": 1, "prefetched": 0, "inflight": 0}
+
+def test_miss_does_not_wait_behind_prefetches():
+    busy = [START + i * SPAN for i in (10, 11, 12)]
+    fetch = RecordingFetch(blocked=busy[:2])  # Both prefetch workers stuck
+    loader = HistoryLoader(fetch, prefetch_workers=2)
+    for start in busy:
+        loader.prefetch(start, SPAN, WIDTH)
+
+    began = time.monotonic()
+    page = loader.get(START, SPAN, WIDTH, prefetch=False)
+    assert time.monotonic() - began < 1
+    assert page["accelX"][0] == START.value
+
+    # The third prefetch was still queued: reading it loads it here, once
+    page = loader.get(busy[2], SPAN, WIDTH, prefetch=False)
+    assert page["accelX"][0] == busy[2].value
+    fetch.release.set()
+    loader._executor.shutdown(wait=True)
+    assert fetch.calls.count(busy[2]) == 1
+
+def test_concurrent_reads_fetch_a_page_once():
+    fetch = RecordingFetch(blocked=[START])
+    loader = HistoryLoader(fetch)
+    pages = []
+    readers = [threading.Thread(target=lambda: pages.append(loader.get(START, SPAN, WIDTH, prefetch=False)))
+               for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    time.sleep(0.1)
+    fetch.release.set()
+    for reader in readers:
+        reader.join()
+
+    assert fetch.calls == [START]
+    assert len(pages) == 4 and all(page is pages[0] for page in pages)
+    assert loader.stats()["inflight"] == 0
+
+def test_page_still_filling_is_not_cached():
+    fetch = RecordingFetch()
+    loader = HistoryLoader(fetch)
+    now = pd.Timestamp.now(tz="UTC")
+
+    loader.get(now - SPAN / 2, SPAN, WIDTH, prefetch=False)
+    loader.get(now - SPAN / 2, SPAN, WIDTH, prefetch=False)
+
+    assert len(fetch.calls) == 2
+    assert loader.stats()["pages"] == 0
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi
+
+from imu_filters import GRAVITY_CUTOFF_HZ, StreamingFilterBank
+
+# Export of the legacy gyro_status stream (~1.35 Hz)
+LEGACY_EXPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "last_minute_data.csv")
+
+def imu_samples(rows=2000, channels=6, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(rows) / 100
+    return np.column_stack([np.sin(2 * np.pi * (c + 1) * t) + rng.normal(0, 0.2, rows) + c
+                            for c in range(channels)])
+
+def single_call(bank, samples):
+    # The same filter over the whole stream at once, from the same steady-state start
+    zi = sosfilt_zi(bank.sos)[:, :, None] * samples[0]
+    return sosfilt(bank.sos, samples, axis=0, zi=zi)[0]
+
+@pytest.mark.parametrize("kind", ["lowpass", "highpass", "gravity"])
+def test_chunks_match_one_sosfilt_call(kind):
+    samples = imu_samples()
+    bank = StreamingFilterBank(kind, cutoff_hz=5.0)
+    rng = np.random.default_rng(1)
+    cuts = np.sort(rng.choice(np.arange(1, len(samples)), size=60, replace=False))
+
+    filtered = np.concatenate([bank.process(chunk) for chunk in np.split(samples, cuts)])
+
+    np.testing.assert_allclose(filtered, single_call(bank, samples), rtol=1e-12, atol=1e-12)
+
+def test_lowpass_starts_without_ringing():
+    samples = np.full((50, 3), [0.1, -0.2, 1.0])
+    filtered = StreamingFilterBank("lowpass", cutoff_hz=10.0).process(samples)
+    np.testing.assert_allclose(filtered, samples)
+
+def test_gravity_removes_the_constant_part():
+    bank = StreamingFilterBank("gravity", cutoff_hz=99.0)
+    expected = StreamingFilterBank("highpass", cutoff_hz=GRAVITY_CUTOFF_HZ)
+    np.testing.assert_array_equal(bank.sos, expected.sos)
+
+    samples = imu_samples(rows=6000, channels=1)
+    filtered = np.concatenate([bank.process(chunk) for chunk in np.array_split(samples, 100)])
+    assert abs(filtered[-1000:].mean()) < 0.05
+
+def test_reset_starts_a_new_stream():
+    samples = imu_samples()
+    bank = StreamingFilterBank("lowpass", cutoff_hz=5.0)
+    bank.process(samples[:500])
+
+    bank.reset()
+
+    np.testing.assert_allclose(bank.process(samples[500:]), single_call(bank, samples[500:]), rtol=1e-12, atol=1e-12)
+
+def test_process_frame_keeps_labels_and_empty_chunks_pass_through():
+    samples = imu_samples(rows=100, channels=3)
+    index = pd.date_range("2024-01-01", periods=100, freq="10ms", tz="UTC")
+    frame = pd.DataFrame(samples, index=index, columns=["accelX", "accelY", "accelZ"])
+    bank = StreamingFilterBank("lowpass", cutoff_hz=5.0)
+
+    first = bank.process_frame(frame.iloc[:40])
+    assert bank.process_frame(frame.iloc[40:40]).empty
+    second = bank.process_frame(frame.iloc[40:])
+
+    filtered = pd.concat([first, second])
+    assert filtered.index.equals(frame.index) and list(filtered.columns) == list(frame.columns)
+    np.testing.assert_allclose(filtered.to_numpy(), single_call(bank, samples), rtol=1e-12, atol=1e-12)
+
+def frame_at(samples, freq="10ms", start="2024-01-01"):
+    index = pd.date_range(start, periods=len(samples), freq=freq, tz="UTC")
+    return pd.DataFrame(samples, index=index, columns=[f"c{i}" for i in range(samples.shape[1])])
+
+def test_measured_rate_matches_the_fixed_design():
+    samples = imu_samples(rows=500, channels=3)
+    frame = frame_at(samples)
+    measured = StreamingFilterBank("lowpass", cutoff_hz=5.0, sample_rate_hz=None)
+    fixed = StreamingFilterBank("lowpass", cutoff_hz=5.0)
+
+    filtered = pd.concat([measured.process_frame(frame.iloc[:1]), measured.process_frame(frame.iloc[1:200]),
+                          measured.process_frame(frame.iloc[200:])])
+
+    assert measured.sample_rate_hz == pytest.approx(100.0)
+    np.testing.assert_array_equal(measured.sos, fixed.sos)
+    # The first sample arrived alone, before the rate was known, and passes through
+    np.testing.assert_array_equal(filtered.iloc[0], frame.iloc[0])
+    np.testing.assert_allclose(filtered.iloc[1:], single_call(fixed, samples[1:]), rtol=1e-12, atol=1e-12)
+
+def test_cutoff_above_nyquist_passes_samples_through():
+    # The legacy uploader's stream: ~1.35 Hz, so a 10 Hz low-pass can't be realised
+    legacy = pd.read_csv(LEGACY_EXPORT, parse_dates=["_time"]).set_index("_time")[["accelX", "accelY", "accelZ"]]
+    bank = StreamingFilterBank("lowpass", cutoff_hz=10.0, sample_rate_hz=None)
+
+    filtered = pd.concat([bank.process_frame(legacy.iloc[:40]), bank.process_frame(legacy.iloc[40:])])
+
+    assert bank.passthrough and bank.sample_rate_hz == pytest.approx(1.39, abs=0.05)
+    pd.testing.assert_frame_equal(filtered, legacy)
+
+def test_gap_restarts_the_filter_but_keeps_the_rate():
+    samples = imu_samples(rows=400, channels=2)
+    bank = StreamingFilterBank("lowpass", cutoff_hz=5.0, sample_rate_hz=None)
+    bank.process_frame(frame_at(samples[:200]))
+
+    after_gap = bank.process_frame(frame_at(samples[200:], start="2024-01-01 00:00:10"))
+
+    assert bank.sample_rate_hz == pytest.approx(100.0)
+    np.testing.assert_allclose(after_gap, single_call(bank, samples[200:]), rtol=1e-12, atol=1e-12)
+
+def test_reset_measures_the_rate_again():
+    bank = StreamingFilterBank("lowpass", cutoff_hz=5.0, sample_rate_hz=None)
+    bank.process_frame(frame_at(imu_samples(rows=50)))
+    bank.reset()
+
+    bank.process_frame(frame_at(imu_samples(rows=50), freq="20ms"))
+
+    assert bank.sample_rate_hz == pytest.approx(50.0)
@@ -0,0 +1,7 @@
+from imu_frames import sensor_filter
+
+def test_sensor_filter_accepts_untagged_rows_by_default():
+    assert sensor_filter("individual") == '(not exists r["sensor"] or r["sensor"] == "individual")'
+
+def test_sensor_filter_can_require_the_tag():
+    assert sensor_filter("player_3", include_untagged=False) == 'r["sensor"] == "player_3"'
@@ -0,0 +1,109 @@
+import threading
+import time
+
+from live_poller import SharedPoller
+
+INTERVAL = 0.02
+
+class CountingFetch:
+    def __init__(self, fail_first=0):
+        self.calls = 0
+        self.fail_first = fail_first
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        if calls <= self.fail_first:
+            raise RuntimeError("InfluxDB unavailable")
+        return {"poll": calls}
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+def poller_running(poller):
+    return poller._thread is not None and poller._thread.is_alive()
+
+def test_first_subscribe_waits_for_the_first_poll():
+    poller = SharedPoller(CountingFetch(), INTERVAL, lease_seconds=1.0)
+
+    snapshot = poller.subscribe("a", timeout=1.0)
+
+    assert snapshot.version == 1 and snapshot.value == {"poll": 1}
+    poller.unsubscribe("a")
+
+def test_sessions_share_one_poll_loop():
+    fetch = CountingFetch()
+    poller = SharedPoller(fetch, INTERVAL, lease_seconds=1.0)
+    for session in "abcde":
+        poller.subscribe(session)
+    time.sleep(10 * INTERVAL)
+
+    # One fetch per interval however many sessions watch, each published once
+    assert fetch.calls <= 12
+    snapshot = poller.snapshot()
+    assert snapshot.version == poller.polls
+    assert fetch.calls - poller.polls in (0, 1)  # One may be in flight
+    assert poller.subscribers() == 5
+    for session in "abcde":
+        poller.unsubscribe(session)
+
+def test_stops_after_the_last_unsubscribe_and_restarts():
+    fetch = CountingFetch()
+    poller = SharedPoller(fetch, INTERVAL, lease_seconds=1.0)
+    poller.subscribe("a", timeout=1.0)
+    poller.subscribe("b")
+
+    poller.unsubscribe("a")
+    time.sleep(3 * INTERVAL)
+    assert poller_running(poller)
+
+    poller.unsubscribe("b")
+    assert wait_until(lambda: not poller_running(poller))
+    calls = fetch.calls
+    time.sleep(5 * INTERVAL)
+    assert fetch.calls == calls
+
+    # The last snapshot is kept, and a new subscriber restarts polling from it
+    version = poller.snapshot().version
+    poller.subscribe("c")
+    assert poller_running(poller)
+    assert wait_until(lambda: poller.snapshot().version > version)
+    poller.unsubscribe("c")
+
+def test_expired_lease_stops_the_poller():
+    fetch = CountingFetch()
+    poller = SharedPoller(fetch, INTERVAL, lease_seconds=0.1)
+    poller.subscribe("closed-tab", timeout=1.0)
+
+    # The tab never renews its lease
+    assert wait_until(lambda: not poller_running(poller), timeout=1.0)
+    assert poller.subscribers() == 0
+
+def test_renewing_the_lease_keeps_it_running():
+    poller = SharedPoller(CountingFetch(), INTERVAL, lease_seconds=0.1)
+    for _ in range(10):
+        poller.subscribe("a")
+        time.sleep(0.05)
+        assert poller_running(poller)
+    poller.unsubscribe("a")
+
+def test_failed_polls_are_counted_and_polling_continues():
+    poller = SharedPoller(CountingFetch(fail_first=2), INTERVAL, lease_seconds=1.0)
+
+    # The first subscribe returns as soon as the first poll has failed
+    started = time.monotonic()
+    assert poller.subscribe("a", timeout=1.0) is None
+    assert time.monotonic() - started < 0.5
+    assert isinstance(poller.last_error, RuntimeError)
+
+    assert wait_until(lambda: poller.snapshot() is not None)
+    assert poller.errors == 2 and poller.last_error is None
+    assert poller.snapshot().version == 1
+    poller.unsubscribe("a")
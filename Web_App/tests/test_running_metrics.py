@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from running_metrics import RunningMean, RunningSmoothness
+
+AXES = ["accelX", "accelY", "accelZ"]
+
+def imu_stream(rows=3000, seed=0):
+    """
+    100 Hz accelerometer samples with jittered timestamps, a few NaNs and a repeated timestamp.
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.choice([10, 10, 10, 9, 11, 0, 40], size=rows, p=[0.5, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05])
+    steps[0] = 0
+    times = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(np.cumsum(steps), unit="ms")
+    times = pd.DatetimeIndex(times).unique()
+    frame = pd.DataFrame(rng.normal(0, 0.3, size=(len(times), 3)) + [0, 0, 1], index=times, columns=AXES)
+    frame.iloc[rng.choice(len(frame), size=20, replace=False), rng.integers(0, 3)] = np.nan
+    return frame
+
+def polls(frame, window, seed=1):
+    """
+    The overlapping windows a dashboard polling `frame` would see: each ends a random
+    number of rows after the last one and starts `window` before its end.
+    """
+    rng = np.random.default_rng(seed)
+    end = 1
+    while end < len(frame):
+        end = min(end + int(rng.integers(1, 80)), len(frame))
+        stop_time = frame.index[end - 1]
+        yield frame[(frame.index > stop_time - window) & (frame.index <= stop_time)]
+
+def batch_smoothness(window, smooth_threshold, fill_jerk):
+    """
+    The full recompute RunningSmoothness replaces (app.py with fill_jerk=0.0,
+    move_analysis.py with fill_jerk=None).
+    """
+    magnitude = np.sqrt(window["accelX"]**2 + window["accelY"]**2 + window["accelZ"]**2)
+    dt = window.index.to_series().diff().dt.total_seconds()
+    if fill_jerk is None:
+        jerk = magnitude.diff() / dt
+    else:
+        jerk = magnitude.diff().fillna(fill_jerk) / dt.fillna(1)
+    smooth = jerk.abs() < smooth_threshold
+    return magnitude, jerk, smooth
+
+@pytest.mark.parametrize("fill_jerk", [0.0, None])
+@pytest.mark.parametrize("window", [pd.Timedelta("300ms"), pd.Timedelta("3s")])
+def test_running_smoothness_matches_batch(fill_jerk, window):
+    frame = imu_stream()
+    running = RunningSmoothness(smooth_threshold=0.5, fill_jerk=fill_jerk)
+
+    for poll in polls(frame, window):
+        running.update(poll)
+        magnitude, jerk, smooth = batch_smoothness(poll, 0.5, fill_jerk)
+
+        assert len(running) == len(poll)
+        np.testing.assert_allclose(running.avg_magnitude(), magnitude.mean(), rtol=1e-9)
+        np.testing.assert_allclose(running.mean_jerk(), jerk.mean(), rtol=1e-9, atol=1e-9)
+        assert running.smooth_percentage() == smooth.mean() * 100
+
+        rows = running.rows()
+        assert list(rows["timestamp"]) == list(poll.index)
+        np.testing.assert_array_equal(rows["accel_magnitude"], magnitude.to_numpy())
+        np.testing.assert_allclose(rows["jerk"], jerk.to_numpy(), rtol=1e-12)
+        np.testing.assert_array_equal(rows["is_smooth"], smooth.to_numpy())
+
+def test_running_smoothness_head_is_the_window_start():
+    # The first sample of every window counts as having no predecessor, although the
+    # running state knows the one that was just evicted
+    times = pd.date_range("2024-01-01", periods=50, freq="10ms", tz="UTC")
+    frame = pd.DataFrame([[0.0, 0.0, 1.0], [0.0, 0.0, 5.0]] * 25, index=times, columns=AXES)
+    running = RunningSmoothness(smooth_threshold=0.5, fill_jerk=0.0)
+
+    running.update(frame.iloc[:10])
+    running.update(frame.iloc[1:11])
+
+    rows = running.rows()
+    assert rows["jerk"][0] == 0.0 and rows["is_smooth"][0]
+    assert running.smooth_percentage() == 10.0
+
+def test_running_smoothness_timestamps_from_a_column():
+    frame = imu_stream(rows=500)
+    data = frame.reset_index().rename(columns={"index": "timestamp"})
+    running = RunningSmoothness(smooth_threshold=0.5)
+
+    running.update(data.iloc[:300], times=data["timestamp"].iloc[:300])
+    running.update(data.iloc[100:], times=data["timestamp"].iloc[100:])
+
+    _, _, smooth = batch_smoothness(frame.iloc[100:], 0.5, None)
+    assert running.smooth_percentage() == smooth.mean() * 100
+    assert "jerk" not in data
+
+def test_running_mean_matches_batch():
+    frame = imu_stream()
+    running = RunningMean(AXES)
+
+    for poll in polls(frame, pd.Timedelta("1s")):
+        running.update(poll)
+        pd.testing.assert_series_equal(running.means(), poll[AXES].mean(), rtol=1e-9)
+
+def test_running_mean_of_an_emptied_window():
+    frame = imu_stream(rows=100)
+    running = RunningMean(AXES).update(frame)
+
+    running.update(frame.iloc[:0], window_start=frame.index[-1] + pd.Timedelta("1s"))
+
+    assert len(running) == 0
+    assert running.means().isna().all()
+
+def test_running_smoothness_across_a_gap_matches_batch():
+    # Rows before a pause in the stream stay in the window until they age out
+    frame = imu_stream(rows=600)
+    frame.index = frame.index.where(np.arange(len(frame)) < 300, frame.index + pd.Timedelta("5s"))
+    running = RunningSmoothness(smooth_threshold=0.5, fill_jerk=0.0)
+
+    for poll in polls(frame, pd.Timedelta("8s")):
+        running.update(poll)
+        _, jerk, smooth = batch_smoothness(poll, 0.5, 0.0)
+        np.testing.assert_allclose(running.mean_jerk(), jerk.mean(), rtol=1e-9, atol=1e-9)
+        assert running.smooth_percentage() == smooth.mean() * 100
@@ -0,0 +1,34 @@
+from serial_frames import MAX_DETECT_BYTES, FrameDecoder, encode_environment_frame
+
+def test_json_link_opened_mid_line():
+    decoder = FrameDecoder()
+    # The tail of a record is dropped; the format is known from the first whole one
+    assert decoder.feed(b'ure": 21.5}\n{"mic": 1, "temperature": 20.5') == []
+    assert decoder.mode is None
+    assert decoder.feed(b', "humidity": 40}\n{"mic": 0}\n') == [
+        {"mic": 1, "temperature": 20.5, "humidity": 40},
+        {"mic": 0},
+    ]
+    assert decoder.mode == "json"
+    assert decoder.parse_errors == 0
+
+def test_json_records_that_are_not_objects_are_parse_errors():
+    decoder = FrameDecoder(mode="json")
+    assert decoder.feed(b'[1, 2]\n5\n"error"\n{"mic": 1}\n') == [{"mic": 1}]
+    assert decoder.parse_errors == 3
+
+def test_undetected_buffer_is_bounded():
+    decoder = FrameDecoder()
+    for _ in range(10):
+        assert decoder.feed(b"x" * 1000) == []
+    assert decoder.mode is None
+    assert len(decoder.buffer) <= MAX_DETECT_BYTES
+
+def test_binary_frames_count_drops():
+    decoder = FrameDecoder()
+    data = b"".join(encode_environment_frame(seq, mic=1, temperature=21.25, humidity=40.5) for seq in (1, 2, 5))
+    records = decoder.feed(data)
+    assert decoder.mode == "binary"
+    assert [record["seq"] for record in records] == [1, 2, 5]
+    assert records[0]["temperature"] == 21.25
+    assert decoder.dropped == 2
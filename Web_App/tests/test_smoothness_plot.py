@@ -0,0 +1,65 @@
+import gc
+import io
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from smoothness_plot import SmoothnessPlot
+
+def window_at(tick, rows=3000):
+    """
+    30 s of 100 Hz acceleration magnitude ending at refresh `tick` (0.5 s apart).
+    """
+    end = pd.Timestamp("2024-01-01", tz="UTC") + pd.Timedelta(seconds=tick * 0.5)
+    timestamps = pd.Series(pd.date_range(end=end, periods=rows, freq="10ms"))
+    magnitude = 1 + 0.5 * np.sin(np.arange(rows) / 100 + tick)
+    return timestamps, magnitude, np.abs(np.diff(magnitude, prepend=magnitude[0])) * 100 < 0.5
+
+def render(plot, tick, rows=3000):
+    fig = plot.update(*window_at(tick, rows))
+    fig.savefig(io.BytesIO(), format="png", dpi=40)
+    return fig
+
+def test_refreshes_reuse_one_figure():
+    plot = SmoothnessPlot()
+    figures = {id(render(plot, tick)) for tick in range(20)}
+
+    assert figures == {id(plot.fig)}
+    assert len(plot.ax.lines) == 1 and len(plot.ax.collections) == 1
+    assert plt.get_fignums() == []
+
+def test_decimates_long_windows():
+    plot = SmoothnessPlot(max_points=500)
+    plot.update(*window_at(0, rows=18000))
+
+    assert len(plot.line.get_xdata()) <= 500
+    assert len(plot.scatter.get_offsets()) == len(plot.line.get_xdata())
+
+def test_memory_is_flat_over_many_refreshes():
+    plot = SmoothnessPlot()
+    for tick in range(20):  # Warm-up: caches in matplotlib and pandas fill here
+        render(plot, tick)
+    gc.collect()
+    figures = sum(isinstance(obj, Figure) for obj in gc.get_objects())
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for tick in range(20, 120):
+            # Rendering is slow under tracemalloc; every tenth refresh is drawn
+            if tick % 10:
+                plot.update(*window_at(tick, rows=1000))
+            else:
+                render(plot, tick, rows=1000)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert current - baseline < 2 * 2**20
+    assert sum(isinstance(obj, Figure) for obj in gc.get_objects()) == figures